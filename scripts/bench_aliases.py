@@ -0,0 +1,102 @@
+"""Requests sent to the weather API for spelling variants of the same locations,
+with and without the location alias index, against synthetic timelines. No
+network access nor API key is needed.
+
+Each location is looked up with several spellings ("Toulouse", "toulouse ",
+"Toulouse, France"...) during several hours, so cached snapshots expire between
+lookups, then the daily weather of all the spellings is fetched in a batch, as
+for the subscribers of the daily weather. Without the index, each spelling has
+its own snapshot, renewed separately.
+
+Usage (from the repository root):
+    python -m scripts.bench_aliases --locations 20 --lookups 2000 --hours 6
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.apis.weather.synthetic import SyntheticTimelines
+from sunbot.core import AliasIndex, SyntheticTransport, TTLCache
+from sunbot.core.metrics import RequestMetrics
+
+DOMAIN = "bench.invalid"
+
+
+def spellings(location_name: str) -> List[str]:
+    """Return spellings of a location name typed by users"""
+    return [
+        location_name,
+        location_name.lower(),
+        f" {location_name.upper()} ",
+        f"{location_name}, France",
+        f"{location_name.lower()},france",
+    ]
+
+
+async def run(
+    names: List[str], batch: List[str], hours: float, aliases: Optional[AliasIndex]
+) -> Dict[str, int]:
+    """Look up the rain of each name in turn during `hours`, then the daily
+    weather of the batch, and return the number of requests sent for each"""
+    now = [time.time()]
+    metrics = RequestMetrics()
+    cache = TTLCache(max_size=4096, clock=lambda: now[0])
+    handler = VisualCrossingHandler(
+        domain_name=DOMAIN,
+        protocol="http",
+        cache=cache,
+        metrics=metrics,
+        transport=SyntheticTransport(SyntheticTimelines(seed=0)),
+        aliases=aliases,
+        max_stale={"rain": 0.0},
+    )
+    for name in names:
+        await handler.aget_rain_data(name)
+        now[0] += hours * 3600 / len(names)
+    lookups_requests = metrics.stats(DOMAIN)["attempts"]
+    results = await handler.aget_daily_weather_data_many(batch)
+    await handler.close()
+    return {
+        "lookups": lookups_requests,
+        "batch": metrics.stats(DOMAIN)["attempts"] - lookups_requests,
+        "answered": sum(1 for result in results.values() if result.ok),
+    }
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locations", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--hours", type=float, default=6.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+
+    rng = random.Random(args.seed)
+    variants = [spellings(f"Ville{idx}") for idx in range(args.locations)]
+    names = [rng.choice(rng.choice(variants)) for _ in range(args.lookups)]
+    batch = [name for location_variants in variants for name in location_variants]
+
+    print(f"{'alias index':<12} {'lookup req':>10} {'batch req':>10} {'answered':>9}")
+    for label, aliases in (("off", None), ("on", AliasIndex())):
+        result = asyncio.run(run(names, batch, args.hours, aliases))
+        print(
+            f"{label:<12} {result['lookups']:>10} {result['batch']:>10} "
+            f"{result['answered']:>4}/{len(batch):<4}"
+        )
+        if aliases is not None:
+            stats = aliases.stats()
+            print(
+                f"{stats['names']} names for {stats['locations']} locations, "
+                f"{stats['merged_lookups']} lookups merged"
+            )
+
+
+if __name__ == "__main__":
+    main()
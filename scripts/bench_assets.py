@@ -0,0 +1,119 @@
+"""Render time of the current weather and daily weather images, with backgrounds
+and icons decoded from the disk for each image, as before the asset store, or
+taken from the asset store. Images are saved in a temporary directory, and the
+time spent encoding them is reported apart, as it does not depend on assets.
+
+Usage (from the repository root):
+    python -m scripts.bench_assets --renders 30
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import sunbot.weather.Meteo as weather
+from sunbot.SunImager import SunImage
+from sunbot.core import AssetStore
+
+CONDITIONS = ["type_2", "type_8", "type_21", "type_31", "type_37", "type_41", "type_43"]
+
+
+def weather_data(rng: random.Random) -> Dict:
+    """Return current and daily weather data with random values"""
+    return {
+        "conditions": rng.choice(CONDITIONS),
+        "temp": rng.uniform(-5, 35),
+        "feelslike": rng.uniform(-5, 35),
+        "tempmin": rng.uniform(-5, 15),
+        "tempmax": rng.uniform(15, 35),
+        "preciptype": [rng.choice(["rain", "snow"])],
+        "precipprob": rng.randint(0, 100),
+        "precip": round(rng.uniform(0, 10), 1),
+        "snowdepth": 0.0,
+        "snow": 0.0,
+        "windspeed": round(rng.uniform(0, 60), 1),
+        "winddir": float(rng.randint(0, 359)),
+        "windgust": round(rng.uniform(0, 90), 1),
+        "humidity": rng.randint(20, 100),
+        "pressure": rng.randint(990, 1030),
+        "visibility": rng.uniform(1, 20),
+        "uvindex": rng.randint(0, 10),
+        "cloudcover": rng.randint(0, 100),
+        "sunrise": "07:42:00",
+        "sunset": "19:03:00",
+        "as_of": time.time(),
+    }
+
+
+# Time spent encoding and writing images, in ms:
+save_times: List[float] = []
+_save_img = SunImage.save_img
+
+
+def timed_save_img(image: SunImage, *args, **kwargs) -> None:
+    """Save an image and record the time spent"""
+    start = time.perf_counter()
+    _save_img(image, *args, **kwargs)
+    save_times.append((time.perf_counter() - start) * 1000)
+
+
+def measure(render: Callable[[Dict], None], data: List[Dict]) -> List[float]:
+    """Render an image for each data and return render times, in ms"""
+    times = []
+    for item in data:
+        start = time.perf_counter()
+        render(item)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Icons missing from the weather types are logged for each image:
+    logging.disable(logging.ERROR)
+    SunImage.save_img = timed_save_img
+
+    rng = random.Random(args.seed)
+    data = [weather_data(rng) for _ in range(args.renders)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cards = {
+            "current": lambda item: weather.createCurrentWeatherImage(item, tmp_dir),
+            "daily": lambda item: weather.create_daily_weather_img(item, tmp_dir),
+        }
+        print(
+            f"{'card':<8} {'assets':<8} {'mean ms':>8} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'save ms':>8} {'disk loads':>11}"
+        )
+        for card, render in cards.items():
+            # A one byte budget keeps no asset, so each image decodes its files:
+            for label, store in (("disk", AssetStore(1)), ("store", AssetStore())):
+                SunImage.assets = store
+                if label == "store":
+                    weather.preload_assets()
+                loads = store.loads
+                save_times.clear()
+                times = sorted(measure(render, data))
+                print(
+                    f"{card:<8} {label:<8} {statistics.mean(times):>8.1f} "
+                    f"{times[len(times) // 2]:>8.1f} "
+                    f"{times[int(len(times) * 0.95)]:>8.1f} "
+                    f"{statistics.mean(save_times):>8.1f} "
+                    f"{(store.loads - loads) / len(data):>11.1f}"
+                )
+        stats = SunImage.assets.stats()
+        print(
+            f"asset store: {stats['size']} assets, {stats['bytes'] / 2**20:.1f} MiB, "
+            f"hit ratio {stats['hit_ratio']:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
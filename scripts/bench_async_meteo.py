@@ -0,0 +1,69 @@
+"""Throughput of concurrent `/meteo` lookups, blocking versus asynchronous path.
+
+Each simulated command fetches the current weather of a location from a local
+stub server, as `SunController.meteo` does. With the blocking path, commands are
+serialized because each request freezes the event loop; with the asynchronous
+path they overlap.
+
+Usage (from the repository root):
+    python -m scripts.bench_async_meteo --calls 50 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from scripts.stub_server import StubServer
+from sunbot.apis.weather import VisualCrossingHandler
+
+
+async def run_sync(handler: VisualCrossingHandler, nb_calls: int) -> float:
+    """Run `nb_calls` concurrent commands using the blocking request path"""
+
+    async def command(idx: int) -> None:
+        handler.get_current_weather_data(f"Location{idx}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(command(i) for i in range(nb_calls)))
+    return time.perf_counter() - start
+
+
+async def run_async(handler: VisualCrossingHandler, nb_calls: int) -> float:
+    """Run `nb_calls` concurrent commands using the asynchronous request path"""
+
+    async def command(idx: int) -> None:
+        await handler.aget_current_weather_data(f"Location{idx}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(command(i) for i in range(nb_calls)))
+    elapsed = time.perf_counter() - start
+    await handler.close()
+    return elapsed
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+    server = StubServer(latency=args.latency).start()
+    try:
+        for name, runner in (("blocking", run_sync), ("asyncio", run_async)):
+            handler = VisualCrossingHandler(
+                domain_name=server.domain_name, protocol="http"
+            )
+            elapsed = asyncio.run(runner(handler, args.calls))
+            print(
+                f"{name:>8}: {args.calls} calls in {elapsed:.2f}s "
+                f"-> {args.calls / elapsed:.1f} commands/s"
+            )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Daily weather fan-out of `VisualCrossingHandler` against a local stub server:
+requests sent to the web API and duration of the fan-out, when each location is
+fetched on its own, in batches with the multi-location endpoint, and in batches
+when the multi-location endpoint is not available (per-location fallback).
+
+Usage (from the repository root):
+    python -m scripts.bench_daily_batch --locations 100 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+from typing import List
+
+from scripts.stub_server import StubServer
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.core.metrics import RequestMetrics
+
+
+async def sequential(handler: VisualCrossingHandler, names: List[str]) -> int:
+    """Fetch daily weather of each location one after the other, as the daily
+    event used to do, and return the number of successful locations"""
+    nb_ok = 0
+    for name in names:
+        if await handler.aget_daily_weather_data(name):
+            nb_ok += 1
+    await handler.close()
+    return nb_ok
+
+
+async def batch(handler: VisualCrossingHandler, names: List[str]) -> int:
+    """Fetch daily weather of all locations in a batch and return the number of
+    successful locations"""
+    results = await handler.aget_daily_weather_data_many(names)
+    await handler.close()
+    return sum(1 for result in results.values() if result.ok)
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locations", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+    names = [f"Location{idx}" for idx in range(args.locations)]
+
+    print(f"{'mode':<10} {'ok':>9} {'server requests':>16} {'duration ms':>12}")
+    for mode, fetch, multi_endpoint in (
+        ("sequential", sequential, True),
+        ("batch", batch, True),
+        ("fallback", batch, False),
+    ):
+        server = StubServer(latency=args.latency, multi_endpoint=multi_endpoint)
+        server.start()
+        handler = VisualCrossingHandler(
+            domain_name=server.domain_name, protocol="http", metrics=RequestMetrics()
+        )
+        start = time.perf_counter()
+        # Scores of the extracted items are printed, they are not relevant here:
+        with contextlib.redirect_stdout(io.StringIO()):
+            nb_ok = asyncio.run(fetch(handler, names))
+        duration_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"{mode:<10} {nb_ok:>4}/{len(names):<4} {server.nb_requests:>16} "
+            f"{duration_ms:>12.1f}"
+        )
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
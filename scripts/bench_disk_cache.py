@@ -0,0 +1,88 @@
+"""Cold-start hit ratio of the weather cache, with and without persistence,
+against synthetic timelines. No network access nor API key is needed.
+
+Lookups of locations drawn with a Zipf-like popularity are served before a
+restart of the bot, then the same workload is run after the restart, with:
+    - memory: a `TTLCache`, empty after the restart
+    - persistent: a `PersistentCache` loaded from its database at startup
+
+Usage (from the repository root):
+    python -m scripts.bench_disk_cache --lookups 500 --locations 100
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.apis.weather.synthetic import SyntheticTimelines
+from sunbot.core import PersistentCache, SyntheticTransport, TTLCache
+from sunbot.core.metrics import RequestMetrics
+
+DOMAIN = "bench.invalid"
+
+
+def workload(nb_lookups: int, nb_locations: int, seed: int) -> List[str]:
+    """Return location names drawn with a popularity decreasing as 1 / rank"""
+    rng = random.Random(seed)
+    names = [f"Location{idx}" for idx in range(nb_locations)]
+    weights = [1 / (rank + 1) for rank in range(nb_locations)]
+    return rng.choices(names, weights, k=nb_lookups)
+
+
+async def serve(cache: TTLCache, names: List[str]) -> float:
+    """Look up the rain of each location in turn and return the hit ratio"""
+    metrics = RequestMetrics()
+    handler = VisualCrossingHandler(
+        domain_name=DOMAIN,
+        protocol="http",
+        cache=cache,
+        metrics=metrics,
+        transport=SyntheticTransport(SyntheticTimelines(seed=0)),
+    )
+    for name in names:
+        await handler.aget_rain_data(name)
+    await handler.close()
+    return 1 - metrics.stats(DOMAIN)["attempts"] / len(names)
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--locations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+    path = os.path.join(tempfile.mkdtemp(), "api_cache.sqlite3")
+
+    before = workload(args.lookups, args.locations, args.seed)
+    after = workload(args.lookups, args.locations, args.seed + 1)
+    cache = PersistentCache(path, max_size=512)
+    hit_ratio = asyncio.run(serve(cache, before))
+    cache.close()
+    print(f"before restart: hit ratio {hit_ratio:.1%}")
+
+    print(f"{'after restart':<14} {'hit ratio':>10} {'load ms':>8}")
+    hit_ratio = asyncio.run(serve(TTLCache(max_size=512), after))
+    print(f"{'memory':<14} {hit_ratio:>10.1%} {0.0:>8.1f}")
+    cache = PersistentCache(path, max_size=512)
+    start = time.perf_counter()
+    nb_loaded = cache.load()
+    load_duration = time.perf_counter() - start
+    hit_ratio = asyncio.run(serve(cache, after))
+    print(f"{'persistent':<14} {hit_ratio:>10.1%} {load_duration * 1000:>8.1f}")
+    stats = cache.stats()
+    print(
+        f"{nb_loaded} responses loaded, {stats['disk_entries']} stored "
+        f"({stats['disk_bytes'] / 1024:.0f} KiB)"
+    )
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Per-call cost of `APIHandler.get_data` on Visual Crossing forecast snapshots.
+
+Compares the previous resolution (flatten the response, then fuzzy match every
+target against every key) with the memoized resolution used by `get_data`, for
+the current weather, daily weather and rain views derived from each snapshot.
+
+Snapshots are read from a corpus recorded with `RecordingTransport`, so the
+payloads have the shapes returned by the web API. A corpus can be recorded by
+this script, with the API key in the `idVisualCrossing` environment variable:
+    python -m scripts.bench_get_data --corpus vc.jsonl --record Toulouse Paris
+Without corpus, synthetic snapshots are used, whose shapes only approximate the
+real ones.
+
+Usage (from the repository root):
+    python -m scripts.bench_get_data --corpus vc.jsonl --repeat 20
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.apis.weather.snapshot import ForecastSnapshot
+from sunbot.apis.weather.synthetic import synthetic_timeline
+from sunbot.apis.weather.vc_handler import (
+    CURRENT_WEATHER_TARGETS,
+    DAILY_WEATHER_TARGETS,
+    RAIN_TARGETS,
+)
+from sunbot.core import APIHandler, APIResponse, RecordingTransport
+from sunbot.utils.utils import flatten_dict, get_best_items
+
+# View of a snapshot used by each weather view, with the targets of this view:
+VIEWS: Dict[str, tuple] = {
+    "current": (ForecastSnapshot.current, CURRENT_WEATHER_TARGETS),
+    "daily": (ForecastSnapshot.day, DAILY_WEATHER_TARGETS),
+    "rain": (lambda snapshot: snapshot.day(0, with_hours=True), RAIN_TARGETS),
+}
+
+
+def record(corpus: str, location_names: List[str]) -> None:
+    """Record the snapshots of the specified locations into the corpus"""
+    handler = VisualCrossingHandler(transport=RecordingTransport(corpus))
+    for location_name in location_names:
+        if handler.get_snapshot(location_name) is None:
+            print(f"No snapshot recorded for {location_name}")
+
+
+def corpus_payloads(corpus: str) -> List[Dict[str, Any]]:
+    """Return the decoded timeline responses of a corpus"""
+    payloads = []
+    with open(corpus, encoding="utf-8") as corpus_file:
+        for line in corpus_file:
+            if not line.strip():
+                continue
+            exchange = json.loads(line)
+            if exchange["status"] != 200 or "body" not in exchange:
+                continue
+            payload = json.loads(exchange["body"])
+            if isinstance(payload, dict) and payload.get("days"):
+                payloads.append(payload)
+    return payloads
+
+
+def fuzzy_get_data(response: APIResponse, targets) -> dict:
+    """Resolution used before memoization: one fuzzy search per target"""
+    flattened = flatten_dict(response.json())
+    return {
+        target: get_best_items(flattened, target=target) for target in targets
+    }
+
+
+def mean_time(func: Callable[[Any], Any], items: List[Any], repeat: int) -> float:
+    """Return mean duration of `func` calls on each item, in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            func(item)
+    return (time.perf_counter() - start) / (repeat * len(items)) * 1000
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--corpus", help="corpus of recorded timeline responses")
+    parser.add_argument(
+        "--record", nargs="+", metavar="LOCATION", help="locations to record first"
+    )
+    parser.add_argument(
+        "--fuzzy-payloads",
+        type=int,
+        default=3,
+        help="number of payloads resolved with the slow fuzzy search",
+    )
+    args = parser.parse_args()
+
+    if args.corpus and args.record:
+        record(args.corpus, args.record)
+    if args.corpus:
+        source = args.corpus
+        payloads = corpus_payloads(args.corpus)
+    else:
+        source = "synthetic"
+        payloads = [
+            synthetic_timeline(f"Location{idx}", 2, "current,days,hours")
+            for idx in range(5)
+        ]
+    if not payloads:
+        parser.error(f"No timeline response in {source}")
+    snapshots = [ForecastSnapshot(payload) for payload in payloads]
+    print(f"{len(snapshots)} snapshots from {source}")
+
+    print(
+        f"{'view':>8} {'keys':>6} {'before (ms)':>12} {'first (ms)':>11} "
+        f"{'after (ms)':>11}"
+    )
+    for name, (view, targets) in VIEWS.items():
+        nb_keys = statistics.mean(
+            len(flatten_dict(view(snapshot).json())) for snapshot in snapshots
+        )
+        before = mean_time(
+            lambda snapshot: fuzzy_get_data(view(snapshot), targets),
+            snapshots[: args.fuzzy_payloads],
+            1,
+        )
+        # The first call compiles the resolution of each payload shape:
+        first = mean_time(
+            lambda snapshot: APIHandler.get_data(view(snapshot), targets),
+            snapshots,
+            1,
+        )
+        after = mean_time(
+            lambda snapshot: APIHandler.get_data(view(snapshot), targets),
+            snapshots,
+            args.repeat,
+        )
+        print(
+            f"{name:>8} {nb_keys:>6.0f} {before:>12.2f} {first:>11.3f} "
+            f"{after:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Time to produce the attachment of a weather image, saved to a file shared by
+all renders then read back, as before the in-memory pipeline, or encoded in the
+reusable buffer of the rendering thread. Concurrent renders are also run in a
+render service, to count the images attached with the data of another render.
+
+Usage (from the repository root):
+    python -m scripts.bench_image_io --renders 30 --workers 4
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import sunbot.weather.Meteo as weather
+from scripts.bench_assets import weather_data
+from sunbot import sunbot
+from sunbot.core import RenderService
+
+
+def render_to_file(path: str) -> Callable[[Dict], bytes]:
+    """Return a render saving the image in `path`, shared by all renders, then
+    reading it back to attach it"""
+
+    def render(item: Dict) -> bytes:
+        weather.createCurrentWeatherImage(item, path)
+        with open(os.path.join(path, sunbot.CURRENT_WEATHER_IMAGE_NAME), "rb") as file:
+            return file.read()
+
+    return render
+
+
+def render_to_memory(item: Dict) -> bytes:
+    """Render the image in the buffer of the calling thread, bypassing the
+    render cache so each image is rendered"""
+    return weather.encode_image(weather.build_current_weather_image(item))
+
+
+def measure(render: Callable[[Dict], bytes], data: List[Dict]) -> float:
+    """Render an attachment for each data and return the mean time, in ms"""
+    times = []
+    for item in data:
+        start = time.perf_counter()
+        render(item)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(times)
+
+
+async def mixed_up(
+    render: Callable[[Dict], bytes], data: List[Dict], workers: int
+) -> int:
+    """Render an attachment for each data concurrently and return the number of
+    attachments which differ from the image of their data"""
+    expected = [render_to_memory(item) for item in data]
+    service = RenderService(workers, len(data), 60.0)
+    images = await asyncio.gather(*(service.render(render, item) for item in data))
+    service.close()
+    return sum(image != reference for image, reference in zip(images, expected))
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Icons missing from the weather types are logged for each image:
+    logging.disable(logging.ERROR)
+    weather.preload_assets()
+
+    rng = random.Random(args.seed)
+    data = [weather_data(rng) for _ in range(args.renders)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        renders = {
+            "shared file": render_to_file(tmp_dir),
+            "memory": render_to_memory,
+        }
+        print(f"{'attachment':<12} {'mean ms':>8} {'mixed up':>9}")
+        for label, render in renders.items():
+            mean_time = measure(render, data)
+            nb_mixed_up = asyncio.run(mixed_up(render, data, args.workers))
+            print(f"{label:<12} {mean_time:>8.1f} {nb_mixed_up:>4}/{len(data):<4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""JWT refreshes of `APIHandler` against a local stub server issuing short-lived
+tokens. Concurrent clients send requests during several token lifetimes, and
+the benchmark reports the requests rejected because of an expired token, the
+token requests received by the server, and the duration of the refreshes:
+    - reactive: the server does not give the lifetime of its tokens, so they are
+      only refreshed after a rejection
+    - proactive: tokens are refreshed shortly before they expire
+
+Usage (from the repository root):
+    python -m scripts.bench_jwt --clients 20 --lifetime 1 --duration 3.5
+"""
+
+import argparse
+import asyncio
+import time
+
+from scripts.stub_server import StubServer
+from sunbot.core import APIHandler
+from sunbot.core.metrics import RequestMetrics
+
+TIMELINE_PATH = "VisualCrossingWebServices/rest/services/timeline"
+
+
+async def clients(handler: APIHandler, nb_clients: int, duration: float) -> int:
+    """Send requests from `nb_clients` concurrent clients during `duration`
+    seconds and return the number of failed requests"""
+    deadline = time.perf_counter() + duration
+
+    async def client(idx: int) -> int:
+        nb_failures = 0
+        while time.perf_counter() < deadline:
+            response = await handler.arequest(
+                f"{TIMELINE_PATH}/Location{idx}/today", {"include": "days"}
+            )
+            nb_failures += not response.ok
+        return nb_failures
+
+    nb_failures = sum(await asyncio.gather(*(client(i) for i in range(nb_clients))))
+    await handler.close()
+    return nb_failures
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--lifetime", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=3.5)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<10} {'requests':>9} {'failed':>7} {'rejected':>9} "
+        f"{'token requests':>15} {'refresh ms':>11}"
+    )
+    for mode, advertise_lifetime in (("reactive", False), ("proactive", True)):
+        server = StubServer(
+            latency=0.01,
+            token_lifetime=args.lifetime,
+            advertise_lifetime=advertise_lifetime,
+        ).start()
+        metrics = RequestMetrics()
+        handler = APIHandler(
+            server.domain_name,
+            auth_mode="jwt",
+            auth_args={
+                "token_url": f"http://{server.domain_name}/token",
+                "app_id": "benchmark",
+            },
+            protocol="http",
+            metrics=metrics,
+            jwt_refresh_margin=args.lifetime / 5,
+        )
+        nb_failures = asyncio.run(clients(handler, args.clients, args.duration))
+        # The synchronous path shares the token obtained by the asynchronous one:
+        assert handler.request(f"{TIMELINE_PATH}/Location/today").ok
+        stats = metrics.stats(server.domain_name)
+        print(
+            f"{mode:<10} {server.nb_requests:>9} {nb_failures:>7} "
+            f"{server.nb_rejected_tokens:>9} {server.nb_token_requests:>15} "
+            f"{stats['mean_token_refresh_latency'] * 1000:>11.1f}"
+        )
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
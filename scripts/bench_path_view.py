@@ -0,0 +1,62 @@
+"""Memory and CPU cost of extracting rain data from large timeline payloads,
+with an eager `flatten_dict` copy versus a lazy `PathView`.
+
+Usage (from the repository root):
+    python -m scripts.bench_path_view --days 1 5 15
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from scripts.stub_server import synthetic_timeline
+from sunbot.apis.weather.vc_handler import RAIN_TARGETS
+from sunbot.utils.path_view import PathView
+from sunbot.utils.utils import flatten_dict
+
+
+def with_flatten(payload: dict) -> dict:
+    """Extract rain targets from an eager flattened copy"""
+    flattened = flatten_dict(payload)
+    return {target: flattened[target] for target in RAIN_TARGETS}
+
+
+def with_view(payload: dict) -> dict:
+    """Extract rain targets through a lazy view"""
+    view = PathView(payload)
+    return {target: view[target] for target in RAIN_TARGETS}
+
+
+def measure(func, payload: dict, repeat: int):
+    """Return mean duration (ms) and peak allocated memory (KiB) of `func`"""
+    tracemalloc.start()
+    func(payload)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(payload)
+    return (time.perf_counter() - start) / repeat * 1000, peak / 1024
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 5, 15])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'days':>5} {'flatten ms':>11} {'KiB':>8} {'view ms':>8} {'KiB':>6}")
+    for nb_days in args.days:
+        payload = synthetic_timeline("Toulouse", nb_days, "days,hours,current")
+        assert with_flatten(payload) == with_view(payload)
+        flat_ms, flat_kib = measure(with_flatten, payload, args.repeat)
+        view_ms, view_kib = measure(with_view, payload, args.repeat)
+        print(
+            f"{nb_days:>5} {flat_ms:>11.3f} {flat_kib:>8.1f} "
+            f"{view_ms:>8.3f} {view_kib:>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Size of Visual Crossing responses and extraction time, with and without the
+`elements` projection derived from the targets of each kind of data. Every view
+is derived from the snapshot of the location, so they share the same response.
+
+Usage (from the repository root):
+    python -m scripts.bench_projection --calls 50
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+
+from scripts.stub_server import StubServer, synthetic_timeline
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.apis.weather.vc_handler import (
+    CURRENT_WEATHER_TARGETS,
+    DAILY_WEATHER_TARGETS,
+    RAIN_TARGETS,
+    TIMELINE_TOP_LEVEL_FIELDS,
+)
+from sunbot.core import APIHandler, APIResponse
+from sunbot.core.metrics import RequestMetrics
+from sunbot.core.projection import project_fields
+
+# kind of data -> (handler method, targets, `include` parameter):
+VIEWS = {
+    "rain": ("aget_rain_data", RAIN_TARGETS, "hours,days"),
+    "current": ("aget_current_weather_data", CURRENT_WEATHER_TARGETS, "current"),
+    "daily": ("aget_daily_weather_data", DAILY_WEATHER_TARGETS, "days"),
+}
+
+
+async def lookups(handler: VisualCrossingHandler, method: str, nb_calls: int) -> None:
+    """Run `nb_calls` lookups of distinct locations, so none is cached"""
+    for idx in range(nb_calls):
+        await getattr(handler, method)(f"Location{idx}")
+    await handler.close()
+
+
+def extraction_ms(targets, include: str, projection: bool, nb_calls: int) -> float:
+    """Return the mean time to decode a response and extract targets from it"""
+    elements = None
+    if projection:
+        elements = list(project_fields(targets, exclude=TIMELINE_TOP_LEVEL_FIELDS))
+    body = json.dumps(synthetic_timeline("Location", 1, include, elements)).encode()
+    start = time.perf_counter()
+    for _ in range(nb_calls):
+        response = APIResponse(200, {"Content-Type": "application/json"}, body)
+        APIHandler.get_data(response, targets)
+    return (time.perf_counter() - start) / nb_calls * 1000
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+
+    print(f"{'view':<8} {'projection':>10} {'KiB/response':>13} {'extract ms':>11}")
+    server = StubServer(latency=0.0).start()
+    for view, (method, targets, include) in VIEWS.items():
+        for projection in (False, True):
+            metrics = RequestMetrics()
+            handler = VisualCrossingHandler(
+                domain_name=server.domain_name,
+                protocol="http",
+                metrics=metrics,
+                projection=projection,
+            )
+            # Scores of the extracted items are printed, they are not relevant here:
+            with contextlib.redirect_stdout(io.StringIO()):
+                asyncio.run(lookups(handler, method, args.calls))
+                duration_ms = extraction_ms(targets, include, projection, args.calls)
+            stats = metrics.stats(server.domain_name)
+            print(
+                f"{view:<8} {str(projection):>10} "
+                f"{stats['decoded_bytes'] / 1024 / args.calls:>13.2f} "
+                f"{duration_ms:>11.3f}"
+            )
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
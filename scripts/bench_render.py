@@ -0,0 +1,94 @@
+"""Event loop stalls and throughput while weather images are rendered, either in
+the event loop, as before the render service, or by the render service with a
+varying number of worker threads. Bursts of current weather images are rendered
+concurrently while a ticker task measures how late the event loop wakes it up,
+as Discord heartbeats and other commands would be.
+
+Usage (from the repository root):
+    python -m scripts.bench_render --renders 24 --workers 1 2 4
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+import sunbot.weather.Meteo as weather
+from scripts.bench_assets import weather_data
+from sunbot.core import RenderService
+from sunbot.core.metrics import _percentile
+
+# Period of the ticker task, in seconds:
+TICK = 0.01
+
+
+def render_image(item: Dict) -> bytes:
+    """Render and encode the current weather image of `item`, bypassing the
+    render cache so each mode renders all images"""
+    return weather.encode_image(weather.build_current_weather_image(item))
+
+
+async def ticker(lags: List[float], stop: asyncio.Event) -> None:
+    """Sleep `TICK` seconds in a loop and record how late each wake up is"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def burst(data: List[Dict], workers: Optional[int]) -> Dict[str, float]:
+    """Render an image per data concurrently, in the event loop if `workers` is
+    None, or with a render service of `workers` threads"""
+    service = None if workers is None else RenderService(workers, len(data), 60.0)
+
+    async def render(item: Dict) -> int:
+        if service is None:
+            return len(render_image(item))
+        return len(await service.render(render_image, item))
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker_task = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(TICK)
+    start = time.perf_counter()
+    await asyncio.gather(*(render(item) for item in data))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker_task
+    if service is not None:
+        service.close()
+    lags.sort()
+    return {
+        "throughput": len(data) / elapsed,
+        "p95_lag": _percentile(lags, 0.95) * 1000,
+        "max_lag": lags[-1] * 1000 if lags else 0.0,
+    }
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=24)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Icons missing from the weather types are logged for each image:
+    logging.disable(logging.ERROR)
+    weather.preload_assets()
+
+    rng = random.Random(args.seed)
+    data = [weather_data(rng) for _ in range(args.renders)]
+    print(f"{'mode':<12} {'images/s':>9} {'p95 lag ms':>11} {'max lag ms':>11}")
+    for workers in [None, *args.workers]:
+        result = asyncio.run(burst(data, workers))
+        label = "event loop" if workers is None else f"{workers} workers"
+        print(
+            f"{label:<12} {result['throughput']:>9.1f} {result['p95_lag']:>11.1f} "
+            f"{result['max_lag']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""CPU time of repeated current weather requests, with every image rendered, as
+before the render cache, then served from the render cache when the same data
+are displayed again. Requests pick locations with a skewed popularity, and the
+data of each location change every `--window` requests, as snapshots of the
+weather cache expire. The bot is then restarted on the same cache directory, to
+count the images served from the disk.
+
+Usage (from the repository root):
+    python -m scripts.bench_render_cache --requests 200 --locations 10
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+import sunbot.weather.Meteo as weather
+from scripts.bench_assets import weather_data
+from sunbot.core import RenderCache
+
+
+def requests_data(args: argparse.Namespace) -> List[Dict]:
+    """Return the data displayed by each request, shared by the requests on the
+    same location within the same window"""
+    rng = random.Random(args.seed)
+    locations = list(range(args.locations))
+    weights = [1 / (rank + 1) for rank in locations]
+    snapshots: Dict[tuple, Dict] = {}
+    data = []
+    for index in range(args.requests):
+        location = rng.choices(locations, weights)[0]
+        snapshot = (location, index // args.window)
+        if snapshot not in snapshots:
+            snapshots[snapshot] = weather_data(rng)
+        data.append(snapshots[snapshot])
+    return data
+
+
+def measure(data: List[Dict], cache: bool) -> float:
+    """Serve an image per request and return the total CPU time, in ms"""
+    start = time.process_time()
+    for item in data:
+        if cache:
+            weather.render_current_weather_image(item)
+        else:
+            weather.encode_image(weather.build_current_weather_image(item))
+    return (time.process_time() - start) * 1000
+
+
+def print_stats(label: str, cpu_time: float, nb_requests: int) -> None:
+    """Print the CPU time and the counters of the render cache"""
+    stats = weather.render_cache.stats()
+    print(
+        f"{label:<10} {cpu_time:>9.0f} {cpu_time / nb_requests:>7.1f} "
+        f"{stats['hit_ratio']:>6.0%} {stats['memory_hits']:>7} "
+        f"{stats['disk_hits']:>5} {stats['bytes_saved'] / 1024 / 1024:>9.1f}"
+    )
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--locations", type=int, default=10)
+    parser.add_argument("--window", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Icons missing from the weather types are logged for each image:
+    logging.disable(logging.ERROR)
+    weather.preload_assets()
+
+    data = requests_data(args)
+    print(
+        f"{'mode':<10} {'CPU ms':>9} {'ms/req':>7} {'hits':>6} {'memory':>7} "
+        f"{'disk':>5} {'MiB saved':>9}"
+    )
+    weather.render_cache = RenderCache()
+    print_stats("no cache", measure(data, cache=False), len(data))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        weather.render_cache = RenderCache(path=tmp_dir)
+        print_stats("cache", measure(data, cache=True), len(data))
+        # Restart: the memory is empty, images are read back from the disk:
+        weather.render_cache = RenderCache(path=tmp_dir)
+        print_stats("restart", measure(data, cache=True), len(data))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Offline throughput and latency of the weather stack, with the transports of
+`sunbot.core.replay`. No network access nor API key is needed:
+    - record: lookups are sent to the local stub server and stored in a corpus
+      (the real web API is used instead if `--record-live` is set)
+    - replay: the same lookups are answered from the corpus, with a seeded
+      latency and jitter
+    - synthetic: lookups are answered with generated timelines of several sizes
+
+Usage (from the repository root):
+    python -m scripts.bench_replay --lookups 200 --latency 0.02 --jitter 0.005
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from scripts.stub_server import StubServer
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.apis.weather.synthetic import SyntheticTimelines
+from sunbot.core import (
+    RecordingTransport,
+    ReplayTransport,
+    SyntheticTransport,
+    Transport,
+)
+from sunbot.core.metrics import RequestMetrics
+
+
+async def lookups(
+    handler: VisualCrossingHandler, nb_lookups: int, nb_locations: int
+) -> int:
+    """Run `nb_lookups` concurrent rain lookups over `nb_locations` locations,
+    and return the number of successful ones"""
+
+    async def lookup(idx: int) -> bool:
+        return bool(await handler.aget_rain_data(f"Location{idx % nb_locations}"))
+
+    results = await asyncio.gather(*(lookup(i) for i in range(nb_lookups)))
+    await handler.close()
+    return sum(results)
+
+
+def run(
+    name: str, transport: Transport, args: argparse.Namespace, domain: str
+) -> None:
+    """Run the lookups through `transport` and print throughput and latency"""
+    metrics = RequestMetrics()
+    handler = VisualCrossingHandler(
+        domain_name=domain, protocol="http", metrics=metrics, transport=transport
+    )
+    start = time.perf_counter()
+    nb_ok = asyncio.run(lookups(handler, args.lookups, args.locations))
+    duration = time.perf_counter() - start
+    stats = metrics.stats(domain)
+    print(
+        f"{name:<14} {nb_ok:>5}/{args.lookups:<5} {args.lookups / duration:>10.0f} "
+        f"{stats['p50_latency'] * 1000:>8.1f} {stats['p95_latency'] * 1000:>8.1f}"
+    )
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--locations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.005)
+    parser.add_argument("--corpus", help="corpus to record, or to replay if it exists")
+    parser.add_argument("--record-live", action="store_true")
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+    corpus = args.corpus or os.path.join(tempfile.mkdtemp(), "corpus.jsonl")
+
+    print(f"{'transport':<14} {'ok':>11} {'lookups/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    if not os.path.exists(corpus):
+        recorder = RecordingTransport(corpus)
+        if args.record_live:
+            run("record (live)", recorder, args, "weather.visualcrossing.com")
+        else:
+            server = StubServer(latency=args.latency).start()
+            run("record (stub)", recorder, args, server.domain_name)
+            server.stop()
+    replay = ReplayTransport(
+        corpus, latency=args.latency, jitter=args.jitter, seed=0
+    )
+    run("replay", replay, args, "replay.invalid")
+    assert replay.misses == 0, "Some lookups were not recorded"
+    for nb_days in (1, 15):
+        synthetic = SyntheticTransport(
+            SyntheticTimelines(nb_days, seed=0),
+            latency=args.latency,
+            jitter=args.jitter,
+            seed=0,
+        )
+        run(f"synthetic {nb_days:>2}d", synthetic, args, "synthetic.invalid")
+    print(f"corpus: {corpus} ({len(replay)} exchanges)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Behaviour of `APIHandler` retries and circuit breaker against faulty servers.
+
+Each scenario runs `/pluie` lookups against a local stub server injecting
+faults, and reports the proportion of successful lookups, the mean duration
+of a lookup and the number of requests that reached the server:
+    - flaky: a fraction of the responses are 503 errors, with and without retries
+    - retry-after: the first response asks to wait with a `Retry-After` header
+    - timeout: the first response is slower than the client timeout
+    - outage: the server always fails, then recovers; the circuit opens, requests
+      fail fast, and a probe closes the circuit after the recovery
+
+Usage (from the repository root):
+    python -m scripts.bench_resilience --calls 100 --error-rate 0.3
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import List
+
+from scripts.stub_server import StubServer
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.core.metrics import RequestMetrics
+from sunbot.core.resilience import CircuitBreaker, RetryPolicy
+
+
+def make_handler(server: StubServer, **kwargs) -> VisualCrossingHandler:
+    """Return a handler bound to the stub server, with its own metrics"""
+    kwargs.setdefault("metrics", RequestMetrics())
+    return VisualCrossingHandler(
+        domain_name=server.domain_name, protocol="http", **kwargs
+    )
+
+
+async def lookups(handler: VisualCrossingHandler, nb_calls: int) -> List[float]:
+    """Run `nb_calls` sequential lookups and return the duration of each one,
+    or a negative duration for failed lookups"""
+    durations = []
+    for idx in range(nb_calls):
+        start = time.perf_counter()
+        data = await handler.aget_rain_data(f"Location{idx}")
+        elapsed = time.perf_counter() - start
+        durations.append(elapsed if data else -elapsed)
+    await handler.close()
+    return durations
+
+
+def report(name: str, durations: List[float], server: StubServer) -> None:
+    """Print the results of a scenario"""
+    successes = sum(1 for duration in durations if duration >= 0)
+    mean_ms = sum(abs(duration) for duration in durations) / len(durations) * 1000
+    print(
+        f"{name:<22} success {successes:>4}/{len(durations):<4} "
+        f"mean {mean_ms:>8.1f} ms  server requests {server.nb_requests:>4}"
+    )
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+    fast_retries = RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.1)
+
+    for name, policy in (
+        ("flaky, no retry", RetryPolicy(max_attempts=1)),
+        ("flaky, 4 attempts", fast_retries),
+    ):
+        server = StubServer(latency=0.0, error_rate=args.error_rate).start()
+        # Isolated errors must not open the circuit in this scenario:
+        breaker = CircuitBreaker(server.domain_name, failure_threshold=1000)
+        handler = make_handler(server, retry_policy=policy, circuit_breaker=breaker)
+        report(name, asyncio.run(lookups(handler, args.calls)), server)
+        server.stop()
+
+    server = StubServer(latency=0.0, script=[429], retry_after=0.5).start()
+    handler = make_handler(server, retry_policy=fast_retries)
+    durations = asyncio.run(lookups(handler, 1))
+    assert durations[0] >= 0.5, "Retry-After header was not honored"
+    report("retry-after 0.5 s", durations, server)
+    server.stop()
+
+    server = StubServer(latency=0.0, script=["slow"], slow_latency=5.0).start()
+    handler = make_handler(server, retry_policy=fast_retries, timeout=0.5)
+    durations = asyncio.run(lookups(handler, 1))
+    assert 0 < durations[0] < 1.5, "Slow attempt was not interrupted"
+    report("timeout 0.5 s", durations, server)
+    server.stop()
+
+    server = StubServer(latency=0.0, error_rate=1.0).start()
+    breaker = CircuitBreaker(
+        server.domain_name, failure_threshold=5, recovery_timeout=0.5
+    )
+    handler = make_handler(server, retry_policy=fast_retries, circuit_breaker=breaker)
+    report("outage", asyncio.run(lookups(handler, args.calls)), server)
+    assert server.nb_requests < args.calls, "Circuit did not open"
+    print(f"{'':<22} circuit {breaker.state}, {breaker.rejected} rejected requests")
+    server.error_rate = 0.0
+    time.sleep(breaker.recovery_timeout)
+    handler = make_handler(server, retry_policy=fast_retries, circuit_breaker=breaker)
+    report("after recovery", asyncio.run(lookups(handler, 10)), server)
+    print(f"{'':<22} circuit {breaker.state}")
+    print("attempt metrics:", handler.metrics.stats(server.domain_name))
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Latency and availability of weather lookups served by a single provider or by
+the provider router, against local stub providers: a Visual Crossing handler
+and an Open-Meteo handler answered with synthetic payloads after a simulated
+latency. No network access nor API key is needed. Scenarios:
+    - normal: both providers answer quickly
+    - slow: Visual Crossing answers after `--slow` seconds
+    - outage: Visual Crossing answers 503
+
+Usage (from the repository root):
+    python -m scripts.bench_router --lookups 40 --latency 0.1 --slow 2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List
+
+from sunbot.apis.weather import OpenMeteoHandler, VisualCrossingHandler, WeatherRouter
+from sunbot.apis.weather.synthetic import SyntheticForecasts, SyntheticTimelines
+from sunbot.core import APIResponse, RetryPolicy, SyntheticTransport
+
+# Time after which the router fails over to the next provider, in seconds:
+TIMEOUT = 1.0
+
+
+class StubTransport(SyntheticTransport):
+    """Synthetic transport whose latency can be changed, answering 503 while
+    `down` is set"""
+
+    def __init__(self, payload_factory, latency: float) -> None:
+        super().__init__(payload_factory, latency=latency, jitter=latency / 4, seed=0)
+        self.down = False
+
+    def respond(self, method: str, url: str) -> APIResponse:
+        if self.down:
+            return APIResponse(503, {}, b"", url)
+        return super().respond(method, url)
+
+
+async def scenario(
+    args: argparse.Namespace, name: str, routed: bool
+) -> Dict[str, float]:
+    """Look up the rain of distinct locations one after the other
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        benchmark arguments
+    name : str
+        scenario: `normal`, `slow` or `outage`
+    routed : bool
+        serve lookups with the router over both providers, instead of the Visual
+        Crossing handler alone
+
+    Returns
+    -------
+    Dict[str, float]
+        answered lookups, p50 and p95 lookup latency in ms, and lookups served
+        by Open-Meteo
+    """
+    vc_transport = StubTransport(SyntheticTimelines(seed=0), args.latency)
+    om_transport = StubTransport(SyntheticForecasts(seed=0), args.latency)
+    if name == "slow":
+        vc_transport.latency = args.slow
+        vc_transport.jitter = 0.0
+    vc_transport.down = name == "outage"
+    single_attempt = RetryPolicy(max_attempts=1)
+    vc_handler = VisualCrossingHandler(
+        domain_name="vc.invalid",
+        protocol="http",
+        transport=vc_transport,
+        retry_policy=single_attempt,
+    )
+    om_handler = OpenMeteoHandler(
+        domain_name="om.invalid",
+        geocoding_domain_name="geo.invalid",
+        protocol="http",
+        transport=om_transport,
+        retry_policy=single_attempt,
+    )
+    provider = (
+        WeatherRouter([vc_handler, om_handler], timeout=TIMEOUT)
+        if routed
+        else vc_handler
+    )
+    latencies: List[float] = []
+    served_by_om = 0
+    for idx in range(args.lookups):
+        start = time.perf_counter()
+        data = await provider.aget_rain_data(f"Location{idx}")
+        if data:
+            latencies.append(time.perf_counter() - start)
+            served_by_om += data.get("provider") == OpenMeteoHandler.name
+    if routed:
+        await provider.close()
+    else:
+        await vc_handler.close()
+        await om_handler.close()
+    latencies.sort()
+    return {
+        "answered": len(latencies),
+        "p50": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+        "om": served_by_om,
+    }
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--slow", type=float, default=2.0)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+    # Failed and abandoned requests are expected:
+    logging.disable(logging.ERROR)
+
+    print(
+        f"{'scenario':<18} {'answered':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'Open-Meteo':>10}"
+    )
+    for name in ("normal", "slow", "outage"):
+        for routed in (False, True):
+            result = asyncio.run(scenario(args, name, routed))
+            label = f"{name}, {'router' if routed else 'single'}"
+            print(
+                f"{label:<18} {result['answered']:>4}/{args.lookups:<4} "
+                f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['om']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Upstream requests sent for the weather views of active locations, with one
+forecast snapshot per location: each location is viewed with `/meteo`,
+`/pluie` for today and tomorrow and the daily weather, several times within the
+snapshot refresh interval.
+
+Usage (from the repository root):
+    python -m scripts.bench_snapshot --locations 20 --rounds 3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+from scripts.stub_server import StubServer
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.core import TTLCache
+from sunbot.core.metrics import RequestMetrics
+
+# Views of a location, as called by the commands and the daily task:
+VIEWS = (
+    ("aget_current_weather_data", ()),
+    ("aget_rain_data", ("aujourd'hui",)),
+    ("aget_rain_data", ("demain",)),
+    ("aget_daily_weather_data", ()),
+)
+
+
+async def views(handler: VisualCrossingHandler, nb_locations: int, nb_rounds: int):
+    """Display every view of each location, `nb_rounds` times"""
+    for _ in range(nb_rounds):
+        for idx in range(nb_locations):
+            for method, args in VIEWS:
+                await getattr(handler, method)(f"Location{idx}", *args)
+    await handler.close()
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locations", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+
+    server = StubServer(latency=0.0).start()
+    handler = VisualCrossingHandler(
+        domain_name=server.domain_name,
+        protocol="http",
+        cache=TTLCache(),
+        metrics=RequestMetrics(),
+    )
+    start = time.perf_counter()
+    # Scores of the extracted items are printed, they are not relevant here:
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(views(handler, args.locations, args.rounds))
+    duration_ms = (time.perf_counter() - start) * 1000
+    nb_views = args.locations * args.rounds * len(VIEWS)
+    print(
+        f"{nb_views} views of {args.locations} locations: "
+        f"{server.nb_requests} upstream requests "
+        f"({server.nb_requests / args.locations:.1f} per location), "
+        f"{duration_ms:.1f} ms"
+    )
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
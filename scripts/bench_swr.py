@@ -0,0 +1,135 @@
+"""Latency and availability of weather lookups with stale-while-revalidate and
+stale-if-error, against synthetic timelines answered after a simulated latency.
+No network access nor API key is needed:
+    - revalidate: cached snapshots have just expired. With stale-while-revalidate
+      lookups are answered at once from the cache and snapshots are renewed in
+      the background, otherwise each lookup waits for a new snapshot
+    - outage: cached snapshots expired two hours ago and the web API answers 503.
+      With stale-if-error lookups are still answered from the cache
+
+Usage (from the repository root):
+    python -m scripts.bench_swr --locations 50 --latency 0.3
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List
+
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.apis.weather.synthetic import SyntheticTimelines
+from sunbot.apis.weather.vc_handler import SNAPSHOT_TTL
+from sunbot.core import APIResponse, RetryPolicy, SyntheticTransport, TTLCache
+from sunbot.core.metrics import RequestMetrics
+
+DOMAIN = "bench.invalid"
+
+
+class OutageTransport(SyntheticTransport):
+    """Synthetic transport answering 503 while `down` is set"""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__(SyntheticTimelines(seed=0), latency=latency)
+        self.down = False
+
+    def respond(self, method: str, url: str) -> APIResponse:
+        if self.down:
+            return APIResponse(503, {}, b"", url)
+        return super().respond(method, url)
+
+
+async def scenario(
+    args: argparse.Namespace, outage: bool, stale: bool
+) -> Dict[str, float]:
+    """Fill the cache, let the snapshots expire (and the web API fail, for the
+    outage scenario), then look up every location once
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        benchmark arguments
+    outage : bool
+        run the outage scenario instead of the revalidate one
+    stale : bool
+        keep the default windows of the handler, instead of disabling the
+        window of rain lookups used by the scenario
+
+    Returns
+    -------
+    Dict[str, float]
+        answered lookups, p50 and max lookup latency in ms, snapshots renewed
+        after the lookups and requests sent
+    """
+    now = [time.time()]
+    transport = OutageTransport(args.latency)
+    metrics = RequestMetrics()
+    disabled = {} if stale else {"rain": 0.0}
+    handler = VisualCrossingHandler(
+        domain_name=DOMAIN,
+        protocol="http",
+        cache=TTLCache(clock=lambda: now[0]),
+        metrics=metrics,
+        transport=transport,
+        retry_policy=RetryPolicy(max_attempts=1),
+        **({"stale_if_error": disabled} if outage else {"max_stale": disabled}),
+    )
+    names = [f"Location{idx}" for idx in range(args.locations)]
+    await asyncio.gather(*(handler.aget_rain_data(name) for name in names))
+    now[0] += SNAPSHOT_TTL + (2 * 3600 if outage else 60)
+    transport.down = outage
+
+    async def lookup(name: str) -> float:
+        start = time.perf_counter()
+        data = await handler.aget_rain_data(name)
+        return time.perf_counter() - start if data else -1.0
+
+    latencies: List[float] = await asyncio.gather(*(lookup(name) for name in names))
+    # Let background revalidations complete:
+    await asyncio.sleep(2 * args.latency)
+    renewed = sum(
+        1 for name in names if (handler.snapshot_expires_in(name) or -1.0) > 0
+    )
+    await handler.close()
+    answered = sorted(latency for latency in latencies if latency >= 0)
+    return {
+        "answered": len(answered),
+        "p50": answered[len(answered) // 2] * 1000 if answered else 0.0,
+        "max": answered[-1] * 1000 if answered else 0.0,
+        "renewed": renewed,
+        "requests": metrics.stats(DOMAIN)["attempts"],
+    }
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locations", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+    # Failed requests of the outage scenario are expected:
+    logging.disable(logging.ERROR)
+
+    runs = {
+        "revalidate, off": (False, False),
+        "revalidate, on": (False, True),
+        "outage, off": (True, False),
+        "outage, on": (True, True),
+    }
+    print(
+        f"{'scenario':<16} {'answered':>9} {'p50 ms':>8} {'max ms':>8} "
+        f"{'renewed':>8} {'requests':>9}"
+    )
+    for name, (outage, stale) in runs.items():
+        result = asyncio.run(scenario(args, outage, stale))
+        print(
+            f"{name:<16} {result['answered']:>4}/{args.locations:<4} "
+            f"{result['p50']:>8.1f} {result['max']:>8.1f} "
+            f"{result['renewed']:>8} {result['requests']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""CPU time per current weather and daily weather image, with the whole image
+composited for each render, as before card templates, or copied from its
+template, and saved with the default png compression or with the compression
+level of the bot. The speedup of templates and the one of the compression level
+are reported separately, each measured with the other setting unchanged.
+Backgrounds and icons come from the asset store in all cases. Images are saved
+in a temporary directory.
+
+Usage (from the repository root):
+    python -m scripts.bench_templates --renders 30
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+import sunbot.weather.Meteo as weather
+from scripts.bench_assets import weather_data
+from sunbot import sunbot
+from sunbot.weather.templates import CardTemplates
+
+# Default zlib compression level of png images:
+DEFAULT_COMPRESS_LEVEL = 6
+
+
+def measure(render: Callable[[Dict], str], data: List[Dict]) -> Tuple[float, float]:
+    """Render an image for each data and return the mean CPU time per image, in
+    ms, and the mean size of the images, in KiB"""
+    cpu_times = []
+    sizes = []
+    for item in data:
+        start = time.process_time()
+        image_path = render(item)
+        cpu_times.append((time.process_time() - start) * 1000)
+        sizes.append(os.path.getsize(image_path) / 1024)
+    return statistics.mean(cpu_times), statistics.mean(sizes)
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # Icons missing from the weather types are logged for each image:
+    logging.disable(logging.ERROR)
+    weather.preload_assets()
+    compress_level = sunbot.IMAGE_COMPRESS_LEVEL
+    max_size = sunbot.CARD_TEMPLATES_MAX_SIZE
+
+    rng = random.Random(args.seed)
+    data = [weather_data(rng) for _ in range(args.renders)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+
+        def render_current(item: Dict) -> str:
+            weather.createCurrentWeatherImage(item, tmp_dir)
+            return f"{tmp_dir}/{sunbot.CURRENT_WEATHER_IMAGE_NAME}"
+
+        def render_daily(item: Dict) -> str:
+            weather.create_daily_weather_img(item, tmp_dir)
+            return f"{tmp_dir}/{sunbot.DAILY_IMAGE_NAME}"
+
+        modes = (
+            # Templates are not kept, so each image is composited:
+            ("composited", 0, DEFAULT_COMPRESS_LEVEL),
+            ("template", max_size, DEFAULT_COMPRESS_LEVEL),
+            (f"composited+z{compress_level}", 0, compress_level),
+            (f"template+z{compress_level}", max_size, compress_level),
+        )
+        print(f"{'card':<8} {'mode':<15} {'CPU ms':>8} {'speedup':>8} {'KiB':>7}")
+        results: Dict[Tuple[str, int, int], Tuple[float, float]] = {}
+        for card, render in (("current", render_current), ("daily", render_daily)):
+            for label, templates_size, level in modes:
+                templates = CardTemplates(templates_size)
+                for card_type, builder in weather.card_templates.builders.items():
+                    templates.register(card_type, builder)
+                weather.card_templates = templates
+                sunbot.IMAGE_COMPRESS_LEVEL = level
+                # Build templates outside of the measure, as the bot does once:
+                for item in data:
+                    templates.render(card, *weather.template_key(item["conditions"]))
+                cpu_time, size = measure(render, data)
+                results[card, templates_size, level] = (cpu_time, size)
+                reference = results[card, 0, DEFAULT_COMPRESS_LEVEL][0]
+                print(
+                    f"{card:<8} {label:<15} {cpu_time:>8.1f} "
+                    f"{reference / cpu_time:>7.1f}x {size:>7.0f}"
+                )
+        print()
+        for card in ("current", "daily"):
+            # Each effect is measured with the other setting unchanged:
+            template_speedups = [
+                results[card, 0, level][0] / results[card, max_size, level][0]
+                for level in (DEFAULT_COMPRESS_LEVEL, compress_level)
+            ]
+            compress_speedups = [
+                results[card, size, DEFAULT_COMPRESS_LEVEL][0]
+                / results[card, size, compress_level][0]
+                for size in (0, max_size)
+            ]
+            size_increase = (
+                results[card, max_size, compress_level][1]
+                / results[card, max_size, DEFAULT_COMPRESS_LEVEL][1]
+                - 1
+            )
+            print(
+                f"{card:<8} templates: {min(template_speedups):.2f}-"
+                f"{max(template_speedups):.2f}x, compression level "
+                f"{compress_level}: {min(compress_speedups):.2f}-"
+                f"{max(compress_speedups):.2f}x for {size_increase:+.0%} KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
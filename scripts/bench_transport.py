@@ -0,0 +1,78 @@
+"""Transport metrics of `APIHandler` against a local stub server: bytes on the
+wire with and without compression, handshakes with and without pre-warming.
+
+Usage (from the repository root):
+    python -m scripts.bench_transport --days 1 15 --calls 20
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from scripts.stub_server import StubServer
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.core.metrics import RequestMetrics
+
+
+async def lookups(
+    handler: VisualCrossingHandler, nb_calls: int, warm_up: bool = False
+) -> float:
+    """Run `nb_calls` concurrent rain lookups and return the duration of the
+    slowest one, in milliseconds"""
+    if warm_up:
+        await handler.warm_up(nb_connections=nb_calls)
+
+    async def lookup(idx: int) -> float:
+        start = time.perf_counter()
+        await handler.aget_rain_data(f"Location{idx}")
+        return time.perf_counter() - start
+
+    durations = await asyncio.gather(*(lookup(i) for i in range(nb_calls)))
+    await handler.close()
+    return max(durations) * 1000
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 15])
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+
+    print(f"{'days':>5} {'compress':>9} {'wire KiB':>9} {'decoded KiB':>12}")
+    for nb_days in args.days:
+        for compress in (False, True):
+            server = StubServer(latency=0.0, nb_days=nb_days, compress=compress)
+            server.start()
+            metrics = RequestMetrics()
+            handler = VisualCrossingHandler(
+                domain_name=server.domain_name, protocol="http", metrics=metrics
+            )
+            asyncio.run(lookups(handler, args.calls))
+            stats = metrics.stats(server.domain_name)
+            print(
+                f"{nb_days:>5} {str(compress):>9} {stats['wire_bytes'] / 1024:>9.1f} "
+                f"{stats['decoded_bytes'] / 1024:>12.1f}"
+            )
+            server.stop()
+
+    print(f"\n{'warm-up':>8} {'handshakes':>11} {'reused':>7} {'slowest ms':>11}")
+    server = StubServer(latency=0.05).start()
+    for warm_up in (False, True):
+        metrics = RequestMetrics()
+        handler = VisualCrossingHandler(
+            domain_name=server.domain_name, protocol="http", metrics=metrics
+        )
+        slowest_ms = asyncio.run(lookups(handler, args.calls, warm_up))
+        stats = metrics.stats(server.domain_name)
+        print(
+            f"{str(warm_up):>8} {stats['handshakes']:>11} "
+            f"{stats['reused_connections']:>7} {slowest_ms:>11.1f}"
+        )
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
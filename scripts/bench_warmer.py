@@ -0,0 +1,130 @@
+"""Cache hit ratio of popular locations with and without the cache warmer.
+
+Rain lookups following a Zipf distribution over the locations are simulated
+for several hours, with a simulated clock, against synthetic timelines (no
+network). The warmer refreshes the snapshots of the most popular locations
+before they expire, if they were requested since their last renewal; the
+benchmark reports the hit ratio of the lookups, the part of the hits due to the
+warmer, the refreshes done and skipped, the records billed to the budget, and
+the records billed by the warmer per lookup it served from the cache. A lookup
+missing the cache bills a snapshot, so this cost must stay below the records of
+a snapshot.
+
+Usage (from the repository root):
+    python -m scripts.bench_warmer --hours 4 --locations 50 --rate 3
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+
+from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.apis.weather.synthetic import SyntheticTimelines
+from sunbot.core import (
+    APIBudget,
+    CacheWarmer,
+    Priority,
+    SyntheticTransport,
+    TTLCache,
+)
+from sunbot.core.metrics import RequestMetrics
+
+# Simulation step, in seconds:
+STEP = 10.0
+# Simulated start date: 2024-01-01 08:00 UTC
+START = 1704096000.0
+
+
+class SimulatedClock:
+    """Clock advanced by the simulation"""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def simulate(args: argparse.Namespace, warm: bool) -> dict:
+    """Run the simulation and return its results"""
+    clock = SimulatedClock(START)
+    rng = random.Random(0)
+    budget = APIBudget(args.quota, rate=1000.0, burst=1000, clock=clock)
+    handler = VisualCrossingHandler(
+        domain_name="synthetic.invalid",
+        cache=TTLCache(max_size=512, clock=clock),
+        budget=budget,
+        metrics=RequestMetrics(),
+        transport=SyntheticTransport(SyntheticTimelines(seed=0)),
+    )
+    warmer = CacheWarmer(
+        lambda name: handler.aget_snapshot(
+            name, priority=Priority.PREFETCH, refresh=True
+        ),
+        handler.snapshot_expires_in,
+        top_k=args.top_k,
+        min_recent_hits=args.min_recent_hits,
+        budget=budget,
+        clock=clock,
+    )
+    names = [f"Location{idx}" for idx in range(args.locations)]
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(args.locations)]
+    nb_steps = int(args.hours * 3600 / STEP)
+    for step in range(nb_steps):
+        clock.now = START + step * STEP
+        # Poisson arrivals, `rate` lookups per minute on average:
+        nb_lookups = 0
+        threshold = rng.random()
+        while threshold > math.exp(-args.rate * STEP / 60):
+            nb_lookups += 1
+            threshold *= rng.random()
+        for name in rng.choices(names, weights, k=nb_lookups):
+            warmer.record(name)
+            await handler.aget_rain_data(name)
+        if warm and step % int(warmer.interval / STEP) == 0:
+            await warmer.run_once()
+    await handler.close()
+    results = warmer.stats()
+    results["used"] = budget.used
+    results["attempts"] = handler.metrics.stats("synthetic.invalid")["attempts"]
+    return results
+
+
+def main() -> None:
+    """Entry point of the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=4.0)
+    parser.add_argument("--locations", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=3.0, help="lookups per minute")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--min-recent-hits", type=int, default=1)
+    parser.add_argument("--quota", type=int, default=100000)
+    args = parser.parse_args()
+    os.environ.setdefault("idVisualCrossing", "benchmark")
+
+    print(
+        f"{'warmer':<7} {'lookups':>8} {'hit ratio':>10} {'gain':>6} "
+        f"{'refreshes':>10} {'skipped':>8} {'requests':>9} {'billed':>7} "
+        f"{'per hit':>8}"
+    )
+    reference = None
+    for warm in (False, True):
+        results = asyncio.run(simulate(args, warm))
+        reference = reference or results
+        # Records billed in addition to the run without warmer, per lookup served
+        # from the cache thanks to the warmer:
+        extra = results["used"] - reference["used"]
+        warmed_hits = results["warmed_hits"]
+        per_hit = f"{extra / warmed_hits:.0f}" if warmed_hits else "-"
+        print(
+            f"{str(warm):<7} {results['lookups']:>8} {results['hit_ratio']:>10.1%} "
+            f"{results['hit_ratio_gain']:>6.1%} {results['refreshes']:>10} "
+            f"{results['unrequested_skips']:>8} {results['attempts']:>9} "
+            f"{results['used']:>7} {per_hit:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Local stub of the Visual Crossing timeline API, used by the benchmark scripts.
+
+The server answers to any `/VisualCrossingWebServices/rest/services/timeline/...`
+request, and to multi-location `.../timelinemulti?locations=A|B` requests, with
+a synthetic payload that follows the structure of a real response, restricted
+to the requested `elements`, after an optional artificial latency. It runs in its own thread and event loop,
+so it can be used from a blocking client as well as from an asynchronous one.
+Faults (error responses, `Retry-After` headers, responses slower than client
+timeouts) can be injected randomly or scripted request by request. The server
+can also require JWTs, issued by its `/token` endpoint for a limited time.
+"""
+
+import asyncio
+import base64
+import itertools
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from aiohttp import web
+
+from sunbot.apis.weather.synthetic import synthetic_timeline
+
+class StubServer:
+    """Stub weather server running in a background thread
+
+    Parameters
+    ----------
+    latency : float, optional
+        artificial latency added before each response, in seconds
+    nb_days : int, optional
+        number of days returned in each timeline response
+    port : int, optional
+        listening port. Default to 0, which lets the OS pick a free port
+    error_rate : float, optional
+        probability of answering with `error_status` instead of a payload
+    error_status : int, optional
+        status code of injected errors. Default to 503
+    retry_after : float | str, optional
+        value of the `Retry-After` header sent with injected errors, if any
+    slow_rate : float, optional
+        probability of answering after `slow_latency` instead of `latency`
+    slow_latency : float, optional
+        latency of slow responses, in seconds. Default to 30
+    script : List[int | str], optional
+        faults applied to the next requests, one per request, before random
+        faults: a status code to answer with, `"slow"` for a slow response or
+        `"ok"` for a normal one
+    compress : bool, optional
+        compress payloads when the client accepts it. Default to False
+    multi_endpoint : bool, optional
+        serve the multi-location endpoint. If False, it answers with 404 errors,
+        like a provider without such endpoint. Default to True
+    token_lifetime : float, optional
+        if specified, timeline requests need a bearer token obtained from the
+        `/token` endpoint, which expires after `token_lifetime` seconds. Expired
+        tokens are rejected with 401 errors
+    advertise_lifetime : bool, optional
+        give the lifetime of tokens, with `expires_in` and the `exp` claim. If
+        False, clients can only detect expired tokens when they are rejected.
+        Default to True
+    token_latency : float, optional
+        artificial latency of the token endpoint, in seconds. Default to 0.05
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        nb_days: int = 1,
+        port: int = 0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after: Union[float, str, None] = None,
+        slow_rate: float = 0.0,
+        slow_latency: float = 30.0,
+        script: Optional[List[Union[int, str]]] = None,
+        compress: bool = False,
+        multi_endpoint: bool = True,
+        token_lifetime: Optional[float] = None,
+        advertise_lifetime: bool = True,
+        token_latency: float = 0.05,
+    ) -> None:
+        self.latency = latency
+        self.nb_days = nb_days
+        self.port = port
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.script = list(script or [])
+        self.compress = compress
+        self.multi_endpoint = multi_endpoint
+        self.token_lifetime = token_lifetime
+        self.advertise_lifetime = advertise_lifetime
+        self.token_latency = token_latency
+        self.nb_requests = 0
+        self.nb_faults = 0
+        self.nb_token_requests = 0
+        self.nb_rejected_tokens = 0
+        # Expiration date of each issued token:
+        self.__tokens: Dict[str, float] = {}
+        self.__token_ids = itertools.count()
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__runner: Optional[web.AppRunner] = None
+        self.__started = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+
+    @property
+    def domain_name(self) -> str:
+        """Domain name (host:port) of the stub server"""
+        return f"127.0.0.1:{self.port}"
+
+    async def _timeline(self, request: web.Request) -> web.Response:
+        """Handle a request to the timeline endpoint"""
+        return await self.__respond(
+            lambda include, elements: synthetic_timeline(
+                request.match_info["location"],
+                # A period made of a start and an end date covers several days:
+                max(self.nb_days, len(request.match_info["period"].split("/"))),
+                include,
+                elements,
+            ),
+            request,
+        )
+
+    async def _timeline_multi(self, request: web.Request) -> web.Response:
+        """Handle a request to the multi-location timeline endpoint"""
+        if not self.multi_endpoint:
+            self.nb_requests += 1
+            return web.json_response({"message": "not found"}, status=404)
+
+        def payload(include: str, elements: Optional[List[str]]) -> Dict[str, Any]:
+            locations = request.query.get("locations", "").split("|")
+            return {
+                "queryCost": len(locations) * self.nb_days,
+                "locations": [
+                    synthetic_timeline(location, self.nb_days, include, elements)
+                    for location in locations
+                ],
+            }
+
+        return await self.__respond(payload, request)
+
+    async def _token(self, request: web.Request) -> web.Response:
+        """Handle a request to the token endpoint: issue a new token"""
+        self.nb_token_requests += 1
+        await asyncio.sleep(self.token_latency)
+        if not request.headers.get("Authorization", "").startswith("Basic "):
+            return web.json_response({"error": "invalid_client"}, status=401)
+        expires_at = time.time() + self.token_lifetime
+        claims = {"sub": "stub", "jti": next(self.__token_ids)}
+        if self.advertise_lifetime:
+            claims["exp"] = expires_at
+        token = ".".join(
+            base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+            for part in ({"alg": "none", "typ": "JWT"}, claims)
+        ) + ".stub"
+        self.__tokens[token] = expires_at
+        body = {"access_token": token, "token_type": "Bearer"}
+        if self.advertise_lifetime:
+            body["expires_in"] = self.token_lifetime
+        return web.json_response(body)
+
+    def __token_is_valid(self, request: web.Request) -> bool:
+        """Return whether the request carries a valid token, if tokens are
+        required"""
+        if self.token_lifetime is None:
+            return True
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        return time.time() < self.__tokens.get(token, 0.0)
+
+    async def __respond(self, payload_factory, request: web.Request) -> web.Response:
+        """Answer to a request with the payload built by `payload_factory`, or
+        with an injected fault"""
+        self.nb_requests += 1
+        if not self.__token_is_valid(request):
+            self.nb_rejected_tokens += 1
+            await asyncio.sleep(self.latency)
+            return web.json_response(
+                {"message": "token expired"},
+                status=401,
+                headers={
+                    "WWW-Authenticate": 'Bearer error="invalid_token", '
+                    'error_description="The access token expired"'
+                },
+            )
+        fault = self.__next_fault()
+        if fault != "ok":
+            self.nb_faults += 1
+        await asyncio.sleep(self.slow_latency if fault == "slow" else self.latency)
+        if isinstance(fault, int):
+            headers = {}
+            if self.retry_after is not None:
+                headers["Retry-After"] = str(self.retry_after)
+            return web.json_response(
+                {"message": "injected fault"}, status=fault, headers=headers
+            )
+        include = request.query.get("include", "days,hours,current")
+        elements = request.query.get("elements")
+        response = web.json_response(
+            payload_factory(include, elements.split(",") if elements else None)
+        )
+        if self.compress:
+            response.enable_compression()
+        return response
+
+    def __next_fault(self) -> Union[int, str]:
+        """Return the fault to apply to the current request"""
+        if self.script:
+            return self.script.pop(0)
+        if random.random() < self.error_rate:
+            return self.error_status
+        if random.random() < self.slow_rate:
+            return "slow"
+        return "ok"
+
+    def __run(self) -> None:
+        """Thread entry point: run the aiohttp application forever"""
+        self.__loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.__loop)
+        app = web.Application()
+        app.router.add_post("/token", self._token)
+        app.router.add_get(
+            "/VisualCrossingWebServices/rest/services/timelinemulti",
+            self._timeline_multi,
+        )
+        app.router.add_get(
+            "/VisualCrossingWebServices/rest/services/timeline/{location}/{period:.*}",
+            self._timeline,
+        )
+        self.__runner = web.AppRunner(app, access_log=None)
+        self.__loop.run_until_complete(self.__runner.setup())
+        site = web.TCPSite(self.__runner, "127.0.0.1", self.port)
+        self.__loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.__started.set()
+        self.__loop.run_forever()
+
+    def start(self) -> "StubServer":
+        """Start the server and wait until it accepts connections"""
+        self.__thread.start()
+        self.__started.wait()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server"""
+        if self.__loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self.__runner.cleanup(), self.__loop)
+        future.result()
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+
+
+if __name__ == "__main__":
+    server = StubServer(port=8080).start()
+    print(f"Stub weather server listening on http://{server.domain_name}")
+    print(json.dumps(synthetic_timeline("Toulouse"), indent=2)[:400], "...")
+    threading.Event().wait()
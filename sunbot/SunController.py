@@ -4,7 +4,9 @@
 # =================================
 
 import asyncio
+import io
 import logging
+import time
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -14,10 +16,22 @@ from discord.ext import commands
 
 import sunbot.weather.Meteo as weather
 from sunbot import sunbot, weather_event
+from sunbot.SunImager import SunImage
 from sunbot.core.guild import SunGuild
 from sunbot.core.user import SunUser
 from sunbot.weather_event import DailyWeatherEvent
-from sunbot.apis.weather import VisualCrossingHandler
+from sunbot.apis.weather import OpenMeteoHandler, VisualCrossingHandler, WeatherRouter
+from sunbot.core import (
+    AliasIndex,
+    APIBudget,
+    AssetStore,
+    CacheWarmer,
+    PersistentCache,
+    Priority,
+    RenderCache,
+    RenderService,
+    TTLCache,
+)
 
 
 async def _get_period_autocompletion(
@@ -65,11 +79,74 @@ class SunController(commands.Cog):
         self.usr_dict: Dict[int, SunUser] = {}
         # Dict containing all the guilds to which the bot belongs
         self.srv_dict: Dict[int, SunGuild] = {}
+        # Visual Crossing consumption, saved to survive restarts:
+        self.vc_budget = APIBudget(
+            sunbot.VC_DAILY_QUOTA,
+            f"{self.data_mount_pt}save/vc_budget.json",
+            rate=sunbot.API_REQUEST_RATE,
+            burst=sunbot.API_REQUEST_BURST,
+        )
+        # Weather API responses, saved to survive restarts:
+        self.vc_cache = PersistentCache(
+            f"{self.data_mount_pt}save/api_cache.sqlite3",
+            max_size=sunbot.API_CACHE_MAX_SIZE,
+            max_bytes=sunbot.API_CACHE_MAX_BYTES,
+            retention=sunbot.API_CACHE_RETENTION,
+        )
+        # Backgrounds and icons of weather images, decoded once:
+        SunImage.assets = AssetStore(sunbot.ASSET_CACHE_MAX_BYTES)
+        # Spellings of each location, so they share requests and subscriptions:
+        self.location_aliases = AliasIndex(
+            f"{self.data_mount_pt}save/location_aliases.json"
+        )
         # apu handlers
-        self.vc_handler = VisualCrossingHandler()
+        self.vc_handler = VisualCrossingHandler(
+            cache=self.vc_cache, budget=self.vc_budget, aliases=self.location_aliases
+        )
+        self.om_handler = OpenMeteoHandler(
+            cache=TTLCache(max_size=sunbot.API_CACHE_MAX_SIZE)
+        )
+        # Weather data are served by the best provider, and by the other ones when
+        # it fails or is too slow:
+        self.weather_router = WeatherRouter(
+            [self.vc_handler, self.om_handler],
+            timeout=sunbot.ROUTER_TIMEOUT,
+            max_error_rate=sunbot.ROUTER_MAX_ERROR_RATE,
+            max_latency=sunbot.ROUTER_MAX_LATENCY,
+        )
+        # Rendered weather images, saved to be sent again after restarts:
+        weather.render_cache = RenderCache(
+            sunbot.RENDER_CACHE_MAX_BYTES,
+            f"{self.data_mount_pt}save/render_cache/",
+            sunbot.RENDER_CACHE_MAX_DISK_BYTES,
+        )
+        # Weather images are rendered by worker threads, out of the event loop:
+        self.render_service = RenderService(
+            workers=sunbot.RENDER_WORKERS,
+            max_queue=sunbot.RENDER_MAX_QUEUE,
+            timeout=sunbot.RENDER_TIMEOUT,
+        )
         # Handler for daily weather events
         self.daily_weather_handler = DailyWeatherEvent(
-            f"{self.data_mount_pt}save/daily_weather_sub.json", self.vc_handler
+            f"{self.data_mount_pt}save/daily_weather_sub.json",
+            self.weather_router,
+            self.location_aliases,
+            self.render_service,
+        )
+        # Refresh snapshots of popular locations before they expire, outside of
+        # the daily weather sending:
+        self.cache_warmer = CacheWarmer(
+            lambda location_name: self.vc_handler.aget_snapshot(
+                location_name, priority=Priority.PREFETCH, refresh=True
+            ),
+            self.vc_handler.snapshot_expires_in,
+            top_k=sunbot.WARMER_TOP_K,
+            lead_time=sunbot.WARMER_LEAD_TIME,
+            interval=sunbot.WARMER_INTERVAL,
+            half_life=sunbot.WARMER_HALF_LIFE,
+            min_recent_hits=sunbot.WARMER_MIN_RECENT_HITS,
+            budget=self.vc_budget,
+            pause=self.daily_weather_handler.in_delivery_window,
         )
 
     @commands.Cog.listener()
@@ -96,10 +173,29 @@ class SunController(commands.Cog):
             self.bot.get_user,
             self.bot.get_channel,
         )
+        # Load weather API responses cached before the last restart:
+        start = time.perf_counter()
+        nb_loaded = await self.vc_cache.aload()
+        logging.info(
+            "%d cached API responses loaded in %.0f ms",
+            nb_loaded,
+            (time.perf_counter() - start) * 1000,
+        )
+        # Decode backgrounds and icons before the first weather images:
+        start = time.perf_counter()
+        nb_assets = weather.preload_assets()
+        logging.info(
+            "%d image assets preloaded in %.0f ms",
+            nb_assets,
+            (time.perf_counter() - start) * 1000,
+        )
+        # Open connections to the weather API before the first commands:
+        await self.vc_handler.warm_up(sunbot.API_WARM_CONNECTIONS)
         loop = asyncio.get_running_loop()
         # Create and launch tasks:
         logging.info("Launching weather tasks...")
         loop.create_task(self.daily_weather_handler.run_event_task())
+        loop.create_task(self.cache_warmer.run())
         logging.info("Bot is ready !")
 
     @commands.Cog.listener()
@@ -162,6 +258,9 @@ class SunController(commands.Cog):
         logging.info("%s signal received", signame)
         await self.__save_data()
         logging.info("Data was saved on %s", self.data_mount_pt)
+        await self.weather_router.close()
+        self.render_service.close()
+        self.vc_cache.close()
         # stop running tasks:
         logging.info("Stopping running tasks...")
         current_task = asyncio.current_task()
@@ -248,14 +347,46 @@ class SunController(commands.Cog):
             interaction.user.id,
             location_name,
         )
-
-        data = self.vc_handler.get_current_weather_data(location_name)
-        # Create current weather image:
-        weather.createCurrentWeatherImage(data, sunbot.CURRENT_WEATHER_IMAGE_PATH)
-        await interaction.response.send_message(
+        # Discord expires interactions unanswered after 3 s, which a failover or
+        # a render may exceed, so the answer is sent as a followup:
+        await interaction.response.defer()
+        self.cache_warmer.record(self.location_aliases.resolve(location_name))
+        data = await self.weather_router.aget_current_weather_data(location_name)
+        if not data:
+            logging.error(
+                "An error occured when trying to get current weather for the place %s",
+                location_name,
+            )
+            await interaction.followup.send(
+                "Humm, quelque chose s'est mal passé en essayant de récupérer"
+                f" la météo actuelle pour {location_name} 😢"
+            )
+            return
+        # Create current weather image, unless it was just rendered:
+        image = weather.render_cache.get(
+            weather.card_key("current", data), memory_only=True
+        )
+        try:
+            if image is None:
+                image = await self.render_service.render(
+                    weather.render_current_weather_image, data
+                )
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            await interaction.followup.send(
+                "Je suis débordé, réessaie dans quelques instants ! 😵"
+            )
+            return
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("Unable to render current weather of %s", location_name)
+            await interaction.followup.send(
+                "Humm, quelque chose s'est mal passé en essayant de dessiner"
+                f" la météo actuelle pour {location_name} 😢"
+            )
+            return
+        await interaction.followup.send(
             f"Voici la météo actuelle sur {location_name}:",
             file=discord.File(
-                f"{sunbot.CURRENT_WEATHER_IMAGE_PATH}{sunbot.CURRENT_WEATHER_IMAGE_NAME}"
+                io.BytesIO(image), filename=sunbot.CURRENT_WEATHER_IMAGE_NAME
             ),
         )
 
@@ -291,20 +422,23 @@ class SunController(commands.Cog):
             location_name,
             sunbot.PERIODS[period],
         )
-        data = self.vc_handler.get_rain_data(location_name, period)
+        # The answer may take more than the 3 s allowed by Discord on failover:
+        await interaction.response.defer()
+        self.cache_warmer.record(self.location_aliases.resolve(location_name))
+        data = await self.weather_router.aget_rain_data(location_name, period)
         if not data:
             logging.error(
                 "An error occured when trying to get daily rain informations for the place %s",
                 location_name,
             )
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "Humm, quelque chose s'est mal passé en essayant de récupérer"
                 f" les informations de pluie pour {location_name} 😢"
             )
             return
         # Build the embed message to send in response to the command call:
         embed2send = weather.create_rain_embed(data, period=period)
-        await interaction.response.send_message(embed=embed2send)
+        await interaction.followup.send(embed=embed2send)
 
     @app_commands.command(
         name="daily_weather",
@@ -324,10 +458,13 @@ class SunController(commands.Cog):
         ## Return value:
         not applicable
         """
+        # The location lookup may take more than the 3 s allowed by Discord on
+        # failover, so answers are sent as followups:
+        await interaction.response.defer()
         guild_id = interaction.guild_id
         # command can only be used by an admin of the guild that called it
         if not interaction.user.guild_permissions.administrator:
-            return await interaction.response.send_message(
+            return await interaction.followup.send(
                 "Seul les administrateurs du serveur sont autorisés à utiliser cette commande!"
             )
         # If daily weather for specified location and guild was already set:
@@ -344,7 +481,7 @@ class SunController(commands.Cog):
                 await self.daily_weather_handler.del_sub_from_location(
                     weather_event.SERVER_SUB_TYPE, guild_id, location_name
                 )
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     f"Bien compris, je n'enverrai plus la météo quotidienne pour {location_name} 😀"
                 )
                 logging.info(
@@ -357,7 +494,7 @@ class SunController(commands.Cog):
                 await self.daily_weather_handler.add_sub2location(
                     interaction.channel, location_name
                 )
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     f"Ok, j'enverrai désormais la météo quotidienne pour {location_name} ici à la place du channel précédent!"
                 )
                 logging.info(
@@ -368,10 +505,10 @@ class SunController(commands.Cog):
         # If daily weather for specified location and server is not set:
         else:
             # Check if location is known by the API:
-            data = self.vc_handler.get_daily_weather_data(location_name)
+            data = await self.weather_router.aget_daily_weather_data(location_name)
             if not data:
                 logging.error("Unknown location:  %s", location_name)
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     f"Je n'ai pas {location_name} dans mes données, vérifies le nom !"
                 )
                 return
@@ -379,7 +516,7 @@ class SunController(commands.Cog):
             await self.daily_weather_handler.add_sub2location(
                 interaction.channel, location_name, location_tz
             )
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 f"C'est compris, j'enverrai désormais quotidiennement la météo du jour pour {location_name} ici 😉"
             )
         await self.daily_weather_handler.save_locations_subscribers()
@@ -402,6 +539,8 @@ class SunController(commands.Cog):
         ## Return value:
         not applicable
         """
+        # The answer may take more than the 3 s allowed by Discord on failover:
+        await interaction.response.defer()
         user_id = interaction.user.id
         # Two cases depending on whether user has already used this command or not
         # for the specified location
@@ -413,7 +552,7 @@ class SunController(commands.Cog):
             await self.daily_weather_handler.del_sub_from_location(
                 weather_event.USER_SUB_TYPE, user_id, location_name
             )
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 content=f"C'est entendu, je ne vous enverrai plus la météo quotidienne pour {location_name}"
             )
             logging.info(
@@ -423,10 +562,10 @@ class SunController(commands.Cog):
             return
         # User has not enable the pm for the specified location, so first check
         # that this city is known by the API to avoid future errors
-        data = self.vc_handler.get_daily_weather_data(location_name)
+        data = await self.weather_router.aget_daily_weather_data(location_name)
         if not data:
             logging.error("Location %s is unknown by the API", location_name)
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 content=f"Je ne connais pas {location_name}, désolé ! Vérifiez l'orthographe de la localisation et reéessayez!"
             )
             return
@@ -440,7 +579,7 @@ class SunController(commands.Cog):
             user_id,
             location_name,
         )
-        await interaction.response.send_message(
+        await interaction.followup.send(
             content=f"Super ! Je vous enverrez désormais la météo pour {location_name} chaque jour en message privé! (à 7h00 heure locale de la localisation)"
         )
         await self.daily_weather_handler.save_locations_subscribers()
@@ -471,6 +610,120 @@ class SunController(commands.Cog):
                 await guild_syst_channel.send(embed=embed2send)
         await interaction.response.send_message("Message envoyé !")
 
+    @app_commands.command(
+        name="api_usage",
+        description="[admin] Consommation du jour de l'API météo",
+    )
+    @app_commands.guilds(discord.Object(id=726063782606143618))
+    async def api_usage(self, interaction: discord.Interaction) -> None:
+        """Mainteners' command used to display the consumption of the weather API
+        for the current day, per priority class and per location, the hit ratio
+        of the cache, the number of stale responses served, the location aliases,
+        the health of weather providers, the load of image rendering and the
+        images served by the render cache
+        ## Parameters:
+        * `interaction`: discord interaction which contains context data
+        ## Return value:
+        not applicable
+        """
+        usage = self.vc_budget.usage()
+        embed2send = discord.Embed(
+            title=f"Consommation Visual Crossing du {usage['day']}",
+            description=f"{usage['used']} / {usage['quota']} enregistrements "
+            f"({usage['remaining']} restants)",
+        )
+        embed2send.add_field(
+            name="Par priorité",
+            value="\n".join(
+                f"{name}: {cost} (refusées: {usage['denied'][name]})"
+                for name, cost in usage["by_priority"].items()
+            ),
+            inline=False,
+        )
+        top_locations = list(usage["by_location"].items())[:10]
+        embed2send.add_field(
+            name="Par localité",
+            value="\n".join(f"{name}: {cost}" for name, cost in top_locations)
+            or "Aucune requête",
+            inline=False,
+        )
+        warmer_stats = self.cache_warmer.stats()
+        embed2send.add_field(
+            name="Préchauffage du cache",
+            value=f"Taux de succès du cache: {warmer_stats['hit_ratio']:.0%} "
+            f"(dont {warmer_stats['hit_ratio_gain']:.0%} grâce au préchauffage)\n"
+            f"{warmer_stats['refreshes']} rafraîchissements, "
+            f"{warmer_stats['failures']} échecs, "
+            f"{warmer_stats['unrequested_skips'] + warmer_stats['budget_skips']}"
+            " évités",
+            inline=False,
+        )
+        cache_stats = self.vc_cache.stats()
+        embed2send.add_field(
+            name="Cache sur disque",
+            value=f"{cache_stats['disk_entries']} réponses "
+            f"({cache_stats['disk_bytes'] / 1024 / 1024:.1f} Mo), "
+            f"{cache_stats['loaded']} chargées au démarrage, "
+            f"{cache_stats['disk_hits']} relues depuis le disque",
+            inline=False,
+        )
+        alias_stats = self.location_aliases.stats()
+        embed2send.add_field(
+            name="Alias de localités",
+            value=f"{alias_stats['names']} noms pour {alias_stats['locations']} "
+            f"localités, {alias_stats['merged_lookups']} recherches regroupées",
+            inline=False,
+        )
+        router_stats = self.weather_router.stats()
+        embed2send.add_field(
+            name="Fournisseurs météo",
+            value="\n".join(
+                f"{name}: p50 {stats['p50_latency'] * 1000:.0f} ms, "
+                f"p95 {stats['p95_latency'] * 1000:.0f} ms, "
+                f"erreurs {stats['error_rate']:.0%}, {stats['served']} servies"
+                + ("" if stats["healthy"] else " (écarté)")
+                for name, stats in router_stats["providers"].items()
+            )
+            + f"\nBasculements: {router_stats['failovers']}, "
+            f"sondages: {router_stats['probes']}",
+            inline=False,
+        )
+        render_stats = self.render_service.stats()
+        embed2send.add_field(
+            name="Rendu des images",
+            value=f"{render_stats['workers']} workers, file d'attente: "
+            f"{render_stats['queue_depth']} (max {render_stats['max_queue_depth']})\n"
+            f"Attente p95 {render_stats['p95_wait'] * 1000:.0f} ms, "
+            f"rendu p50 {render_stats['p50_latency'] * 1000:.0f} ms, "
+            f"p95 {render_stats['p95_latency'] * 1000:.0f} ms\n"
+            f"{render_stats['completed']} images, {render_stats['failures']} échecs, "
+            f"{render_stats['timeouts']} expirées, "
+            f"{render_stats['rejected']} refusées",
+            inline=False,
+        )
+        render_cache_stats = weather.render_cache.stats()
+        embed2send.add_field(
+            name="Cache des images",
+            value=f"Taux de succès: {render_cache_stats['hit_ratio']:.0%} "
+            f"({render_cache_stats['memory_hits']} en mémoire, "
+            f"{render_cache_stats['disk_hits']} sur disque)\n"
+            f"{render_cache_stats['bytes_saved'] / 1024 / 1024:.1f} Mo d'images "
+            f"servies sans rendu, {render_cache_stats['disk_entries']} images "
+            f"sur disque ({render_cache_stats['disk_bytes'] / 1024 / 1024:.1f} Mo)",
+            inline=False,
+        )
+        stale_responses = self.vc_handler.metrics.stats(self.vc_handler.domain_name)[
+            "stale_responses"
+        ]
+        embed2send.add_field(
+            name="Données périmées servies",
+            value=f"En attente de rafraîchissement: {stale_responses.get('revalidate', 0)}\n"
+            f"Sur erreur de l'API: {stale_responses.get('error', 0)}\n"
+            f"Sur dépassement du budget: {stale_responses.get('budget', 0)}",
+            inline=False,
+        )
+        await interaction.response.send_message(embed=embed2send)
+
     # ====================================================================================
     #                                   PRIVATE METHODS PART
     # ====================================================================================
@@ -484,3 +737,7 @@ class SunController(commands.Cog):
             logging.info("Saving data for guild n°%d", srv.id)
             srv.save_srv_data()
         await self.daily_weather_handler.save_locations_subscribers()
+        # The API consumption and the location aliases are only saved every few
+        # changes:
+        self.vc_budget.save()
+        self.location_aliases.save()
@@ -10,12 +10,19 @@
 # =======================================#
 
 import logging
+from typing import BinaryIO, Union
 
 from PIL import Image as img
 from PIL import ImageDraw
 from PIL import ImageFont as font
 from PIL import UnidentifiedImageError
 
+from sunbot.core import AssetStore
+
+# Default size of images, in pixels:
+DEFAULT_WIDTH = 1050
+DEFAULT_HEIGHT = 700
+
 # ===============================#
 #       CLASS DEFINITION        #
 # ===============================#
@@ -23,10 +30,18 @@ from PIL import UnidentifiedImageError
 
 class SunImage:
     """This class provides methods to generate an image. An image is composed of a background image
-    and elements added on top of it, such as other images, or text elements"""
+    and elements added on top of it, such as other images, or text elements. Backgrounds and
+    icons are loaded from the `assets` store shared by all images, so each file is decoded and
+    resized once"""
+
+    # Decoded backgrounds and icons, shared by all images:
+    assets = AssetStore()
 
     def __init__(
-        self, background_img: str, width: int = 1050, height: int = 700
+        self,
+        background_img: str,
+        width: int = DEFAULT_WIDTH,
+        height: int = DEFAULT_HEIGHT,
     ) -> None:
         """Creates an image from the image pointed by the specified path. Loaded image is resized
         according to optional `width` and `height `arguments. If these parameters is not set, image
@@ -47,8 +62,10 @@ class SunImage:
         # black background and default size:
         try:
             logging.info("Loading image from %s...", background_img)
-            self.background_img = img.open(background_img)
-            self.background_img = self.background_img.resize((width, height))
+            # The stored background is shared, so the image is drawn on a copy:
+            self.background_img = SunImage.assets.get(
+                background_img, (width, height)
+            ).copy()
         except (FileNotFoundError, UnidentifiedImageError):
             logging.error(
                 "Image at %s cannot be found. Please check the path", background_img
@@ -60,6 +77,20 @@ class SunImage:
         self.height = self.background_img.height
         self.width = self.background_img.width
 
+    def copy(self) -> "SunImage":
+        """Returns a new image with a copy of this image content, on which elements can
+        be added without modifying this image
+        ## Parameters:
+        not applicable
+        ## Return value:
+        Copy of this image"""
+        image_copy = SunImage.__new__(SunImage)
+        image_copy.background_img = self.background_img.copy()
+        image_copy.draw_tool = ImageDraw.ImageDraw(image_copy.background_img)
+        image_copy.height = self.height
+        image_copy.width = self.width
+        return image_copy
+
     # Getters and setters:
     def get_img_size(self) -> tuple:
         """Returns this image size as a tuple
@@ -153,10 +184,9 @@ class SunImage:
             raise ValueError(
                 "addIcon : tuple specified for icon position is incorrect."
             )
-        # Try to load and resize the specified icon:
+        # Try to load the specified icon, resized and rotated:
         try:
-            icon = img.open(icon).convert("RGBA")
-            icon = icon.resize(size).rotate(rotation)
+            icon_img = SunImage.assets.get(icon, size, rotation, "RGBA")
         except (FileNotFoundError, UnidentifiedImageError):
             logging.error(
                 "Specified icon at %s doesn't exist. Please check the icon path."
@@ -165,7 +195,7 @@ class SunImage:
             )
         else:
             # Add the icon to the image :
-            self.background_img.paste(icon, position, icon)
+            self.background_img.paste(icon_img, position, icon_img)
 
     def draw_txt(
         self, text: str, txt_font: font.ImageFont, position: tuple, color="WHITE"
@@ -196,14 +226,25 @@ class SunImage:
         # Write the text on this image :
         self.draw_tool.text(position, text, color, font=txt_font)
 
-    def save_img(self, save_location: str, img_format: str = "png") -> None:
-        """Saves this image at the specified `saveLocationPath` and `img_format`
+    def save_img(
+        self, save_location: Union[str, BinaryIO], img_format: str = "png", **params
+    ) -> None:
+        """Saves this image at the specified `saveLocationPath` and `img_format`. The
+        image can also be encoded in memory, in a buffer such as `io.BytesIO`: the
+        buffer is overwritten, so it can be reused for several images
         ## Parameters:
-        * `save_location`: path where to save this image, as a string
+        * `save_location`: path where to save this image, as a string, or buffer
         * `img_format`: optional, save format for this image, default is png
+        * `params`: optional, options of the image writer, such as `compress_level`
+        for png images
         ## Return value: not applicable
         ##Exceptions:
         * `ValueError`: if specified `format` could not be determined
         * `IOError`: if the file where save this image cannot be created
         """
-        self.background_img.save(save_location, img_format)
+        if isinstance(save_location, str):
+            self.background_img.save(save_location, img_format, **params)
+            return
+        save_location.seek(0)
+        self.background_img.save(save_location, img_format, **params)
+        save_location.truncate()
@@ -1,6 +1,24 @@
 """__init__.py"""
 
-from .mixin import WeatherAPIHandler
+from .mixin import (
+    LocationResult,
+    UnknownLocationError,
+    WeatherAPIHandler,
+    WeatherProvider,
+)
+from .om_handler import OpenMeteoHandler
+from .router import ProviderHealth, WeatherRouter
+from .snapshot import ForecastSnapshot
 from .vc_handler import VisualCrossingHandler
 
-__all__ = ["VisualCrossingHandler", "WeatherAPIHandler"]
+__all__ = [
+    "ForecastSnapshot",
+    "LocationResult",
+    "OpenMeteoHandler",
+    "ProviderHealth",
+    "UnknownLocationError",
+    "VisualCrossingHandler",
+    "WeatherAPIHandler",
+    "WeatherProvider",
+    "WeatherRouter",
+]
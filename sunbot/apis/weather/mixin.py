@@ -1,12 +1,63 @@
-"""Weather API handler class definition"""
+"""Weather provider and weather API handler classes definition"""
 
-from sunbot.core import APIHandler
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional
 
+from sunbot.core import APIHandler, Priority
 
-class WeatherAPIHandler(APIHandler):
-    """Common methods for weather API handler"""
+# Maximum number of requests sent at the same time by batch methods:
+BATCH_MAX_CONCURRENCY = 8
 
-    def get_rain_data(self, location_name: str, period: str = "aujourd'hui") -> dict:
+
+class UnknownLocationError(LookupError):
+    """Raised by the getters of a weather provider when the provider does not
+    know the requested location, which is not a failure of the provider"""
+
+
+class LocationResult:
+    """Result of a batch method for one location: the retrieved data, or the
+    error that prevented to retrieve them"""
+
+    __slots__ = ["data", "error"]
+
+    def __init__(self, data: Optional[dict] = None, error: Optional[str] = None):
+        self.data = data if data is not None else {}
+        self.error = error
+
+    @classmethod
+    def from_data(cls, data: dict) -> "LocationResult":
+        """Wrap data returned by a getter. Getters return an empty dict if the
+        request failed"""
+        if not data:
+            return cls(error="No data received from the weather API")
+        return cls(data)
+
+    @property
+    def ok(self) -> bool:
+        """`True` if data were retrieved for the location"""
+        return self.error is None and bool(self.data)
+
+    def __repr__(self) -> str:
+        return f"LocationResult(data={self.data!r}, error={self.error!r})"
+
+
+class WeatherProvider:
+    """Common methods of weather data providers. Each data getter exists in a
+    synchronous version, for scripts, and in an asynchronous version prefixed
+    with `a`, which must be used from the bot event loop. Getters return an
+    empty dict if data could not be retrieved, and raise `UnknownLocationError`
+    if the location does not exist"""
+
+    # Name of the provider, displayed with its data:
+    name = "weather"
+
+    def get_rain_data(
+        self,
+        location_name: str,
+        period: str = "aujourd'hui",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict:
         """Get rain data for specified location and period
 
         Parameters
@@ -16,6 +67,8 @@ class WeatherAPIHandler(APIHandler):
         period : str, optional
             period of the location for which to retrieve rain data. For now two periods are
             supported: `aujourd'hui` (today) and `demain` (tommorrow). Default to `aujourd'hui`
+        priority : Priority, optional
+            priority class of the request. Default to `Priority.INTERACTIVE`
 
         Returns
         -------
@@ -25,17 +78,21 @@ class WeatherAPIHandler(APIHandler):
         Raises
         ------
         NotImplementedError
-            This method must be redefined by inheriting weather API handler
+            This method must be redefined by inheriting weather providers
         """
         raise NotImplementedError
 
-    def get_current_weather_data(self, location_name: str) -> dict:
+    def get_current_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
         """Get current weather data for specified location
 
         Parameters
         ----------
         location_name : str
             name of the location for which to retrive current weather data
+        priority : Priority, optional
+            priority class of the request. Default to `Priority.INTERACTIVE`
 
         Returns
         -------
@@ -45,17 +102,21 @@ class WeatherAPIHandler(APIHandler):
         Raises
         ------
         NotImplementedError
-            This method must be redefined by inheriting weather API handler
+            This method must be redefined by inheriting weather providers
         """
         raise NotImplementedError
 
-    def get_daily_weather_data(self, location_name: str) -> dict:
+    def get_daily_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
         """Get daily weather data for specified location
 
         Parameters
         ----------
         location_name : str
             name of the location for which to retrieve daily weather data
+        priority : Priority, optional
+            priority class of the request. Default to `Priority.INTERACTIVE`
 
         Returns
         -------
@@ -65,6 +126,123 @@ class WeatherAPIHandler(APIHandler):
         Raises
         ------
         NotImplementedError
-            This method must be redefined by inheriting weather API handler
+            This method must be redefined by inheriting weather providers
         """
         raise NotImplementedError
+
+    async def aget_rain_data(
+        self,
+        location_name: str,
+        period: str = "aujourd'hui",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict:
+        """Asynchronous version of `get_rain_data`
+
+        Raises
+        ------
+        NotImplementedError
+            This method must be redefined by inheriting weather providers
+        """
+        raise NotImplementedError
+
+    async def aget_current_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        """Asynchronous version of `get_current_weather_data`
+
+        Raises
+        ------
+        NotImplementedError
+            This method must be redefined by inheriting weather providers
+        """
+        raise NotImplementedError
+
+    async def aget_daily_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        """Asynchronous version of `get_daily_weather_data`
+
+        Raises
+        ------
+        NotImplementedError
+            This method must be redefined by inheriting weather providers
+        """
+        raise NotImplementedError
+
+    def get_daily_weather_data_many(
+        self,
+        location_names: Iterable[str],
+        priority: Priority = Priority.DAILY,
+    ) -> Dict[str, LocationResult]:
+        """Get daily weather data for several locations. By default, locations
+        are requested one after the other: inheriting handlers can redefine this
+        method if their web API has a multi-location endpoint
+
+        Parameters
+        ----------
+        location_names : Iterable[str]
+            names of the locations for which to retrieve daily weather data
+        priority : Priority, optional
+            priority class of the requests. Default to `Priority.DAILY`
+
+        Returns
+        -------
+        Dict[str, LocationResult]
+            result for each location
+        """
+        results = {}
+        for location_name in dict.fromkeys(location_names):
+            try:
+                data = self.get_daily_weather_data(location_name, priority)
+            except Exception as err:  # pylint: disable=broad-except
+                # An error for a location must not prevent the others:
+                logging.exception("Daily weather failed for %s", location_name)
+                results[location_name] = LocationResult(error=repr(err))
+                continue
+            results[location_name] = LocationResult.from_data(data)
+        return results
+
+    async def aget_daily_weather_data_many(
+        self,
+        location_names: Iterable[str],
+        priority: Priority = Priority.DAILY,
+        max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    ) -> Dict[str, LocationResult]:
+        """Asynchronous version of `get_daily_weather_data_many`. By default,
+        locations are requested in parallel, with at most `max_concurrency`
+        requests at the same time
+
+        Parameters
+        ----------
+        location_names : Iterable[str]
+            names of the locations for which to retrieve daily weather data
+        priority : Priority, optional
+            priority class of the requests. Default to `Priority.DAILY`
+        max_concurrency : int, optional
+            maximum number of requests sent at the same time.
+            Default to `BATCH_MAX_CONCURRENCY`
+
+        Returns
+        -------
+        Dict[str, LocationResult]
+            result for each location
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(location_name: str) -> LocationResult:
+            async with semaphore:
+                try:
+                    data = await self.aget_daily_weather_data(location_name, priority)
+                except Exception as err:  # pylint: disable=broad-except
+                    # An error for a location must not prevent the others:
+                    logging.exception("Daily weather failed for %s", location_name)
+                    return LocationResult(error=repr(err))
+            return LocationResult.from_data(data)
+
+        location_names = list(dict.fromkeys(location_names))
+        results = await asyncio.gather(*(fetch(name) for name in location_names))
+        return dict(zip(location_names, results))
+
+
+class WeatherAPIHandler(WeatherProvider, APIHandler):
+    """Weather provider backed by a web API"""
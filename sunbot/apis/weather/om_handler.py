@@ -0,0 +1,468 @@
+"""Open-Meteo API handler
+
+Open-Meteo serves forecasts for coordinates, without API key. A location name
+is first resolved by its geocoding API, whose results are cached for a long
+time, then the forecast of the place is requested: current conditions, and
+hours and days of today and tomorrow, in a single request from which every
+kind of data is derived, like the snapshots of `VisualCrossingHandler`.
+
+Data are converted to the schema of `sunbot.apis.weather.schema`: WMO weather
+codes are mapped to Visual Crossing condition types, snow depths are converted
+to cm, visibilities to km, and times to `HH:MM:SS` strings.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+import requests
+
+from sunbot import sunbot
+from sunbot.apis.weather.mixin import UnknownLocationError, WeatherAPIHandler
+from sunbot.core import APIHandler, APIResponse, Priority
+
+GEOCODING_DOMAIN = "geocoding-api.open-meteo.com"
+GEOCODING_PATH = "v1/search"
+FORECAST_PATH = "v1/forecast"
+
+# Time to live of cached responses, in seconds. Places do not move, forecasts
+# are refreshed as often as the snapshots of Visual Crossing:
+GEOCODING_TTL = 7 * 24 * 60 * 60
+FORECAST_TTL = 10 * 60
+# Days covered by a forecast, and index of each period in the forecast:
+FORECAST_DAYS = 2
+DAY_INDEXES = {"today": 0, "tomorrow": 1}
+
+CURRENT_VARIABLES = [
+    "temperature_2m",
+    "apparent_temperature",
+    "relative_humidity_2m",
+    "precipitation",
+    "snowfall",
+    "weather_code",
+    "cloud_cover",
+    "pressure_msl",
+    "wind_speed_10m",
+    "wind_direction_10m",
+    "wind_gusts_10m",
+]
+HOURLY_VARIABLES = [
+    "weather_code",
+    "precipitation_probability",
+    "precipitation",
+    "snow_depth",
+    "visibility",
+    "uv_index",
+    "relative_humidity_2m",
+    "pressure_msl",
+]
+DAILY_VARIABLES = [
+    "weather_code",
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "precipitation_sum",
+    "precipitation_probability_max",
+    "snowfall_sum",
+    "wind_speed_10m_max",
+    "wind_gusts_10m_max",
+    "wind_direction_10m_dominant",
+    "uv_index_max",
+    "sunrise",
+    "sunset",
+]
+
+# Visual Crossing condition type of each WMO weather code:
+WMO_CONDITIONS = {
+    0: "type_43",
+    1: "type_42",
+    2: "type_42",
+    3: "type_41",
+    45: "type_8",
+    48: "type_12",
+    51: "type_4",
+    53: "type_2",
+    55: "type_3",
+    56: "type_11",
+    57: "type_10",
+    61: "type_26",
+    63: "type_21",
+    65: "type_25",
+    66: "type_14",
+    67: "type_13",
+    71: "type_35",
+    73: "type_31",
+    75: "type_34",
+    77: "type_31",
+    80: "type_24",
+    81: "type_24",
+    82: "type_25",
+    85: "type_33",
+    86: "type_33",
+    95: "type_37",
+    96: "type_16",
+    99: "type_16",
+}
+# WMO weather codes of snow and hail. Other codes from 51 are rain, freezing rain
+# included, as rain embeds do not describe freezing rain:
+SNOW_CODES = frozenset([71, 73, 75, 77, 85, 86])
+HAIL_CODES = frozenset([96, 99])
+
+
+class OpenMeteoHandler(WeatherAPIHandler):
+    """Open-Meteo API Handler
+
+    Parameters
+    ----------
+    domain_name : str, optional
+        domain name of the forecast API. Default to `api.open-meteo.com`
+    geocoding_domain_name : str, optional
+        domain name of the geocoding API. Default to `GEOCODING_DOMAIN`
+    **kwargs
+        parameters of `APIHandler`, also used for the geocoding API, except the
+        circuit breaker
+    """
+
+    name = "Open-Meteo"
+
+    def __init__(
+        self,
+        domain_name: str = "api.open-meteo.com",
+        geocoding_domain_name: str = GEOCODING_DOMAIN,
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            domain_name=domain_name,
+            auth_mode="no",
+            accepted_formats=None,
+            **kwargs,
+        )
+        # Location names are resolved by the geocoding API, on its own domain:
+        self.geocoder = APIHandler(
+            geocoding_domain_name,
+            auth_mode="no",
+            **{key: value for key, value in kwargs.items() if key != "circuit_breaker"},
+        )
+
+    def get_forecast(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Get the forecast of the specified location: current conditions, and
+        hours and days of today and tomorrow. Responses of the geocoding and
+        forecast APIs are cached
+
+        Parameters
+        ----------
+        location_name : str
+            name of the location for which to retrieve the forecast
+        priority : Priority, optional
+            priority class of the requests. Default to `Priority.INTERACTIVE`
+
+        Returns
+        -------
+        Tuple[Dict[str, Any], Dict[str, Any]] | None
+            place to which the name was resolved, with its name, country,
+            coordinates and timezone, and decoded forecast response, or None if
+            a request failed
+
+        Raises
+        ------
+        UnknownLocationError
+            if no place matches the location name
+        """
+        place = self.__place(
+            location_name,
+            self.geocoder.request(
+                **self.__geocoding_query(location_name), priority=priority
+            ),
+        )
+        if place is None:
+            return None
+        response = self.request(**self.__forecast_query(place), priority=priority)
+        return self.__forecast(place, response)
+
+    async def aget_forecast(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Asynchronous version of `get_forecast`"""
+        place = self.__place(
+            location_name,
+            await self.geocoder.arequest(
+                **self.__geocoding_query(location_name), priority=priority
+            ),
+        )
+        if place is None:
+            return None
+        response = await self.arequest(
+            **self.__forecast_query(place), priority=priority
+        )
+        return self.__forecast(place, response)
+
+    def get_rain_data(
+        self,
+        location_name: str,
+        period: str = "aujourd'hui",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict:
+        return self.__rain_view(self.get_forecast(location_name, priority), period)
+
+    async def aget_rain_data(
+        self,
+        location_name: str,
+        period: str = "aujourd'hui",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict:
+        forecast = await self.aget_forecast(location_name, priority)
+        return self.__rain_view(forecast, period)
+
+    def get_current_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        return self.__current_weather_view(self.get_forecast(location_name, priority))
+
+    async def aget_current_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        forecast = await self.aget_forecast(location_name, priority)
+        return self.__current_weather_view(forecast)
+
+    def get_daily_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        return self.__daily_weather_view(self.get_forecast(location_name, priority))
+
+    async def aget_daily_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        forecast = await self.aget_forecast(location_name, priority)
+        return self.__daily_weather_view(forecast)
+
+    async def close(self) -> None:
+        await self.geocoder.close()
+        await super().close()
+
+    @staticmethod
+    def __geocoding_query(location_name: str) -> Dict[str, Any]:
+        """Return request parameters used to resolve a location name. The
+        geocoding API only matches place names, so the country or region which
+        may follow a comma is dropped"""
+        place_name = " ".join(location_name.split(",")[0].split())
+        return {
+            "resource_path": GEOCODING_PATH,
+            "request_args": {
+                "name": quote(place_name),
+                "count": 1,
+                "language": "fr",
+                "format": "json",
+            },
+            "cache_ttl": GEOCODING_TTL,
+            "usage_tag": location_name,
+        }
+
+    @staticmethod
+    def __forecast_query(place: Dict[str, Any]) -> Dict[str, Any]:
+        """Return request parameters used to retrieve the forecast of a place"""
+        return {
+            "resource_path": FORECAST_PATH,
+            "request_args": {
+                "latitude": place["latitude"],
+                "longitude": place["longitude"],
+                "current": "%2C".join(CURRENT_VARIABLES),
+                "hourly": "%2C".join(HOURLY_VARIABLES),
+                "daily": "%2C".join(DAILY_VARIABLES),
+                "timezone": quote(place.get("timezone") or "auto", safe=""),
+                "forecast_days": FORECAST_DAYS,
+            },
+            "cache_ttl": FORECAST_TTL,
+            "usage_tag": place["name"],
+        }
+
+    @staticmethod
+    def __place(
+        location_name: str, response: Union[requests.Response, APIResponse]
+    ) -> Optional[Dict[str, Any]]:
+        """Return the first place of a geocoding response, or None if the request
+        failed. `UnknownLocationError` is raised if no place matched"""
+        if not response.ok:
+            logging.error(
+                "Geocoding request failed (%d): %s", response.status_code, response.url
+            )
+            return None
+        results = response.json().get("results") or []
+        if not results:
+            raise UnknownLocationError(location_name)
+        return results[0]
+
+    @staticmethod
+    def __forecast(
+        place: Dict[str, Any], response: Union[requests.Response, APIResponse]
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Return the place and the decoded forecast, or None if the request
+        failed. The reception date of the response is kept under `as_of`"""
+        if not response.ok:
+            logging.error(
+                "Forecast request failed (%d): %s", response.status_code, response.url
+            )
+            return None
+        # The decoded body may be shared with the cached response, so it is copied:
+        as_of = getattr(response, "received_at", None)
+        return place, {**response.json(), "as_of": as_of}
+
+    def __rain_view(
+        self, forecast: Optional[Tuple[Dict[str, Any], Dict[str, Any]]], period: str
+    ) -> dict:
+        """Extract rain data of the specified period from a forecast"""
+        if forecast is None:
+            return {}
+        place, payload = forecast
+        hourly = payload["hourly"]
+        first_hour = DAY_INDEXES[sunbot.PERIODS[period]] * 24
+        if first_hour + 24 > len(hourly["time"]):
+            logging.error("Forecast of %s does not cover %s", place["name"], period)
+            return {}
+        data = {}
+        for hour in range(24):
+            idx = first_hour + hour
+            prefix = f"days/0/hours/{hour}"
+            precipprob = _at(hourly, "precipitation_probability", idx)
+            data[f"{prefix}/datetime"] = f"{hourly['time'][idx][11:16]}:00"
+            data[f"{prefix}/preciptype"] = _preciptype(_at(hourly, "weather_code", idx))
+            data[f"{prefix}/precipprob"] = precipprob if precipprob is not None else 0
+            data[f"{prefix}/precip"] = _at(hourly, "precipitation", idx)
+        data["address"] = _address(place)
+        return self.__dated(data, payload)
+
+    def __current_weather_view(
+        self, forecast: Optional[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> dict:
+        """Extract current weather data from a forecast. Variables which are
+        only hourly are read at the current hour"""
+        if forecast is None:
+            return {}
+        _, payload = forecast
+        current = payload["current"]
+        hourly = payload["hourly"]
+        hour = _hour_index(hourly["time"], current["time"])
+        code = current.get("weather_code")
+        data = {
+            "timezone": payload.get("timezone"),
+            "conditions": _condition(code),
+            "temp": current.get("temperature_2m"),
+            "feelslike": current.get("apparent_temperature"),
+            "preciptype": _preciptype(code),
+            "preciprob": _at(hourly, "precipitation_probability", hour),
+            "precip": current.get("precipitation"),
+            "snowdepth": _scale(_at(hourly, "snow_depth", hour), 100),
+            "snow": current.get("snowfall"),
+            "windspeed": current.get("wind_speed_10m"),
+            "winddir": current.get("wind_direction_10m"),
+            "windgust": current.get("wind_gusts_10m"),
+            "humidity": current.get("relative_humidity_2m"),
+            "pressure": current.get("pressure_msl"),
+            "visibility": _scale(_at(hourly, "visibility", hour), 0.001),
+            "uvindex": _at(hourly, "uv_index", hour),
+            "cloudcover": current.get("cloud_cover"),
+        }
+        return self.__dated(data, payload)
+
+    def __daily_weather_view(
+        self, forecast: Optional[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> dict:
+        """Extract daily weather data of today from a forecast. Daily means are
+        computed from the hours of today"""
+        if forecast is None:
+            return {}
+        _, payload = forecast
+        daily = payload["daily"]
+        if not daily.get("time"):
+            return {}
+        hourly = payload["hourly"]
+        hours = range(min(24, len(hourly["time"])))
+        code = _at(daily, "weather_code", 0)
+        tempmin = _at(daily, "temperature_2m_min", 0)
+        tempmax = _at(daily, "temperature_2m_max", 0)
+        data = {
+            "timezone": payload.get("timezone"),
+            "conditions": _condition(code),
+            "temp": _mean([tempmin, tempmax]),
+            "tempmin": tempmin,
+            "tempmax": tempmax,
+            "preciptype": _preciptype(code),
+            "precipprob": _at(daily, "precipitation_probability_max", 0),
+            "precip": _at(daily, "precipitation_sum", 0),
+            "snowdepth": _scale(_at(hourly, "snow_depth", 0), 100),
+            "snow": _at(daily, "snowfall_sum", 0),
+            "windspeed": _at(daily, "wind_speed_10m_max", 0),
+            "winddir": _at(daily, "wind_direction_10m_dominant", 0),
+            "windgust": _at(daily, "wind_gusts_10m_max", 0),
+            "humidity": _mean([_at(hourly, "relative_humidity_2m", i) for i in hours]),
+            "pressure": _mean([_at(hourly, "pressure_msl", i) for i in hours]),
+            "uvindex": _at(daily, "uv_index_max", 0),
+            "sunrise": _time(_at(daily, "sunrise", 0)),
+            "sunset": _time(_at(daily, "sunset", 0)),
+        }
+        return self.__dated(data, payload)
+
+    @staticmethod
+    def __dated(data: dict, payload: Dict[str, Any]) -> dict:
+        """Add to extracted data the reception date of the forecast, under the
+        `as_of` key"""
+        if payload.get("as_of") is not None:
+            data["as_of"] = payload["as_of"]
+        return data
+
+
+def _at(series: Dict[str, List[Any]], variable: str, idx: int) -> Any:
+    """Return the value of a variable at an index of hourly or daily series, or
+    None if it is missing"""
+    values = series.get(variable) or []
+    return values[idx] if 0 <= idx < len(values) else None
+
+
+def _hour_index(times: List[str], current_time: str) -> int:
+    """Return the index of the hour of `current_time` in hourly times"""
+    try:
+        return times.index(f"{current_time[:13]}:00")
+    except ValueError:
+        return 0
+
+
+def _condition(code: Optional[int]) -> str:
+    """Return the Visual Crossing condition type of a WMO weather code"""
+    return WMO_CONDITIONS.get(code, "type_29")
+
+
+def _preciptype(code: Optional[int]) -> Optional[List[str]]:
+    """Return the precipitation types of a WMO weather code, or None if there is
+    no precipitation"""
+    if code is None or code < 51:
+        return None
+    if code in SNOW_CODES:
+        return ["snow"]
+    if code in HAIL_CODES:
+        return ["ice"]
+    return ["rain"]
+
+
+def _scale(value: Optional[float], factor: float) -> Optional[float]:
+    """Convert a value, unless it is missing"""
+    return round(value * factor, 2) if value is not None else None
+
+
+def _mean(values: List[Optional[float]]) -> Optional[float]:
+    """Return the mean of the known values, or None if there is none"""
+    known = [value for value in values if value is not None]
+    return round(sum(known) / len(known), 1) if known else None
+
+
+def _time(iso_datetime: Optional[str]) -> Optional[str]:
+    """Convert an ISO 8601 local date and time into a `HH:MM:SS` string"""
+    if not iso_datetime or "T" not in iso_datetime:
+        return None
+    return f"{iso_datetime.split('T')[1][:5]}:00"
+
+
+def _address(place: Dict[str, Any]) -> str:
+    """Return the displayed address of a place"""
+    return ", ".join(
+        part for part in (place.get("name"), place.get("country")) if part
+    )
@@ -0,0 +1,523 @@
+"""Weather provider router
+
+`WeatherRouter` serves weather data from several providers behind the interface
+of a single one. The latency and outcome of the latest calls to each provider
+are kept by a `ProviderHealth`: rolling median and 95th percentile of the
+latency, and error rate. Calls are routed to the best provider:
+    - healthy providers first, whose error rate and 95th percentile latency are
+      below the limits of the router
+    - among them, the providers whose latency is close to the fastest one, and
+      the providers with too few recent calls to know their latency, in the
+      order in which providers were given
+    - then the slower healthy providers, the fastest first
+    - then unhealthy providers, as a last resort
+A healthy provider preferred to the first one, but slower than it, is tried
+first once in a while, so it can get back to the first place when it is fast
+again.
+When a provider fails, times out or returns incomplete data, the call fails
+over to the next provider. A provider which does not know the location is also
+skipped, but this is not recorded as a failure, so user typos do not make it
+unhealthy. Data are normalized to the schema of
+`sunbot.apis.weather.schema`, with the name of the provider which served them.
+
+Calls are only recorded for a limited time, so an unhealthy provider is tried
+again first once its failures are forgotten.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from sunbot.apis.weather.mixin import (
+    BATCH_MAX_CONCURRENCY,
+    LocationResult,
+    UnknownLocationError,
+    WeatherProvider,
+)
+from sunbot.apis.weather.schema import normalize
+from sunbot.core import Priority
+
+# Number of latest calls kept per provider, and time during which they are kept:
+HEALTH_WINDOW = 50
+HEALTH_MAX_AGE = 5 * 60
+# Default limits of healthy providers: error rate, and 95th percentile latency
+# in seconds. The error rate is only considered after a few calls:
+DEFAULT_MAX_ERROR_RATE = 0.5
+DEFAULT_MAX_LATENCY = 3.0
+MIN_CALLS = 3
+# Default difference of latency under which providers are considered as fast as
+# the fastest one, in seconds:
+DEFAULT_LATENCY_TOLERANCE = 0.25
+# Default time after which an interactive call fails over to the next provider:
+DEFAULT_TIMEOUT = 8.0
+# Default time after which a preferred provider slower than the first one is
+# tried first again, in seconds:
+DEFAULT_PROBE_INTERVAL = 60.0
+
+
+class ProviderHealth:
+    """Latency and outcome of the latest calls to a provider
+
+    Parameters
+    ----------
+    window : int, optional
+        number of latest calls kept. Default to `HEALTH_WINDOW`
+    max_age : float, optional
+        time during which calls are kept, in seconds. Default to `HEALTH_MAX_AGE`
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.monotonic`
+    """
+
+    def __init__(
+        self,
+        window: int = HEALTH_WINDOW,
+        max_age: float = HEALTH_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_age = max_age
+        self.clock = clock
+        # Date, latency and success of the latest calls:
+        self.__calls: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+        self.last_call = -math.inf
+        self.served = 0
+        self.failures = 0
+
+    def record(self, latency: float, success: bool) -> None:
+        """Record a call
+
+        Parameters
+        ----------
+        latency : float
+            duration of the call, in seconds
+        success : bool
+            `True` if the provider returned complete data
+        """
+        self.last_call = self.clock()
+        self.__calls.append((self.last_call, latency, success))
+        if success:
+            self.served += 1
+        else:
+            self.failures += 1
+
+    @property
+    def nb_calls(self) -> int:
+        """Number of recent calls"""
+        return len(self.__recent())
+
+    @property
+    def error_rate(self) -> float:
+        """Ratio of failed calls among recent calls"""
+        calls = self.__recent()
+        if not calls:
+            return 0.0
+        return sum(1 for _, _, success in calls if not success) / len(calls)
+
+    def latency(self, ratio: float) -> float:
+        """Return the specified percentile (nearest rank) of the latency of
+        recent calls, in seconds, or 0 if there is no recent call"""
+        latencies = sorted(latency for _, latency, _ in self.__recent())
+        if not latencies:
+            return 0.0
+        return latencies[max(1, math.ceil(ratio * len(latencies))) - 1]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return health counters
+
+        Returns
+        -------
+        Dict[str, Any]
+            number of recent calls, their median and 95th percentile latency in
+            seconds and error rate, and number of calls served and failed since
+            the start
+        """
+        return {
+            "calls": self.nb_calls,
+            "p50_latency": self.latency(0.5),
+            "p95_latency": self.latency(0.95),
+            "error_rate": self.error_rate,
+            "served": self.served,
+            "failures": self.failures,
+        }
+
+    def __recent(self) -> List[Tuple[float, float, bool]]:
+        """Return the calls recorded less than `max_age` seconds ago"""
+        deadline = self.clock() - self.max_age
+        while self.__calls and self.__calls[0][0] < deadline:
+            self.__calls.popleft()
+        return list(self.__calls)
+
+
+class WeatherRouter(WeatherProvider):
+    """Weather provider routing each call to the best of several providers, and
+    failing over to the next ones
+
+    Parameters
+    ----------
+    providers : Sequence[WeatherProvider]
+        weather providers, in order of preference. Their names must be unique
+    timeout : float, optional
+        time after which an asynchronous call fails over to the next provider,
+        in seconds. The request of the abandoned provider still completes in
+        the background, so its response is cached. Default to `DEFAULT_TIMEOUT`
+    max_error_rate : float, optional
+        error rate above which a provider is unhealthy. Default to
+        `DEFAULT_MAX_ERROR_RATE`
+    max_latency : float, optional
+        95th percentile latency above which a provider is unhealthy, in seconds.
+        Default to `DEFAULT_MAX_LATENCY`
+    latency_tolerance : float, optional
+        difference of 95th percentile latency under which healthy providers are
+        as fast as the fastest one, in seconds. Default to
+        `DEFAULT_LATENCY_TOLERANCE`
+    probe_interval : float, optional
+        time after which a healthy provider preferred to the first one, but
+        slower than it, is tried first again, in seconds. Default to
+        `DEFAULT_PROBE_INTERVAL`
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.monotonic`
+
+    Raises
+    ------
+    ValueError
+        if no provider is given, or if two providers have the same name
+    """
+
+    name = "router"
+
+    def __init__(
+        self,
+        providers: Sequence[WeatherProvider],
+        timeout: float = DEFAULT_TIMEOUT,
+        max_error_rate: float = DEFAULT_MAX_ERROR_RATE,
+        max_latency: float = DEFAULT_MAX_LATENCY,
+        latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not providers:
+            raise ValueError("At least one weather provider is needed")
+        names = [provider.name for provider in providers]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Weather providers must have unique names: {names}")
+        self.providers = list(providers)
+        self.timeout = timeout
+        self.max_error_rate = max_error_rate
+        self.max_latency = max_latency
+        self.latency_tolerance = latency_tolerance
+        self.probe_interval = probe_interval
+        self.clock = clock
+        self.health: Dict[str, ProviderHealth] = {
+            name: ProviderHealth(clock=clock) for name in names
+        }
+        # Calls for a location unknown to a provider:
+        self.unknown_locations = 0
+        # Calls served by another provider than the best one, and calls routed
+        # first to a provider slower than the best one to measure it again:
+        self.failovers = 0
+        self.probes = 0
+        # Requests abandoned after a timeout, still running in the background:
+        self.__abandoned: Set[asyncio.Future] = set()
+
+    def ranked(self) -> List[WeatherProvider]:
+        """Return the providers in the order in which they are tried. The latency
+        of providers with less than `MIN_CALLS` recent calls is unknown: they are
+        ranked in the order of preference, and do not make the other providers
+        look slow"""
+        healthy = [provider for provider in self.providers if self.is_healthy(provider)]
+        fastest = min(
+            (
+                self.health[provider.name].latency(0.95)
+                for provider in healthy
+                if self.health[provider.name].nb_calls >= MIN_CALLS
+            ),
+            default=math.inf,
+        )
+
+        def rank(provider: WeatherProvider) -> Tuple[int, float, int]:
+            position = self.providers.index(provider)
+            if provider not in healthy:
+                return (2, 0.0, position)
+            health = self.health[provider.name]
+            if health.nb_calls < MIN_CALLS:
+                return (0, 0.0, position)
+            p95_latency = health.latency(0.95)
+            if p95_latency <= fastest + self.latency_tolerance:
+                return (0, 0.0, position)
+            return (1, p95_latency, position)
+
+        return sorted(self.providers, key=rank)
+
+    def route(self) -> List[WeatherProvider]:
+        """Return the providers in the order in which a call tries them: the
+        order of `ranked`, except that the most preferred healthy provider ranked
+        after the first one, and not called for `probe_interval` seconds, is
+        tried first"""
+        providers = self.ranked()
+        first = self.providers.index(providers[0])
+        for provider in self.providers[:first]:
+            health = self.health[provider.name]
+            if (
+                self.is_healthy(provider)
+                and self.clock() - health.last_call >= self.probe_interval
+            ):
+                logging.info("Probing the weather provider %s", provider.name)
+                self.probes += 1
+                providers.remove(provider)
+                return [provider, *providers]
+        return providers
+
+    def is_healthy(self, provider: WeatherProvider) -> bool:
+        """Return whether the error rate and the latency of recent calls to the
+        provider are below the limits of the router"""
+        health = self.health[provider.name]
+        if health.nb_calls >= MIN_CALLS and health.error_rate > self.max_error_rate:
+            return False
+        return health.latency(0.95) <= self.max_latency
+
+    def get_rain_data(
+        self,
+        location_name: str,
+        period: str = "aujourd'hui",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict:
+        return self.__call("rain", "get_rain_data", location_name, period, priority)
+
+    async def aget_rain_data(
+        self,
+        location_name: str,
+        period: str = "aujourd'hui",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict:
+        return await self.__acall(
+            "rain", "aget_rain_data", location_name, period, priority
+        )
+
+    def get_current_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        return self.__call(
+            "current", "get_current_weather_data", location_name, priority
+        )
+
+    async def aget_current_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        return await self.__acall(
+            "current", "aget_current_weather_data", location_name, priority
+        )
+
+    def get_daily_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        return self.__call("daily", "get_daily_weather_data", location_name, priority)
+
+    async def aget_daily_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        return await self.__acall(
+            "daily", "aget_daily_weather_data", location_name, priority
+        )
+
+    def get_daily_weather_data_many(
+        self,
+        location_names: Iterable[str],
+        priority: Priority = Priority.DAILY,
+    ) -> Dict[str, LocationResult]:
+        """Get daily weather data for several locations with the batch method of
+        the best provider. Locations it could not retrieve are requested to the
+        next providers. Batches are not recorded in the health of providers, as
+        their latency depends on the number of locations"""
+        location_names = list(dict.fromkeys(location_names))
+        results: Dict[str, LocationResult] = {}
+        for provider in self.route():
+            missing = [name for name in location_names if name not in results]
+            if not missing:
+                break
+            try:
+                batch = provider.get_daily_weather_data_many(missing, priority)
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Daily weather batch failed on %s", provider.name)
+                continue
+            results.update(self.__normalize_batch(provider, missing, batch))
+        return self.__batch_results(location_names, results)
+
+    async def aget_daily_weather_data_many(
+        self,
+        location_names: Iterable[str],
+        priority: Priority = Priority.DAILY,
+        max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    ) -> Dict[str, LocationResult]:
+        """Asynchronous version of `get_daily_weather_data_many`"""
+        location_names = list(dict.fromkeys(location_names))
+        results: Dict[str, LocationResult] = {}
+        for provider in self.route():
+            missing = [name for name in location_names if name not in results]
+            if not missing:
+                break
+            try:
+                batch = await provider.aget_daily_weather_data_many(
+                    missing, priority, max_concurrency
+                )
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Daily weather batch failed on %s", provider.name)
+                continue
+            results.update(self.__normalize_batch(provider, missing, batch))
+        return self.__batch_results(location_names, results)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return router counters
+
+        Returns
+        -------
+        Dict[str, Any]
+            health counters of each provider, with whether it is healthy, in the
+            order in which providers are tried, and number of failovers, probes
+            and calls for unknown locations
+        """
+        return {
+            "providers": {
+                provider.name: {
+                    **self.health[provider.name].stats(),
+                    "healthy": self.is_healthy(provider),
+                }
+                for provider in self.ranked()
+            },
+            "failovers": self.failovers,
+            "probes": self.probes,
+            "unknown_locations": self.unknown_locations,
+        }
+
+    async def close(self) -> None:
+        """Cancel abandoned requests and close the providers"""
+        for task in list(self.__abandoned):
+            task.cancel()
+        for provider in self.providers:
+            close = getattr(provider, "close", None)
+            if close is not None:
+                await close()
+
+    def __call(self, kind: str, getter: str, location_name: str, *args: Any) -> dict:
+        """Call a getter of the providers in turn until one of them returns
+        complete data"""
+        providers = self.route()
+        for provider in providers:
+            start = self.clock()
+            try:
+                data = getattr(provider, getter)(location_name, *args)
+            except UnknownLocationError:
+                self.__unknown(provider, location_name)
+                continue
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("%s failed on %s", getter, provider.name)
+                data = {}
+            data = self.__record(provider, kind, data, start)
+            if data:
+                if provider is not providers[0]:
+                    self.failovers += 1
+                return data
+        logging.error("No weather provider could serve %s for %s", kind, location_name)
+        return {}
+
+    async def __acall(
+        self, kind: str, getter: str, location_name: str, *args: Any
+    ) -> dict:
+        """Asynchronous version of `__call`. A provider which does not answer
+        within `timeout` seconds is abandoned"""
+        providers = self.route()
+        for provider in providers:
+            start = self.clock()
+            task = asyncio.ensure_future(
+                getattr(provider, getter)(location_name, *args)
+            )
+            try:
+                # The task is shielded so its response is still cached on timeout:
+                data = await asyncio.wait_for(asyncio.shield(task), self.timeout)
+            except asyncio.TimeoutError:
+                logging.warning(
+                    "%s timed out on %s after %.1f s",
+                    getter,
+                    provider.name,
+                    self.timeout,
+                )
+                self.__abandon(task)
+                data = {}
+            except UnknownLocationError:
+                self.__unknown(provider, location_name)
+                continue
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("%s failed on %s", getter, provider.name)
+                data = {}
+            data = self.__record(provider, kind, data, start)
+            if data:
+                if provider is not providers[0]:
+                    self.failovers += 1
+                return data
+        logging.error("No weather provider could serve %s for %s", kind, location_name)
+        return {}
+
+    def __record(
+        self, provider: WeatherProvider, kind: str, data: dict, start: float
+    ) -> dict:
+        """Normalize data returned by a provider and record the call"""
+        data = normalize(kind, data, provider.name)
+        self.health[provider.name].record(self.clock() - start, bool(data))
+        return data
+
+    def __unknown(self, provider: WeatherProvider, location_name: str) -> None:
+        """Count a call for a location unknown to the provider. The provider
+        answered properly, so the call is not recorded in its health"""
+        logging.info("%s does not know the location %s", provider.name, location_name)
+        self.unknown_locations += 1
+
+    def __abandon(self, task: asyncio.Future) -> None:
+        """Keep a reference to an abandoned request until it completes"""
+        self.__abandoned.add(task)
+
+        def done(task: asyncio.Future) -> None:
+            self.__abandoned.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logging.warning(
+                    "Abandoned weather request failed: %r", task.exception()
+                )
+
+        task.add_done_callback(done)
+
+    @staticmethod
+    def __normalize_batch(
+        provider: WeatherProvider,
+        location_names: List[str],
+        batch: Dict[str, LocationResult],
+    ) -> Dict[str, LocationResult]:
+        """Return the results of a batch whose data are complete, normalized"""
+        results = {}
+        for name in location_names:
+            result = batch.get(name)
+            data = normalize("daily", result.data if result else {}, provider.name)
+            if data:
+                results[name] = LocationResult(data)
+        return results
+
+    @staticmethod
+    def __batch_results(
+        location_names: List[str], results: Dict[str, LocationResult]
+    ) -> Dict[str, LocationResult]:
+        """Return the result of each location, in order, with an error for the
+        locations that no provider could retrieve"""
+        return {
+            name: results.get(name)
+            or LocationResult(error="No weather provider could retrieve data")
+            for name in location_names
+        }
@@ -0,0 +1,165 @@
+"""Weather data schema
+
+Every weather provider returns its data with the fields below, which are the
+ones read to build the weather images and embeds. The fields and units are the
+ones of Visual Crossing, the first provider of the bot: temperatures in °C,
+wind speeds in km/h, pressures in hPa, precipitations in mm, snow in cm,
+visibility in km, times as `HH:MM:SS` strings, and conditions as Visual
+Crossing condition types (`type_1` to `type_43`). Fields can be None when a
+provider does not know their value, except the ones of `REQUIRED_FIELDS`,
+without which the weather images can not be drawn.
+
+Data of each kind can also contain:
+    - `as_of`: date at which the data were received from the provider, as
+      returned by `time.time`
+    - `provider`: name of the provider, added by `normalize`
+"""
+
+import logging
+from typing import Any, Dict, Mapping, Tuple
+
+CURRENT_WEATHER_FIELDS: Tuple[str, ...] = (
+    "conditions",
+    "temp",
+    "feelslike",
+    "preciptype",
+    "preciprob",
+    "precip",
+    "snowdepth",
+    "snow",
+    "windspeed",
+    "winddir",
+    "windgust",
+    "humidity",
+    "pressure",
+    "visibility",
+    "uvindex",
+    "cloudcover",
+)
+
+DAILY_WEATHER_FIELDS: Tuple[str, ...] = (
+    "timezone",
+    "conditions",
+    "temp",
+    "tempmin",
+    "tempmax",
+    "preciptype",
+    "precipprob",
+    "precip",
+    "snowdepth",
+    "snow",
+    "windspeed",
+    "winddir",
+    "windgust",
+    "humidity",
+    "pressure",
+    "uvindex",
+    "sunrise",
+    "sunset",
+)
+
+# Rain data hold the forecast of each hour of the requested day:
+RAIN_HOUR_FIELDS: Tuple[str, ...] = ("datetime", "preciptype", "precipprob", "precip")
+RAIN_FIELDS: Tuple[str, ...] = tuple(
+    f"days/0/hours/{hour}/{field}" for field in RAIN_HOUR_FIELDS for hour in range(24)
+) + ("address",)
+
+# Fields which must not be None, as weather images are drawn from them:
+REQUIRED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "current": (
+        "conditions",
+        "temp",
+        "feelslike",
+        "precip",
+        "winddir",
+        "humidity",
+        "pressure",
+        "visibility",
+        "uvindex",
+        "cloudcover",
+    ),
+    "daily": (
+        "conditions",
+        "temp",
+        "tempmin",
+        "tempmax",
+        "precip",
+        "windspeed",
+        "winddir",
+        "humidity",
+        "pressure",
+        "uvindex",
+        "sunrise",
+        "sunset",
+    ),
+    "rain": (),
+}
+
+SCHEMAS: Dict[str, Tuple[str, ...]] = {
+    "current": CURRENT_WEATHER_FIELDS,
+    "daily": DAILY_WEATHER_FIELDS,
+    "rain": RAIN_FIELDS,
+}
+
+# Fields kept in addition to the ones of the schema, such as the timezone in which
+# the date of the data is displayed:
+META_FIELDS: Tuple[str, ...] = ("as_of", "timezone")
+
+
+def normalize(kind: str, data: Mapping[str, Any], provider: str) -> Dict[str, Any]:
+    """Return data of a provider restricted to the fields of the schema of their
+    kind, with the name of the provider under the `provider` key. Incomplete
+    data can not be displayed, so they are rejected
+
+    Parameters
+    ----------
+    kind : str
+        kind of data: `current`, `daily` or `rain`
+    data : Mapping[str, Any]
+        data returned by a getter of the provider
+    provider : str
+        name of the provider
+
+    Returns
+    -------
+    Dict[str, Any]
+        normalized data, or an empty dict if `data` is empty, misses fields of
+        the schema or has required fields set to None
+
+    Raises
+    ------
+    ValueError
+        if `kind` is not a known kind of data
+    """
+    try:
+        fields = SCHEMAS[kind]
+    except KeyError as err:
+        raise ValueError(f"Unknown kind of weather data: {kind}") from err
+    if not data:
+        return {}
+    missing = [field for field in fields if field not in data]
+    if missing:
+        logging.warning(
+            "%s data of %s miss %d fields, such as %s",
+            kind,
+            provider,
+            len(missing),
+            missing[0],
+        )
+        return {}
+    unknown = [field for field in REQUIRED_FIELDS[kind] if data[field] is None]
+    if unknown:
+        logging.warning(
+            "%s data of %s have no value for %d required fields, such as %s",
+            kind,
+            provider,
+            len(unknown),
+            unknown[0],
+        )
+        return {}
+    normalized = {field: data[field] for field in fields}
+    for field in META_FIELDS:
+        if data.get(field) is not None:
+            normalized[field] = data[field]
+    normalized["provider"] = provider
+    return normalized
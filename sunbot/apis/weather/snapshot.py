@@ -0,0 +1,116 @@
+"""Forecast snapshot module
+
+A `ForecastSnapshot` holds the current conditions and the forecast of a
+location for several days, hours included, as returned by a single timeline
+request. The current weather, daily weather and rain views are derived locally
+from it: each view is a response with the same structure as the response of a
+dedicated request, so the usual targets apply to it.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import pytz
+
+from sunbot.core import APIResponse
+
+
+class ForecastSnapshot:
+    """Forecast of a location, from which every weather view is derived. Views
+    share the decoded payload of the snapshot, nothing is copied
+
+    Parameters
+    ----------
+    payload : Dict[str, Any]
+        decoded timeline response, with current conditions, days and hours
+    fetched_at : float, optional
+        date of reception of the timeline response, as returned by `time.time`.
+        Default to now
+    """
+
+    __slots__ = ["payload", "fetched_at"]
+
+    def __init__(self, payload: Dict[str, Any], fetched_at: Optional[float] = None):
+        self.payload = payload
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @classmethod
+    def from_response(cls, response: APIResponse) -> Optional["ForecastSnapshot"]:
+        """Build a snapshot from a timeline response, or return None if the
+        request failed. The snapshot is dated from the reception of the response,
+        which may have been cached"""
+        if not response.ok:
+            return None
+        return cls(response.json(), getattr(response, "received_at", None))
+
+    @property
+    def nb_days(self) -> int:
+        """Number of forecast days in the snapshot"""
+        return len(self.payload.get("days", []))
+
+    @property
+    def age(self) -> float:
+        """Time elapsed since the reception of the snapshot, in seconds"""
+        return time.time() - self.fetched_at
+
+    def fetched_today(self) -> bool:
+        """Return whether the snapshot was received on the current day of the
+        location, so its first day is still today. The timezone of the location
+        is given by the snapshot, UTC is used if it is unknown"""
+        try:
+            location_tz = pytz.timezone(self.payload.get("timezone", "UTC"))
+        except pytz.UnknownTimeZoneError:
+            logging.warning("Unknown timezone in %r", self)
+            location_tz = pytz.utc
+        fetched_date = datetime.fromtimestamp(self.fetched_at, location_tz).date()
+        return fetched_date == datetime.now(location_tz).date()
+
+    def current(self) -> APIResponse:
+        """Return the view of the current conditions, like a timeline response
+        including `current` only"""
+        return self.__view(currentConditions=self.payload.get("currentConditions"))
+
+    def day(self, day_idx: int = 0, with_hours: bool = False) -> APIResponse:
+        """Return the view of a forecast day, like a timeline response for this
+        single day
+
+        Parameters
+        ----------
+        day_idx : int, optional
+            index of the day in the snapshot, 0 being today. Default to 0
+        with_hours : bool, optional
+            include hours of the day, as with `include=hours`. Default to False
+
+        Returns
+        -------
+        APIResponse
+            view of the day, whose only day is at index 0
+
+        Raises
+        ------
+        IndexError
+            if the snapshot does not contain the day
+        """
+        day = self.payload["days"][day_idx]
+        if not with_hours and "hours" in day:
+            day = {key: value for key, value in day.items() if key != "hours"}
+        return self.__view(days=[day])
+
+    def __view(self, **records: Any) -> APIResponse:
+        """Return a response with the top-level fields of the snapshot and the
+        specified records"""
+        payload = {
+            key: value
+            for key, value in self.payload.items()
+            if key not in ("days", "currentConditions")
+        }
+        payload.update(records)
+        return APIResponse.from_json(payload)
+
+    def __repr__(self) -> str:
+        return (
+            f"ForecastSnapshot({self.payload.get('address')!r}, "
+            f"{self.nb_days} days, fetched_at={self.fetched_at:.0f})"
+        )
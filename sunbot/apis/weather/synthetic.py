@@ -0,0 +1,312 @@
+"""Synthetic weather payloads
+
+Timeline payloads of Visual Crossing generated here follow the structure of real
+responses, for any number of days. They are served by `SyntheticTimelines`, the
+payload factory of a `SyntheticTransport`, so the weather stack can be run and
+benchmarked without network nor API key, and by the stub server of the
+benchmark scripts. `SyntheticForecasts` serves geocoding and forecast payloads
+of Open-Meteo the same way.
+"""
+
+import random
+import zlib
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Random generator used when none is given:
+_RANDOM = random.Random()
+
+CONDITIONS = ["type_2", "type_21", "type_41", "type_42", "type_43"]
+# WMO weather codes of Open-Meteo payloads:
+WMO_CODES = [0, 2, 3, 53, 61, 63]
+
+
+def synthetic_place(location: str) -> Dict[str, Any]:
+    """Return the place of a location name: its name, and coordinates derived
+    from the name, so spellings of the same place get the same coordinates, like
+    with the geocoding of web APIs"""
+    place = " ".join(location.split(",")[0].split()).title()
+    place_hash = zlib.crc32(place.casefold().encode())
+    return {
+        "name": place,
+        "latitude": round(42.0 + place_hash % 5000 / 1000, 4),
+        "longitude": round(-1.0 + place_hash // 5000 % 8000 / 1000, 4),
+    }
+
+
+def synthetic_day(
+    day_idx: int, with_hours: bool = True, rng: random.Random = _RANDOM
+) -> Dict[str, Any]:
+    """Return a synthetic day, with 24 hours of data if `with_hours` is set.
+    Conditions are drawn with `rng`"""
+    day = {
+        "datetime": f"2024-01-{day_idx + 1:02d}",
+        "datetimeEpoch": 1704067200 + 86400 * day_idx,
+        "tempmax": 12.4,
+        "tempmin": 3.1,
+        "temp": 7.8,
+        "feelslikemax": 11.0,
+        "feelslikemin": 1.2,
+        "feelslike": 6.3,
+        "dew": 4.1,
+        "humidity": 81.2,
+        "precip": 1.3,
+        "precipprob": 64.5,
+        "precipcover": 20.8,
+        "preciptype": ["rain"],
+        "snow": 0.0,
+        "snowdepth": 0.0,
+        "windgust": 38.2,
+        "windspeed": 18.4,
+        "winddir": 231.0,
+        "pressure": 1012.3,
+        "cloudcover": 78.1,
+        "visibility": 18.2,
+        "solarradiation": 48.2,
+        "solarenergy": 4.1,
+        "uvindex": 2.0,
+        "severerisk": 10.0,
+        "sunrise": "08:22:14",
+        "sunriseEpoch": 1704093734,
+        "sunset": "17:21:54",
+        "sunsetEpoch": 1704126114,
+        "moonphase": 0.68,
+        "conditions": rng.choice(CONDITIONS),
+        "description": "Ciel se couvrant en cours de journée avec pluie.",
+        "icon": "rain",
+        "stations": ["LFBO", "07630099999"],
+        "source": "comb",
+    }
+    if with_hours:
+        day["hours"] = [
+            {
+                "datetime": f"{hour:02d}:00:00",
+                "datetimeEpoch": day["datetimeEpoch"] + 3600 * hour,
+                "temp": 5.0 + hour / 4,
+                "feelslike": 3.0 + hour / 4,
+                "humidity": 80.0,
+                "dew": 4.0,
+                "precip": 0.3 if hour % 5 == 0 else 0.0,
+                "precipprob": 60.0 if hour % 5 == 0 else 0.0,
+                "snow": 0.0,
+                "snowdepth": 0.0,
+                "preciptype": ["rain"] if hour % 5 == 0 else None,
+                "windgust": 30.2,
+                "windspeed": 15.1,
+                "winddir": 220.0,
+                "pressure": 1012.0,
+                "visibility": 20.0,
+                "cloudcover": 75.0,
+                "solarradiation": 0.0,
+                "solarenergy": 0.0,
+                "uvindex": 0.0,
+                "severerisk": 10.0,
+                "conditions": rng.choice(CONDITIONS),
+                "icon": "rain",
+                "stations": ["LFBO"],
+                "source": "fcst",
+            }
+            for hour in range(24)
+        ]
+    return day
+
+
+def project(record: Dict[str, Any], elements: Optional[List[str]]) -> Dict[str, Any]:
+    """Keep only the specified elements of a day, hour or current conditions
+    record, like the `elements` parameter of the timeline API. Nested hours are
+    kept, they are projected separately"""
+    if elements is None:
+        return record
+    return {
+        key: value
+        for key, value in record.items()
+        if key in elements or key == "hours"
+    }
+
+
+def synthetic_timeline(
+    location: str,
+    nb_days: int = 1,
+    include: str = "days,hours,current",
+    elements: Optional[List[str]] = None,
+    rng: random.Random = _RANDOM,
+) -> Dict[str, Any]:
+    """Return a synthetic timeline payload for the specified location. Records
+    are restricted to `elements` if specified, conditions are drawn with `rng`"""
+    place = synthetic_place(location)
+    payload = {
+        "queryCost": nb_days * 24,
+        "latitude": place["latitude"],
+        "longitude": place["longitude"],
+        "resolvedAddress": f"{place['name']}, France",
+        "address": location,
+        "timezone": "Europe/Paris",
+        "tzoffset": 1.0,
+        "description": "Similar temperatures continuing with a chance of rain.",
+    }
+    if "days" in include or "hours" in include:
+        payload["days"] = [
+            project(synthetic_day(i, "hours" in include, rng), elements)
+            for i in range(nb_days)
+        ]
+        for day in payload["days"]:
+            if "hours" in day:
+                day["hours"] = [project(hour, elements) for hour in day["hours"]]
+    payload["alerts"] = []
+    payload["stations"] = {
+        "LFBO": {
+            "distance": 1200.0,
+            "latitude": 43.63,
+            "longitude": 1.37,
+            "useCount": 0,
+            "id": "LFBO",
+            "name": "LFBO",
+            "quality": 100,
+            "contribution": 0.0,
+        }
+    }
+    if "current" in include:
+        current = synthetic_day(0, with_hours=False, rng=rng)
+        current["datetime"] = "12:00:00"
+        payload["currentConditions"] = project(current, elements)
+    return payload
+
+
+class SyntheticTimelines:
+    """Payload factory imitating the timeline API of Visual Crossing, for
+    `SyntheticTransport`. Single and multi-location timeline requests are
+    answered, with their `include` and `elements` parameters applied
+
+    Parameters
+    ----------
+    nb_days : int, optional
+        minimum number of days of each timeline. Default to 1
+    seed : int, optional
+        seed of the random generator drawing conditions, for reproducible
+        payloads
+    """
+
+    def __init__(self, nb_days: int = 1, seed: Optional[int] = None) -> None:
+        self.nb_days = nb_days
+        self.rng = random.Random(seed)
+
+    def __call__(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        """Return the payload answering the request, or None if the request is
+        not a timeline request"""
+        parts = urlsplit(url)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        include = query.get("include", "days,hours,current")
+        elements = query["elements"].split(",") if "elements" in query else None
+        path = [unquote(part) for part in parts.path.split("/") if part]
+        if "timelinemulti" in path:
+            locations = query.get("locations", "").split("|")
+            return {
+                "queryCost": len(locations) * self.nb_days,
+                "locations": [
+                    synthetic_timeline(
+                        location, self.nb_days, include, elements, self.rng
+                    )
+                    for location in locations
+                ],
+            }
+        if "timeline" not in path or path.index("timeline") + 1 >= len(path):
+            return None
+        location, *period = path[path.index("timeline") + 1 :]
+        # A period made of a start and an end date covers several days:
+        nb_days = max(self.nb_days, len(period))
+        return synthetic_timeline(location, nb_days, include, elements, self.rng)
+
+
+def synthetic_forecast(
+    latitude: float, longitude: float, nb_days: int = 2, rng: random.Random = _RANDOM
+) -> Dict[str, Any]:
+    """Return a synthetic Open-Meteo forecast payload for the specified
+    coordinates, with current conditions and hourly and daily series. Weather
+    codes are drawn with `rng`"""
+    days = [f"2024-01-{day_idx + 1:02d}" for day_idx in range(nb_days)]
+    hours = [f"{day}T{hour:02d}:00" for day in days for hour in range(24)]
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "generationtime_ms": 0.5,
+        "utc_offset_seconds": 3600,
+        "timezone": "Europe/Paris",
+        "timezone_abbreviation": "CET",
+        "elevation": 146.0,
+        "current": {
+            "time": f"{days[0]}T12:00",
+            "interval": 900,
+            "temperature_2m": 7.6,
+            "apparent_temperature": 5.9,
+            "relative_humidity_2m": 82,
+            "precipitation": 0.4,
+            "snowfall": 0.0,
+            "weather_code": rng.choice(WMO_CODES),
+            "cloud_cover": 76,
+            "pressure_msl": 1012.4,
+            "wind_speed_10m": 17.9,
+            "wind_direction_10m": 228,
+            "wind_gusts_10m": 36.7,
+        },
+        "hourly": {
+            "time": hours,
+            "weather_code": [rng.choice(WMO_CODES) for _ in hours],
+            "precipitation_probability": [
+                60 if idx % 5 == 0 else 0 for idx in range(len(hours))
+            ],
+            "precipitation": [
+                0.3 if idx % 5 == 0 else 0.0 for idx in range(len(hours))
+            ],
+            "snow_depth": [0.0 for _ in hours],
+            "visibility": [20000.0 for _ in hours],
+            "uv_index": [0.0 if idx % 24 < 9 else 1.5 for idx in range(len(hours))],
+            "relative_humidity_2m": [80 for _ in hours],
+            "pressure_msl": [1012.0 for _ in hours],
+        },
+        "daily": {
+            "time": days,
+            "weather_code": [rng.choice(WMO_CODES) for _ in days],
+            "temperature_2m_max": [12.1 for _ in days],
+            "temperature_2m_min": [3.4 for _ in days],
+            "precipitation_sum": [1.4 for _ in days],
+            "precipitation_probability_max": [65 for _ in days],
+            "snowfall_sum": [0.0 for _ in days],
+            "wind_speed_10m_max": [19.2 for _ in days],
+            "wind_gusts_10m_max": [39.6 for _ in days],
+            "wind_direction_10m_dominant": [229 for _ in days],
+            "uv_index_max": [2.1 for _ in days],
+            "sunrise": [f"{day}T08:22" for day in days],
+            "sunset": [f"{day}T17:21" for day in days],
+        },
+    }
+
+
+class SyntheticForecasts:
+    """Payload factory imitating the geocoding and forecast APIs of Open-Meteo,
+    for `SyntheticTransport`. Every location name is resolved to a place
+
+    Parameters
+    ----------
+    seed : int, optional
+        seed of the random generator drawing weather codes, for reproducible
+        payloads
+    """
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.rng = random.Random(seed)
+
+    def __call__(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        """Return the payload answering the request, or None if the request is
+        neither a geocoding nor a forecast request"""
+        parts = urlsplit(url)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        if parts.path.endswith("/search"):
+            place = synthetic_place(unquote(query.get("name", "")))
+            place.update({"country": "France", "timezone": "Europe/Paris"})
+            return {"results": [place], "generationtime_ms": 0.4}
+        if parts.path.endswith("/forecast"):
+            nb_days = int(query.get("forecast_days", 2))
+            return synthetic_forecast(
+                float(query["latitude"]), float(query["longitude"]), nb_days, self.rng
+            )
+        return None
@@ -1,22 +1,222 @@
+import asyncio
+import logging
 import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
 
 from sunbot import sunbot
-from sunbot.apis.weather import WeatherAPIHandler
+from sunbot.apis.weather.mixin import (
+    BATCH_MAX_CONCURRENCY,
+    LocationResult,
+    UnknownLocationError,
+    WeatherAPIHandler,
+)
+from sunbot.apis.weather.snapshot import ForecastSnapshot
+from sunbot.core import AliasIndex, APIResponse, Priority
+from sunbot.core.projection import project_fields
+
+TIMELINE_PATH = "VisualCrossingWebServices/rest/services/timeline"
+MULTI_TIMELINE_PATH = "VisualCrossingWebServices/rest/services/timelinemulti"
+# Maximum number of locations sent in a multi-location request:
+MULTI_LOCATIONS_MAX = 20
+# Status codes of the responses to a location that the web API does not know:
+UNKNOWN_LOCATION_STATUSES = frozenset([400, 404])
+
+# Time to live of cached responses, in seconds. Snapshots are refreshed as often
+# as current weather must be:
+SNAPSHOT_TTL = 10 * 60
+DAILY_WEATHER_TTL = 3 * 60 * 60
+# Days covered by a snapshot, and index of each period in the snapshot:
+SNAPSHOT_PERIOD = "today/tomorrow"
+SNAPSHOT_DAY_INDEXES = {"today": 0, "tomorrow": 1}
+# Time after the expiration of a cached snapshot during which it is still served
+# for each kind of data, in seconds: while it is renewed in the background
+# (stale-while-revalidate), and when the web API fails (stale-if-error). Rain and
+# daily forecasts age slower than current conditions:
+MAX_STALE = {"current": 10 * 60, "rain": 60 * 60, "daily": 3 * 60 * 60}
+STALE_IF_ERROR = {"current": 2 * 60 * 60, "rain": 6 * 60 * 60, "daily": 12 * 60 * 60}
+
+RAIN_TARGETS = (
+    [f"days/0/hours/{i}/datetime" for i in range(24)]
+    + [f"days/0/hours/{i}/preciptype" for i in range(24)]
+    + [f"days/0/hours/{i}/precipprob" for i in range(24)]
+    + [f"days/0/hours/{i}/precip" for i in range(24)]
+    + ["address"]
+)
+
+CURRENT_WEATHER_TARGETS = {
+    "timezone": "timezone",
+    "currentConditions/conditions": "conditions",
+    "currentConditions/temp": "temp",
+    "currentConditions/feelslike": "feelslike",
+    "currentConditions/preciptype": "preciptype",
+    "currentConditions/precipprob": "preciprob",
+    "currentConditions/precip": "precip",
+    "currentConditions/snowdepth": "snowdepth",
+    "currentConditions/snow": "snow",
+    "currentConditions/windspeed": "windspeed",
+    "currentConditions/winddir": "winddir",
+    "currentConditions/windgust": "windgust",
+    "currentConditions/humidity": "humidity",
+    "currentConditions/pressure": "pressure",
+    "currentConditions/visibility": "visibility",
+    "currentConditions/uvindex": "uvindex",
+    "currentConditions/cloudcover": "cloudcover",
+}
+
+# Top-level fields of timeline responses. They are always returned, so they are
+# not part of the `elements` parameter:
+TIMELINE_TOP_LEVEL_FIELDS = frozenset(
+    [
+        "queryCost",
+        "latitude",
+        "longitude",
+        "resolvedAddress",
+        "address",
+        "timezone",
+        "tzoffset",
+        "description",
+    ]
+)
+
+DAILY_WEATHER_TARGETS = [
+    "timezone",
+    "conditions",
+    "temp",
+    "tempmin",
+    "tempmax",
+    "preciptype",
+    "precipprob",
+    "precip",
+    "snowdepth",
+    "snow",
+    "windspeed",
+    "winddir",
+    "windgust",
+    "humidity",
+    "pressure",
+    "uvindex",
+    "sunrise",
+    "sunset",
+]
+
+# Every view is derived from the snapshot, which must contain all their targets:
+SNAPSHOT_TARGETS = (
+    list(RAIN_TARGETS) + list(CURRENT_WEATHER_TARGETS) + DAILY_WEATHER_TARGETS
+)
 
 
 class VisualCrossingHandler(WeatherAPIHandler):
-    """Visual Crossing API Handler"""
 
-    def __init__(self) -> None:
-        self.domain_name = "weather.visualcrossing.com"
+    """Visual Crossing API Handler
+
+    Parameters
+    ----------
+    domain_name : str, optional
+        domain name of the web API. Default to `weather.visualcrossing.com`
+    projection : bool, optional
+        only request the elements read by each kind of data, which reduces the
+        size of the responses. Default to True
+    max_stale : Dict[str, float], optional
+        stale-while-revalidate window of some kinds of data (`current`, `rain`
+        or `daily`), in seconds, replacing the ones of `MAX_STALE`
+    stale_if_error : Dict[str, float], optional
+        stale-if-error window of some kinds of data, in seconds, replacing the
+        ones of `STALE_IF_ERROR`
+    aliases : AliasIndex, optional
+        index of location names. Names are replaced by the canonical name of
+        their location before requests, so the spellings of a location share
+        the same cached snapshot, and the index learns the places resolved by
+        the web API. Default to None, so names are only stripped
+    **kwargs
+        parameters of `APIHandler`
+    """
+
+    name = "VisualCrossing"
+
+    def __init__(
+        self,
+        domain_name: str = "weather.visualcrossing.com",
+        projection: bool = True,
+        max_stale: Optional[Dict[str, float]] = None,
+        stale_if_error: Optional[Dict[str, float]] = None,
+        aliases: Optional[AliasIndex] = None,
+        **kwargs,
+    ) -> None:
+        self.domain_name = domain_name
+        self.projection = projection
+        self.max_stale = {**MAX_STALE, **(max_stale or {})}
+        self.stale_if_error = {**STALE_IF_ERROR, **(stale_if_error or {})}
+        self.aliases = aliases
         super().__init__(
             domain_name=self.domain_name,
             auth_mode="token",
             accepted_formats=None,
+            auth_args={"key": os.environ["idVisualCrossing"]},
+            **kwargs,
         )
         self.token_key = os.environ["idVisualCrossing"]
 
-    def get_rain_data(self, location_name: str, period: str = "aujoud'hui") -> dict:
+    def get_snapshot(
+        self,
+        location_name: str,
+        priority: Priority = Priority.INTERACTIVE,
+        refresh: bool = False,
+        kind: Optional[str] = None,
+    ) -> Optional[ForecastSnapshot]:
+        """Get the forecast snapshot of the specified location: current conditions
+        and forecast of today and tomorrow, hours included. The snapshot is
+        cached for `SNAPSHOT_TTL` seconds, and every weather view of the location
+        is derived from it. If the request fails, the expired snapshot is served
+        during the stale-if-error window of `kind`, unless it was received on a
+        previous day of the location
+
+        Parameters
+        ----------
+        location_name : str
+            name of the location for which to retrieve the snapshot
+        priority : Priority, optional
+            priority class of the request. Default to `Priority.INTERACTIVE`
+        refresh : bool, optional
+            request a new snapshot even if the cached one is still valid.
+            Default to False
+        kind : str, optional
+            kind of data derived from the snapshot (`current`, `rain` or `daily`),
+            whose windows apply. Default to None, so no stale snapshot is served
+
+        Returns
+        -------
+        ForecastSnapshot | None
+            snapshot of the location, or None if the request failed
+        """
+        return self.__get_snapshot(location_name, priority, refresh, kind)[0]
+
+    async def aget_snapshot(
+        self,
+        location_name: str,
+        priority: Priority = Priority.INTERACTIVE,
+        refresh: bool = False,
+        kind: Optional[str] = None,
+    ) -> Optional[ForecastSnapshot]:
+        """Asynchronous version of `get_snapshot`. An expired snapshot is also
+        served at once during the stale-while-revalidate window of `kind`, while
+        a new one is requested in the background"""
+        snapshot, _ = await self.__aget_snapshot(location_name, priority, refresh, kind)
+        return snapshot
+
+    def snapshot_expires_in(self, location_name: str) -> Optional[float]:
+        """Return the time before the cached snapshot of the location expires, in
+        seconds, or None if no snapshot of the location is cached"""
+        query = self.__snapshot_query(self.__canonical(location_name))
+        return self.cache_expires_in(query["resource_path"], query["request_args"])
+
+    def get_rain_data(
+        self,
+        location_name: str,
+        period: str = "aujourd'hui",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict:
         """Get rain data for specified location and period
 
         Parameters
@@ -26,150 +226,384 @@ class VisualCrossingHandler(WeatherAPIHandler):
         period : str, optional
             period of the location for which to retrieve rain data. For now two periods are
             supported: `aujourd'hui` (today) and `demain` (tommorrow). Default to `aujourd'hui`
+        priority : Priority, optional
+            priority class of the request. Default to `Priority.INTERACTIVE`
 
         Returns
         -------
         dict
             rain data for specified location and period
-
-        Raises
-        ------
-        NotImplementedError
-            This method must be redefined by inheriting weather API handler
         """
-        response = self.request(
-            resource_path=f"VisualCrossingWebServices/rest/services/timeline/{location_name}/{sunbot.PERIODS[period]}",
-            request_args={
-                "unitGroup": "metric",
-                "elements": "datetime%2CdatetimeEpoch%2Cprecip%2Cprecipprob%2Cprecipcover%2Cpreciptype%2Csnow%2Csource",
-                "include": "hours%2Cdays",
-                "key": os.environ["idVisualCrossing"],
-                "contentType": "json",
-                "lang": "fr",
-            },
+        snapshot = self.__known_snapshot(
+            location_name, *self.__get_snapshot(location_name, priority, kind="rain")
         )
+        return self.__rain_view(snapshot, period)
 
-        if not response.ok:
-            return {}
-        data = self.get_data(
-            response=response,
-            targets=(
-                [f"days/0/hours/{i}/datetime" for i in range(24)]
-                + [f"days/0/hours/{i}/preciptype" for i in range(24)]
-                + [f"days/0/hours/{i}/precipprob" for i in range(24)]
-                + [f"days/0/hours/{i}/precip" for i in range(24)]
-                + ["address"]
-            ),
+    async def aget_rain_data(
+        self,
+        location_name: str,
+        period: str = "aujourd'hui",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict:
+        """Asynchronous version of `get_rain_data`"""
+        snapshot = self.__known_snapshot(
+            location_name,
+            *await self.__aget_snapshot(location_name, priority, kind="rain"),
         )
-        return data
+        return self.__rain_view(snapshot, period)
 
-    def get_current_weather_data(self, location_name: str) -> dict:
+    def get_current_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
         """Get current weather data for specified location
 
         Parameters
         ----------
         location_name : str
             name of the location for which to retrive current weather data
+        priority : Priority, optional
+            priority class of the request. Default to `Priority.INTERACTIVE`
 
         Returns
         -------
         dict
             current weather data for specified location
-
-        Raises
-        ------
-        NotImplementedError
-            This method must be redefined by inheriting weather API handler
         """
-        response = self.request(
-            resource_path=f"VisualCrossingWebServices/rest/services/timeline/{location_name}/today",
-            request_args={
-                "unitGroup": "metric",
-                "include": "current",
-                "key": os.environ["idVisualCrossing"],
-                "contentType": "json",
-                "lang": "id",
-            },
+        snapshot = self.__known_snapshot(
+            location_name, *self.__get_snapshot(location_name, priority, kind="current")
         )
+        return self.__current_weather_view(snapshot)
 
-        if not response.ok:
-            return {}
-        data = self.get_data(
-            response=response,
-            targets={
-                "currentConditions/conditions": "conditions",
-                "currentConditions/temp": "temp",
-                "currentConditions/feelslike": "feelslike",
-                "currentConditions/preciptype": "preciptype",
-                "currentConditions/precipprob": "preciprob",
-                "currentConditions/precip": "precip",
-                "currentConditions/snowdepth": "snowdepth",
-                "currentConditions/snow": "snow",
-                "currentConditions/windspeed": "windspeed",
-                "currentConditions/winddir": "winddir",
-                "currentConditions/windgust": "windgust",
-                "currentConditions/humidity": "humidity",
-                "currentConditions/pressure": "pressure",
-                "currentConditions/visibility": "visibility",
-                "currentConditions/uvindex": "uvindex",
-                "currentConditions/cloudcover": "cloudcover",
-            },
-            verbose=True,
+    async def aget_current_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        """Asynchronous version of `get_current_weather_data`"""
+        snapshot = self.__known_snapshot(
+            location_name,
+            *await self.__aget_snapshot(location_name, priority, kind="current"),
         )
-        return data
+        return self.__current_weather_view(snapshot)
 
-    def get_daily_weather_data(self, location_name: str) -> dict:
+    def get_daily_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
         """Get daily weather data for specified location
 
         Parameters
         ----------
         location_name : str
             name of the location for which to retrieve daily weather data
+        priority : Priority, optional
+            priority class of the request. Default to `Priority.INTERACTIVE`
 
         Returns
         -------
         dict
             daily weather data for specified location
+        """
+        snapshot = self.__known_snapshot(
+            location_name, *self.__get_snapshot(location_name, priority, kind="daily")
+        )
+        return self.__daily_weather_view(snapshot)
+
+    async def aget_daily_weather_data(
+        self, location_name: str, priority: Priority = Priority.INTERACTIVE
+    ) -> dict:
+        """Asynchronous version of `get_daily_weather_data`"""
+        snapshot = self.__known_snapshot(
+            location_name,
+            *await self.__aget_snapshot(location_name, priority, kind="daily"),
+        )
+        return self.__daily_weather_view(snapshot)
+
+    def request_cost(self, response: Union[requests.Response, APIResponse]) -> int:
+        """Visual Crossing indicates the number of billed records in the
+        `queryCost` field of JSON responses"""
+        try:
+            return int(response.json().get("queryCost", 1))
+        except (ValueError, AttributeError):
+            return 1
 
-        Raises
-        ------
-        NotImplementedError
-            This method must be redefined by inheriting weather API handler
+    def get_daily_weather_data_many(
+        self,
+        location_names: Iterable[str],
+        priority: Priority = Priority.DAILY,
+    ) -> Dict[str, LocationResult]:
+        """Get daily weather data for several locations, using the multi-location
+        timeline endpoint: one request is sent for `MULTI_LOCATIONS_MAX` locations.
+        Locations missing from the responses are requested one by one
+
+        Parameters
+        ----------
+        location_names : Iterable[str]
+            names of the locations for which to retrieve daily weather data
+        priority : Priority, optional
+            priority class of the requests. Default to `Priority.DAILY`
+
+        Returns
+        -------
+        Dict[str, LocationResult]
+            result for each location. Spellings of the same location share the
+            same result, and the location is only requested once
         """
+        canonical_names = self.__canonical_names(location_names)
+        unique_names = list(dict.fromkeys(canonical_names.values()))
+        results = {}
+        for chunk in self.__chunks(unique_names):
+            response = self.request(
+                **self.__daily_weather_multi_query(chunk), priority=priority
+            )
+            results.update(self.__split_multi_response(chunk, response))
+        missing = [name for name in unique_names if name not in results]
+        if missing:
+            results.update(super().get_daily_weather_data_many(missing, priority))
+        return {name: results[canonical_names[name]] for name in canonical_names}
+
+    async def aget_daily_weather_data_many(
+        self,
+        location_names: Iterable[str],
+        priority: Priority = Priority.DAILY,
+        max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    ) -> Dict[str, LocationResult]:
+        """Asynchronous version of `get_daily_weather_data_many`. Multi-location
+        requests, then single-location ones for missing locations, are sent in
+        parallel, with at most `max_concurrency` requests at the same time"""
+        canonical_names = self.__canonical_names(location_names)
+        unique_names = list(dict.fromkeys(canonical_names.values()))
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(chunk: List[str]) -> Dict[str, LocationResult]:
+            async with semaphore:
+                response = await self.arequest(
+                    **self.__daily_weather_multi_query(chunk), priority=priority
+                )
+            return self.__split_multi_response(chunk, response)
+
+        results = {}
+        for chunk_results in await asyncio.gather(
+            *(fetch(chunk) for chunk in self.__chunks(unique_names))
+        ):
+            results.update(chunk_results)
+        missing = [name for name in unique_names if name not in results]
+        if missing:
+            results.update(
+                await super().aget_daily_weather_data_many(
+                    missing, priority, max_concurrency
+                )
+            )
+        return {name: results[canonical_names[name]] for name in canonical_names}
+
+    def normalize_resource_path(self, resource_path: str) -> str:
+        """Location names are case insensitive for Visual Crossing, so the whole
+        normalized path is also lowercased"""
+        return super().normalize_resource_path(resource_path).casefold()
+
+    def __get_snapshot(
+        self,
+        location_name: str,
+        priority: Priority,
+        refresh: bool = False,
+        kind: Optional[str] = None,
+    ) -> Tuple[Optional[ForecastSnapshot], int]:
+        """Return the snapshot of a location, as `get_snapshot`, with the status
+        code of the response it was extracted from"""
+        location_name = self.__canonical(location_name)
+        query = self.__snapshot_query(location_name)
         response = self.request(
-            resource_path=f"VisualCrossingWebServices/rest/services/timeline/{location_name}/today",
-            request_args={
+            **query,
+            priority=priority,
+            refresh=refresh,
+            stale_if_error=self.stale_if_error.get(kind, 0.0),
+        )
+        snapshot = ForecastSnapshot.from_response(response)
+        if self.__outdated(snapshot):
+            response = self.request(**query, priority=priority, refresh=True)
+            snapshot = ForecastSnapshot.from_response(response)
+        self.__learn(location_name, snapshot)
+        return snapshot, response.status_code
+
+    async def __aget_snapshot(
+        self,
+        location_name: str,
+        priority: Priority,
+        refresh: bool = False,
+        kind: Optional[str] = None,
+    ) -> Tuple[Optional[ForecastSnapshot], int]:
+        """Asynchronous version of `__get_snapshot`"""
+        location_name = self.__canonical(location_name)
+        query = self.__snapshot_query(location_name)
+        response = await self.arequest(
+            **query,
+            priority=priority,
+            refresh=refresh,
+            max_stale=self.max_stale.get(kind, 0.0),
+            stale_if_error=self.stale_if_error.get(kind, 0.0),
+        )
+        snapshot = ForecastSnapshot.from_response(response)
+        if self.__outdated(snapshot):
+            response = await self.arequest(**query, priority=priority, refresh=True)
+            snapshot = ForecastSnapshot.from_response(response)
+        self.__learn(location_name, snapshot)
+        return snapshot, response.status_code
+
+    @staticmethod
+    def __known_snapshot(
+        location_name: str, snapshot: Optional[ForecastSnapshot], status_code: int
+    ) -> Optional[ForecastSnapshot]:
+        """Return the snapshot, or raise `UnknownLocationError` if the web API
+        rejected the location"""
+        if snapshot is None and status_code in UNKNOWN_LOCATION_STATUSES:
+            raise UnknownLocationError(location_name)
+        return snapshot
+
+    def __canonical(self, location_name: str) -> str:
+        """Return the name under which a location is requested: its canonical
+        name if an alias index is used, otherwise the stripped name"""
+        if self.aliases is None:
+            return location_name.strip()
+        return self.aliases.resolve(location_name)
+
+    def __canonical_names(self, location_names: Iterable[str]) -> Dict[str, str]:
+        """Return the name under which each location is requested, in the order
+        of `location_names`, without duplicates"""
+        return {name: self.__canonical(name) for name in location_names}
+
+    def __learn(self, location_name: str, snapshot: Optional[ForecastSnapshot]) -> None:
+        """Record into the alias index the place resolved for a location name"""
+        if self.aliases is not None and snapshot is not None:
+            self.aliases.learn(location_name, snapshot.payload)
+
+    def __snapshot_query(self, location_name: str) -> Dict[str, Any]:
+        """Return request parameters used to retrieve the snapshot of a location"""
+        return {
+            "resource_path": f"{TIMELINE_PATH}/{location_name}/{SNAPSHOT_PERIOD}",
+            "request_args": {
                 "unitGroup": "metric",
-                "include": "days",
-                "key": os.environ["idVisualCrossing"],
+                **self.__elements(SNAPSHOT_TARGETS),
+                "include": "current%2Cdays%2Chours",
                 "contentType": "json",
                 "lang": "id",
             },
+            "cache_ttl": SNAPSHOT_TTL,
+            "usage_tag": location_name,
+        }
+
+    @staticmethod
+    def __outdated(snapshot: Optional[ForecastSnapshot]) -> bool:
+        """Return whether a stale snapshot was received on a previous day of its
+        location: its days are shifted, so it must not be served"""
+        return (
+            snapshot is not None
+            and snapshot.age > SNAPSHOT_TTL
+            and not snapshot.fetched_today()
         )
 
-        if not response.ok:
+    def __rain_view(self, snapshot: Optional[ForecastSnapshot], period: str) -> dict:
+        """Extract rain data of the specified period from a snapshot"""
+        if snapshot is None:
             return {}
-        data = self.get_data(
-            response=response,
-            targets=[
-                "timezone",
-                "conditions",
-                "temp",
-                "tempmin",
-                "tempmax",
-                "preciptype",
-                "precipprob",
-                "precip",
-                "snowdepth",
-                "snow",
-                "windspeed",
-                "winddir",
-                "windgust",
-                "humidity",
-                "pressure",
-                "uvindex",
-                "sunrise",
-                "sunset",
-            ],
-        )
+        day_idx = SNAPSHOT_DAY_INDEXES[sunbot.PERIODS[period]]
+        if day_idx >= snapshot.nb_days:
+            logging.error("Snapshot %r does not cover the period %s", snapshot, period)
+            return {}
+        data = self.get_data(snapshot.day(day_idx, with_hours=True), RAIN_TARGETS)
+        return self.__dated(data, snapshot.fetched_at)
+
+    def __current_weather_view(self, snapshot: Optional[ForecastSnapshot]) -> dict:
+        """Extract current weather data from a snapshot"""
+        if snapshot is None:
+            return {}
+        data = self.get_data(snapshot.current(), CURRENT_WEATHER_TARGETS)
+        return self.__dated(data, snapshot.fetched_at)
+
+    def __daily_weather_view(self, snapshot: Optional[ForecastSnapshot]) -> dict:
+        """Extract daily weather data of today from a snapshot"""
+        if snapshot is None or not snapshot.nb_days:
+            return {}
+        data = self.get_data(snapshot.day(0), DAILY_WEATHER_TARGETS)
+        return self.__dated(data, snapshot.fetched_at)
+
+    @staticmethod
+    def __dated(data: dict, as_of: Optional[float]) -> dict:
+        """Add to extracted data the date of the response they come from, under
+        the `as_of` key, so it can be displayed with them. Empty data are left
+        empty"""
+        if data and as_of is not None:
+            data["as_of"] = as_of
         return data
+
+    def __daily_weather_multi_query(self, location_names: List[str]) -> Dict[str, Any]:
+        """Return request parameters used to retrieve daily weather data of
+        several locations"""
+        return {
+            "resource_path": MULTI_TIMELINE_PATH,
+            "request_args": {
+                "locations": "|".join(location_names),
+                "datestart": "today",
+                "dateend": "today",
+                "unitGroup": "metric",
+                **self.__elements(DAILY_WEATHER_TARGETS),
+                "include": "days",
+                "contentType": "json",
+                "lang": "id",
+            },
+            "cache_ttl": DAILY_WEATHER_TTL,
+        }
+
+    def __elements(self, targets: Union[list, dict]) -> Dict[str, str]:
+        """Return the `elements` parameter restricting responses to the fields
+        read from `targets`, or no parameter if projection is disabled"""
+        if not self.projection:
+            return {}
+        fields = project_fields(targets, exclude=TIMELINE_TOP_LEVEL_FIELDS)
+        return {"elements": "%2C".join(fields)}
+
+    @staticmethod
+    def __chunks(location_names: List[str]) -> List[List[str]]:
+        """Split locations into the lists sent in multi-location requests"""
+        return [
+            location_names[start : start + MULTI_LOCATIONS_MAX]
+            for start in range(0, len(location_names), MULTI_LOCATIONS_MAX)
+        ]
+
+    def __split_multi_response(
+        self,
+        location_names: List[str],
+        response: Union[requests.Response, APIResponse],
+    ) -> Dict[str, LocationResult]:
+        """Extract daily weather data of each location from a multi-location
+        response. Each location of the response has the structure of a single
+        location timeline response, so it is extracted the same way. Locations
+        that are not in the response are missing from the returned dict"""
+        if not response.ok:
+            logging.warning(
+                "Multi-location request failed (%d), locations will be requested"
+                " one by one",
+                response.status_code,
+            )
+            return {}
+        by_address = {name.casefold(): name for name in location_names}
+        results = {}
+        for location_payload in response.json().get("locations", []):
+            name = by_address.get(str(location_payload.get("address", "")).casefold())
+            if name is None:
+                continue
+            if self.aliases is not None:
+                self.aliases.learn(name, location_payload)
+            location_response = APIResponse.from_json(location_payload)
+            data = self.__extract(location_response, DAILY_WEATHER_TARGETS)
+            results[name] = LocationResult.from_data(
+                self.__dated(data, getattr(response, "received_at", None))
+            )
+        return results
+
+    def __extract(
+        self,
+        response: Union[requests.Response, APIResponse],
+        targets: Union[list, dict],
+    ) -> dict:
+        """Extract specified targets from the response. An empty dict is returned
+        if the request failed"""
+        if not response.ok:
+            return {}
+        return self.get_data(response=response, targets=targets)
@@ -1,5 +1,34 @@
-from .api_handler import APIHandler
+from .aliases import AliasIndex
+from .assets import AssetStore
+from .api_handler import APIHandler, APIResponse
+from .budget import APIBudget, Priority
+from .cache import TTLCache
+from .disk_cache import PersistentCache
+from .metrics import RequestMetrics
+from .render import RenderService
+from .render_cache import RenderCache
+from .replay import RecordingTransport, ReplayTransport, SyntheticTransport
+from .resilience import CircuitBreaker, RetryPolicy
+from .transport import Transport
+from .warmer import CacheWarmer
 
 __all__ = [
+    "AliasIndex",
+    "APIBudget",
     "APIHandler",
+    "APIResponse",
+    "AssetStore",
+    "CacheWarmer",
+    "CircuitBreaker",
+    "PersistentCache",
+    "Priority",
+    "RecordingTransport",
+    "RenderCache",
+    "RenderService",
+    "ReplayTransport",
+    "RequestMetrics",
+    "RetryPolicy",
+    "SyntheticTransport",
+    "TTLCache",
+    "Transport",
 ]
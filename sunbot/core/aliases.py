@@ -0,0 +1,234 @@
+"""Location alias module
+
+Users type the same location in many ways: "Toulouse", "toulouse ",
+"Toulouse, France"... Each spelling used to be a separate cache entry, a
+separate subscription and a separate request to the weather API. The
+`AliasIndex` maps each spelling to a canonical name, the first spelling for
+which the weather API resolved the location, so that equivalent spellings share
+the same requests and subscriptions:
+    - spellings differing only by case or whitespace are merged at once, by
+      `normalize_location_name`
+    - other spellings are merged after their first successful lookup, as the
+      weather API resolves them to the same place (coordinates and resolved
+      address)
+
+The index is saved into a JSON file every few new names, so aliases survive
+restarts.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Union
+
+from sunbot.location import normalize_location_name
+
+# Number of decimals of the coordinates identifying a place, about 10 meters:
+COORDINATES_DECIMALS = 4
+# Default number of new names, and time in seconds, after which the index is
+# saved:
+DEFAULT_SAVE_EVERY = 10
+DEFAULT_SAVE_INTERVAL = 60.0
+
+
+class AliasIndex:
+    """Index of the names given to locations, mapping each name to the
+    canonical name of its location
+
+    Parameters
+    ----------
+    save_path : str | Path, optional
+        JSON file from which the index is loaded, and where it is saved every
+        `save_every` new names or `save_interval` seconds, and by `save`, which
+        must be called before the bot stops. The index is not saved if no path
+        is given
+    save_every : int, optional
+        number of new names after which the index is saved. Default to
+        `DEFAULT_SAVE_EVERY`
+    save_interval : float, optional
+        time after which a new name saves the index, in seconds. Default to
+        `DEFAULT_SAVE_INTERVAL`
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.monotonic`
+    """
+
+    def __init__(
+        self,
+        save_path: Optional[Union[str, Path]] = None,
+        save_every: int = DEFAULT_SAVE_EVERY,
+        save_interval: float = DEFAULT_SAVE_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.save_path = Path(save_path) if save_path is not None else None
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.clock = clock
+        # Canonical name of each normalized name:
+        self.__aliases: Dict[str, str] = {}
+        # Place of each canonical name, with its resolved address, coordinates
+        # and timezone, and canonical name of each place key:
+        self.__places: Dict[str, Dict[str, Any]] = {}
+        self.__canonical_names: Dict[str, str] = {}
+        # Number of names replaced by another spelling of the same location:
+        self.merged_lookups = 0
+        # Incremented each time a name becomes an alias of another name, so that
+        # names registered before can be replaced by their canonical name:
+        self.version = 0
+        # New names not saved yet, and date of the last save:
+        self.__unsaved = 0
+        self.__saved_at = clock()
+        self.load()
+
+    def resolve(self, location_name: str) -> str:
+        """Return the canonical name of a location name. Unknown names are
+        returned without leading and trailing whitespaces
+
+        Parameters
+        ----------
+        location_name : str
+            location name, as typed by a user
+
+        Returns
+        -------
+        str
+            canonical name, used for requests and subscriptions
+        """
+        normalized_name = normalize_location_name(location_name)
+        canonical_name = self.__aliases.get(normalized_name)
+        if canonical_name is None:
+            return location_name.strip()
+        if normalize_location_name(canonical_name) != normalized_name:
+            self.merged_lookups += 1
+        return canonical_name
+
+    def learn(self, location_name: str, payload: Mapping[str, Any]) -> str:
+        """Record the place to which the weather API resolved a location name. If
+        another name was already resolved to this place, the location name
+        becomes an alias of this name
+
+        Parameters
+        ----------
+        location_name : str
+            requested location name
+        payload : Mapping[str, Any]
+            decoded response of the weather API for this name, with the
+            `resolvedAddress`, `latitude`, `longitude` and `timezone` fields
+
+        Returns
+        -------
+        str
+            canonical name of the location
+        """
+        normalized_name = normalize_location_name(location_name)
+        canonical_name = self.__aliases.get(normalized_name)
+        if canonical_name is not None:
+            return canonical_name
+        place_key = _place_key(payload)
+        if place_key is None:
+            return location_name.strip()
+        canonical_name = self.__canonical_names.get(place_key)
+        if canonical_name is None:
+            canonical_name = location_name.strip()
+            self.__canonical_names[place_key] = canonical_name
+            self.__places[canonical_name] = {
+                "key": place_key,
+                "resolved_address": payload.get("resolvedAddress"),
+                "latitude": payload.get("latitude"),
+                "longitude": payload.get("longitude"),
+                "timezone": payload.get("timezone"),
+            }
+            self.__aliases[normalize_location_name(canonical_name)] = canonical_name
+        else:
+            logging.info(
+                "%s is an alias of the location %s", location_name, canonical_name
+            )
+            self.version += 1
+        self.__aliases[normalized_name] = canonical_name
+        self.__unsaved += 1
+        if (
+            self.__unsaved >= self.save_every
+            or self.clock() - self.__saved_at >= self.save_interval
+        ):
+            self.save()
+        return canonical_name
+
+    def place(self, location_name: str) -> Optional[Dict[str, Any]]:
+        """Return the place of a location name: resolved address, coordinates
+        and timezone, or None if the name was never resolved"""
+        return self.__places.get(self.resolve(location_name))
+
+    def stats(self) -> Dict[str, int]:
+        """Return index counters
+
+        Returns
+        -------
+        Dict[str, int]
+            number of known names, of distinct locations, and of lookups whose
+            name was replaced by another spelling of the same location
+        """
+        return {
+            "names": len(self.__aliases),
+            "locations": len(self.__places),
+            "merged_lookups": self.merged_lookups,
+        }
+
+    def save(self) -> None:
+        """Save the index into `save_path`, if it was specified. The file is
+        replaced at once, so it is never left partially written"""
+        self.__unsaved = 0
+        self.__saved_at = self.clock()
+        if self.save_path is None:
+            return
+        data = {"aliases": self.__aliases, "places": self.__places}
+        try:
+            self.save_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.save_path.with_name(f"{self.save_path.name}.tmp")
+            with open(tmp_path, "w", encoding="UTF-8") as json_file:
+                json.dump(data, json_file, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.save_path)
+        except OSError as err:
+            logging.error(
+                "Unable to save location aliases into %s: %s", self.save_path, err
+            )
+
+    def load(self) -> None:
+        """Load the index from `save_path`"""
+        if self.save_path is None or not self.save_path.exists():
+            return
+        try:
+            with open(self.save_path, "r", encoding="UTF-8") as json_file:
+                data = json.load(json_file)
+        except (OSError, json.JSONDecodeError) as err:
+            logging.error(
+                "Unable to load location aliases from %s: %s", self.save_path, err
+            )
+            return
+        self.__places.update(data.get("places", {}))
+        self.__canonical_names.update(
+            {place["key"]: name for name, place in self.__places.items()}
+        )
+        self.__aliases.update(data.get("aliases", {}))
+        logging.info(
+            "%d location aliases loaded for %d locations",
+            len(self.__aliases),
+            len(self.__places),
+        )
+
+
+def _place_key(payload: Mapping[str, Any]) -> Optional[str]:
+    """Return the key identifying the place of a response: its rounded
+    coordinates, or its normalized resolved address if coordinates are missing.
+    None is returned if the response does not identify a place"""
+    try:
+        return (
+            f"{round(float(payload['latitude']), COORDINATES_DECIMALS)},"
+            f"{round(float(payload['longitude']), COORDINATES_DECIMALS)}"
+        )
+    except (KeyError, TypeError, ValueError):
+        pass
+    resolved_address = payload.get("resolvedAddress")
+    if not resolved_address:
+        return None
+    return normalize_location_name(str(resolved_address))
@@ -1,14 +1,123 @@
 """API Handler"""
 
+import asyncio
+import json
 import logging
-from typing import Dict, List, Literal, Optional, Union
+import ssl
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Set,
+    Union,
+)
+from urllib.parse import unquote
 
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 
-from sunbot.utils.utils import flatten_dict, get_best_items, merge_dict
+from sunbot.core.auth import DEFAULT_REFRESH_MARGIN, JWTState
+from sunbot.core.budget import APIBudget, Priority
+from sunbot.core.cache import TTLCache
+from sunbot.core.metrics import RequestMetrics, request_metrics
+from sunbot.core.resilience import CircuitBreaker, RetryPolicy
+from sunbot.core.resolver import resolve_targets
+from sunbot.core.singleflight import SingleFlight
+from sunbot.core.transport import (
+    ACCEPT_ENCODING,
+    Transport,
+    connection_trace_config,
+    decode_body,
+)
+from sunbot.utils.path_view import PathView
+from sunbot.utils.utils import get_best_items, merge_dict
 
 AuthMode = Literal["no", "token", "jwt"]
 AuthModes = AuthMode.__args__
+Protocols = ("http", "https")
+
+
+class APIResponse:
+    """Transport independent response returned by the asynchronous path of
+    `APIHandler`. It exposes the subset of the `requests.Response` interface used
+    by the bot (`status_code`, `ok`, `headers`, `content` and `json()`), so both
+    kind of responses can be passed to `APIHandler.get_data`.
+
+    Parameters
+    ----------
+    status_code : int
+        HTTP status code of the response
+    headers : Mapping[str, str]
+        response headers. Header names are case insensitive
+    content : bytes
+        raw response body
+    url : str, optional
+        URL that produced this response
+    received_at : float, optional
+        date of reception of the response, as returned by `time.time`. Default
+        to now. It is kept while the response is cached, so it gives the age of
+        the data
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: Mapping[str, str],
+        content: bytes,
+        url: str = "",
+        received_at: Optional[float] = None,
+    ) -> None:
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.__content = content
+        self.url = url
+        self.received_at = received_at if received_at is not None else time.time()
+        self.__json = None
+
+    @classmethod
+    def from_response(cls, response: requests.Response) -> "APIResponse":
+        """Build an `APIResponse` from a `requests.Response`, received now"""
+        return cls(
+            response.status_code, response.headers, response.content, response.url
+        )
+
+    @classmethod
+    def from_json(
+        cls, payload: Any, status_code: int = 200, url: str = ""
+    ) -> "APIResponse":
+        """Build a JSON response from an already decoded payload, which is shared
+        and not copied. The body is only encoded if it is read"""
+        response = cls(status_code, {"Content-Type": "application/json"}, None, url)
+        response.__json = payload
+        return response
+
+    @property
+    def content(self) -> bytes:
+        """Raw response body"""
+        if self.__content is None:
+            self.__content = json.dumps(self.__json).encode()
+        return self.__content
+
+    @property
+    def ok(self) -> bool:
+        """`True` if the status code is lower than 400, like `requests.Response.ok`"""
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        """Return the decoded JSON body. The body is only decoded once, so
+        several consumers of the same response share the same parsed object"""
+        if self.__json is None:
+            self.__json = json.loads(self.__content)
+        return self.__json
 
 
 class APIHandler:
@@ -35,7 +144,55 @@ class APIHandler:
                 expires. Data needed to create a jeton have to be passed into the
                 `auth_args` parameter
                 Ex: auth_args= {'token_url': my_token_url, 'app_id': my_app_id}
-    :param
+    :param cache: optional cache of successful responses. Only requests sent with
+        a `cache_ttl` are cached. Authentification arguments are never part of the
+        cache keys
+    :type cache: TTLCache
+    :param budget: optional budget of the web API. When the budget denies a
+        request, the last cached response for this request is returned even if it
+        has expired, or a local 429 response if there is none
+    :type budget: APIBudget
+    :param timeout: maximum duration of an attempt, in seconds. Default to 10
+    :type timeout: float
+    :param connect_timeout: maximum duration of the connection to the web API,
+        handshakes included, in seconds. Default to 3.05
+    :type connect_timeout: float
+    :param read_timeout: maximum waiting time between two received packets, in
+        seconds. Default to `timeout`
+    :type read_timeout: float
+    :param max_connections: maximum number of connections opened by the
+        asynchronous session. Default to 20
+    :type max_connections: int
+    :param max_connections_per_host: maximum number of connections to the same
+        host, which is also the size of the connection pool of the synchronous
+        session. Default to `max_connections`
+    :type max_connections_per_host: int
+    :param keepalive_timeout: time during which idle connections are kept open
+        to be reused, in seconds. Default to 60
+    :type keepalive_timeout: float
+    :param retry_policy: retry policy applied to failed attempts, see
+        `RetryPolicy`. Default to 3 attempts with exponential backoff for GET
+        requests
+    :type retry_policy: RetryPolicy
+    :param circuit_breaker: circuit breaker of the domain of the handler. Open
+        circuits and failed requests result in local 503 responses
+    :type circuit_breaker: CircuitBreaker
+    :param metrics: registry where latency and outcome of each attempt are
+        recorded. Default to the registry shared by all handlers
+    :type metrics: RequestMetrics
+    :param jwt_refresh_margin: in JWT mode, time before the expiration of the
+        token from which it is refreshed, in seconds. Default to 60
+    :type jwt_refresh_margin: float
+    :param transport: transport of the attempts. The default one sends them over
+        the network; `sunbot.core.replay` provides transports recording them,
+        replaying recorded responses or generating synthetic ones. Tokens of
+        the JWT mode are always requested over the network
+    :type transport: Transport
+
+    Identical GET requests sent concurrently through `arequest` are coalesced:
+    only one of them reaches the web API and all callers share its response.
+    In JWT mode, the token is refreshed before it expires, through the pooled
+    sessions, and concurrent callers wait for a single refresh.
 
     """
 
@@ -73,6 +230,28 @@ class APIHandler:
         # Create a session to maintains connection with the web API and speed
         # up the reception of a response from the API
         self.session = requests.Session()
+        # The asynchronous session can only be created from a running event loop,
+        # so it is lazily created by the first call to `arequest`
+        self.async_session: Optional[aiohttp.ClientSession] = None
+        self.max_connections: int = kwargs.get("max_connections", 20)
+        self.max_connections_per_host: int = kwargs.get(
+            "max_connections_per_host", self.max_connections
+        )
+        self.keepalive_timeout: float = kwargs.get("keepalive_timeout", 60.0)
+        self.cache: Optional[TTLCache] = kwargs.get("cache")
+        self.budget: Optional[APIBudget] = kwargs.get("budget")
+        self.timeout: float = kwargs.get("timeout", 10.0)
+        self.connect_timeout: float = kwargs.get("connect_timeout", 3.05)
+        self.read_timeout: float = kwargs.get("read_timeout", self.timeout)
+        self.retry_policy: RetryPolicy = kwargs.get("retry_policy") or RetryPolicy()
+        self.circuit_breaker: CircuitBreaker = kwargs.get(
+            "circuit_breaker"
+        ) or CircuitBreaker(domain_name)
+        self.metrics: RequestMetrics = kwargs.get("metrics", request_metrics)
+        self.transport: Transport = kwargs.get("transport") or Transport()
+        self.single_flight = SingleFlight()
+        # Background requests renewing stale cached responses:
+        self.__revalidations: Set[asyncio.Future] = set()
 
         # For now, this handler only accept JSON format response from web API:
         # See https://http.dev/accept for more info about Accept HTTP header
@@ -91,10 +270,23 @@ class APIHandler:
             raise NotImplementedError(
                 "All the specified accepted format are not supported for now"
             )
-        self.session.headers.update({"Accept": accepted_formats_str[:-1]})
+        self.session.headers.update(
+            {
+                "Accept": accepted_formats_str[:-1],
+                "Accept-Encoding": ACCEPT_ENCODING,
+                "Connection": "keep-alive",
+            }
+        )
+        adapter = HTTPAdapter(pool_maxsize=self.max_connections_per_host)
+        for prefix in ("http://", "https://"):
+            self.session.mount(prefix, adapter)
+        # Number of connections opened by each connection pool of the session:
+        self.__pool_connections: Dict[int, int] = {}
 
         self.domain_name = domain_name
+        self.protocol = kwargs.get("protocol", "https")
         self.certificate_file = kwargs.get("certificate_file")
+        self.auth_args = {}
         auth_mode_id = AuthModes.index("token")
         try:
             auth_mode_id = AuthModes.index(auth_mode)
@@ -116,19 +308,23 @@ class APIHandler:
                     "Token authentification need a token, but no one was provided."
                 )
         # JWT authentification mode need an application id and a token url
+        self.jwt: Optional[JWTState] = None
         if self.auth_mode == AuthModes.index("jwt"):
             self.auth_args = kwargs.get("auth_args", {})
-            for missing_key in {"token_url", "app_id"} - {self.auth_args}:
+            for missing_key in {"token_url", "app_id"} - set(self.auth_args):
                 logging.warning(
                     "JWT authentification mode needs %s but no one was provided",
                     missing_key,
                 )
+            self.jwt = JWTState(
+                kwargs.get("jwt_refresh_margin", DEFAULT_REFRESH_MARGIN)
+            )
 
     def __build_url(
         self,
         resource_path: str,
         url_args: Dict[str, str] | None = None,
-        protocol: str = "https",
+        protocol: Optional[str] = None,
     ) -> str:
         """Build a request URL
 
@@ -139,14 +335,18 @@ class APIHandler:
         url_args: Dict[str, str]
             parameters used for the URL, as key:value dict
         protocol:
-            protocol used for the communication between the bot and the web API
+            protocol used for the communication between the bot and the web API.
+            Default to the handler protocol (HTTPS unless specified otherwise)
 
         Returns
         -------
             built URL
         """
-        if protocol != "https":
-            raise NotImplementedError("APIHandler only supports HTTPS protcol")
+        protocol = protocol if protocol is not None else self.protocol
+        if protocol not in Protocols:
+            raise NotImplementedError(
+                f"APIHandler only supports {', '.join(Protocols)} protocols"
+            )
         # Add a '/' to separate domain name from resource path
         if resource_path[0] != "/" and self.domain_name[-1] != "/":
             resource_path = "/" + resource_path
@@ -165,12 +365,12 @@ class APIHandler:
         return url
 
     @staticmethod
-    def __token_has_expired(response: requests.Response) -> bool:
+    def __token_has_expired(response: Union[requests.Response, APIResponse]) -> bool:
         """Check wether authentification token has expired
 
         Parameters
         ----------
-        response : requests.Response
+        response : requests.Response | APIResponse
             response received from an API
 
         Returns
@@ -179,17 +379,31 @@ class APIHandler:
             `True` if authentification token has expired, else `False`
         """
         status = response.status_code
-        return status == 401 and "expired" in response.headers["WWW-Authenticate"]
+        return status == 401 and "expired" in response.headers.get(
+            "WWW-Authenticate", ""
+        )
 
-    def __obtain_jwt_token(self, timeout: Optional[float] = 10.0) -> bool:
-        """Obtain new jwt token from the web API. The token is added into
-        session's header
+    def __ensure_jwt(self) -> None:
+        """In JWT mode, obtain a token if there is none or if the current one is
+        about to expire. Threads needing a token during a refresh wait for it"""
+        if self.jwt is None or self.jwt.is_fresh():
+            return
+        with self.jwt.lock:
+            # The token may have been refreshed while waiting for the lock:
+            if not self.jwt.is_fresh():
+                self.__refresh_jwt()
 
-        Parameters
-        ----------
-        timeout : float, optional
-            maximum waiting time between the sending of the token generation request
-            and the response from web API. Default to 10 seconds
+    async def __aensure_jwt(self) -> None:
+        """Asynchronous version of `__ensure_jwt`"""
+        if self.jwt is None or self.jwt.is_fresh():
+            return
+        async with self.jwt.async_lock:
+            if not self.jwt.is_fresh():
+                await self.__arefresh_jwt()
+
+    def __refresh_jwt(self) -> bool:
+        """Obtain a new JWT from the web API, through the pooled synchronous
+        session. The token is added into session's header
 
         Returns
         ------
@@ -197,37 +411,108 @@ class APIHandler:
         or not.
         """
         logging.info("Requesting a new JWT for %s web API", self.domain_name)
-        data = {"grant_type": "client_credentials"}
-        headers = {"Authorization": f'Basic {self.auth_args["app_id"]}'}
-        access_token_response = requests.post(
-            self.auth_args["token_url"],
-            data=data,
-            verify=self.certificate_file,
-            allow_redirects=True,
-            headers=headers,
-            timeout=timeout,
-        )
-        if access_token_response.status_code == requests.Response:
-            token = access_token_response.json()["access_token"]
-            # Update session with fresh token:
-            self.session.headers.update({"Authorization": f"Bearer {token}"})
-            logging.info("JWT successfully updated for %s web API", self.domain_name)
-            return True
-        logging.error(
-            "An error occured when getting a JWT for %s web API. Code error: %d",
-            self.domain_name,
-            access_token_response.status_code,
-        )
-        return False
+        start = time.perf_counter()
+        token_response = None
+        try:
+            response = self.session.post(
+                self.auth_args["token_url"],
+                data={"grant_type": "client_credentials"},
+                headers=self.__jwt_request_headers(),
+                verify=self.certificate_file,
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
+            if response.ok:
+                token_response = response.json()
+            status = response.status_code
+        except (requests.RequestException, ValueError) as err:
+            status = type(err).__name__
+        return self.__set_jwt(token_response, status, time.perf_counter() - start)
+
+    async def __arefresh_jwt(self) -> bool:
+        """Asynchronous version of `__refresh_jwt`, through the pooled asynchronous
+        session"""
+        logging.info("Requesting a new JWT for %s web API", self.domain_name)
+        start = time.perf_counter()
+        token_response = None
+        session = self.__get_async_session()
+        try:
+            async with session.post(
+                self.auth_args["token_url"],
+                data={"grant_type": "client_credentials"},
+                headers=self.__jwt_request_headers(),
+            ) as response:
+                raw = await response.read()
+                status = response.status
+                if response.ok:
+                    token_response = json.loads(
+                        decode_body(raw, response.headers.get("Content-Encoding"))
+                    )
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+            status = type(err).__name__
+        return self.__set_jwt(token_response, status, time.perf_counter() - start)
+
+    def __jwt_request_headers(self) -> Dict[str, str]:
+        """Return headers of token requests"""
+        return {
+            "Accept": "application/json",
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Authorization": f'Basic {self.auth_args["app_id"]}',
+        }
+
+    def __set_jwt(
+        self, token_response: Optional[Dict[str, Any]], status: Any, latency: float
+    ) -> bool:
+        """Store the token of a token response in the session headers, and record
+        the refresh
+
+        Parameters
+        ----------
+        token_response : Dict[str, Any] | None
+            decoded token response, or None if the token request failed
+        status : Any
+            status code of the token response, or name of the raised exception
+        latency : float
+            duration of the refresh, in seconds
+
+        Returns
+        -------
+        bool
+            `True` if a new token was set
+        """
+        token = None
+        if token_response is not None:
+            try:
+                token = self.jwt.update(token_response)
+            except (KeyError, TypeError):
+                status = "invalid token response"
+        self.metrics.record_token_refresh(self.domain_name, token is not None, latency)
+        if token is None:
+            logging.error(
+                "An error occured when getting a JWT for %s web API. Code error: %s",
+                self.domain_name,
+                status,
+            )
+            return False
+        # Update session with fresh token:
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+        logging.info("JWT successfully updated for %s web API", self.domain_name)
+        return True
 
     def request(
         self,
         resource_path: str,
         request_args: Dict[str, str] | None = None,
-        protocol: str = "https",
+        protocol: Optional[str] = None,
         method: Literal["GET", "POST"] = "GET",
-    ) -> requests.Response:
-        """Send a request to the web API
+        cache_ttl: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        usage_tag: Optional[str] = None,
+        refresh: bool = False,
+        stale_if_error: float = 0.0,
+    ) -> Union[requests.Response, APIResponse]:
+        """Send a request to the web API. This method blocks until the response
+        is received, so it must not be called from the event loop: use
+        `arequest` instead
 
         Parameters
         ----------
@@ -235,53 +520,677 @@ class APIHandler:
             path to the resource on the web API
         request_args : Dict[str, str]
             parameters used for the request URL, as key=value dict
-        protocol : str
-            protocol used for the request. Default to HTTPS
+        protocol : str, optional
+            protocol used for the request. Default to the handler protocol
         method : str
             request method
+        cache_ttl : float, optional
+            if specified and the handler has a cache, a successful response is
+            cached for `cache_ttl` seconds and served from the cache until then
+        priority : Priority, optional
+            priority class of the request, used by the budget of the handler.
+            Default to `Priority.INTERACTIVE`
+        usage_tag : str, optional
+            label under which the consumption of the request is accounted by the
+            budget, for instance the requested location
+        refresh : bool, optional
+            send the request even if a valid response is cached, to renew the
+            cached response. Default to False
+        stale_if_error : float, optional
+            if the request fails, serve the cached response instead, provided it
+            expired less than `stale_if_error` seconds ago. Default to 0
 
         Return
         ------
-            request response : requests.Response object
+            request response : requests.Response object, or APIResponse object if
+            the response is cached
         """
-        # First request will always need to obtain a token first, when using JWT auth
-        # mode
-        if (
-            "Authorization" not in self.session.headers
-            and self.auth_mode == AuthModes.index("jwt")
-        ):
-            self.__obtain_jwt_token()
+        cache_key = None
+        if self.__is_cacheable(method, cache_ttl):
+            cache_key = self.__request_key(method, resource_path, request_args)
+            self.cache.prefetch(cache_key)
+            cached_response = None if refresh else self.cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+        # In JWT mode, a token is obtained before the first request, then refreshed
+        # before it expires:
+        self.__ensure_jwt()
         # Generate request URL
         url = self.__build_url(resource_path, request_args, protocol)
+        if self.budget is not None and not self.budget.try_acquire(priority):
+            return self.__over_budget_response(url, cache_key)
         # send request to web API:
-        response = self.session.request(method, url)
-        if self.__token_has_expired(response):
+        token = self.jwt.token if self.jwt is not None else None
+        response = self.__send(method, url)
+        if self.jwt is not None and self.__token_has_expired(response):
             # Update token:
-            self.__obtain_jwt_token()
-            response = self.session.request(method, url)
+            self.jwt.invalidate(token)
+            self.__ensure_jwt()
+            response = self.__send(method, url)
+        self.__charge(response, priority, usage_tag)
+        if cache_key is None:
+            return response
+        if not response.ok:
+            return self.__stale_on_error(cache_key, stale_if_error, response)
+        response = APIResponse.from_response(response)
+        self.cache.set(cache_key, response, cache_ttl)
+        return response
+
+    async def arequest(
+        self,
+        resource_path: str,
+        request_args: Dict[str, str] | None = None,
+        protocol: Optional[str] = None,
+        method: Literal["GET", "POST"] = "GET",
+        cache_ttl: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        usage_tag: Optional[str] = None,
+        refresh: bool = False,
+        max_stale: float = 0.0,
+        stale_if_error: float = 0.0,
+    ) -> APIResponse:
+        """Asynchronous version of `request`. The request is sent through a pooled
+        `aiohttp` session, so awaiting the response does not block the event loop.
+        It also supports stale-while-revalidate: an expired cached response can be
+        served at once while a new one is requested in the background
+
+        Parameters
+        ----------
+        resource_path : str
+            path to the resource on the web API
+        request_args : Dict[str, str]
+            parameters used for the request URL, as key=value dict
+        protocol : str, optional
+            protocol used for the request. Default to the handler protocol
+        method : str
+            request method
+        cache_ttl : float, optional
+            if specified and the handler has a cache, a successful response is
+            cached for `cache_ttl` seconds and served from the cache until then
+        priority : Priority, optional
+            priority class of the request, used by the budget of the handler.
+            Default to `Priority.INTERACTIVE`
+        usage_tag : str, optional
+            label under which the consumption of the request is accounted by the
+            budget, for instance the requested location
+        refresh : bool, optional
+            send the request even if a valid response is cached, to renew the
+            cached response. Default to False
+        max_stale : float, optional
+            serve the cached response if it expired less than `max_stale` seconds
+            ago, and renew it in the background. Default to 0
+        stale_if_error : float, optional
+            if the request fails, serve the cached response instead, provided it
+            expired less than `stale_if_error` seconds ago. Default to 0
+
+        Return
+        ------
+            request response : APIResponse object
+        """
+        request_key = self.__request_key(method, resource_path, request_args)
+        cache_key = request_key if self.__is_cacheable(method, cache_ttl) else None
+        url = self.__build_url(resource_path, request_args, protocol)
+
+        def fetch() -> Awaitable[APIResponse]:
+            return self.__afetch(method, url, cache_key, cache_ttl, priority, usage_tag)
+
+        if cache_key is not None:
+            # Responses stored out of memory are read without blocking the loop:
+            await self.cache.aprefetch(cache_key)
+        if cache_key is not None and not refresh:
+            cached_response = self.cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+            stale_response = self.__stale_response(cache_key, max_stale)
+            if stale_response is not None:
+                self.metrics.record_stale(self.domain_name, "revalidate")
+                self.__revalidate(request_key, fetch)
+                return stale_response
+        # Identical GET requests sent while one is in flight share its response:
+        if method == "GET":
+            response = await self.single_flight.do(request_key, fetch)
+        else:
+            response = await fetch()
+        if cache_key is not None and not response.ok:
+            return self.__stale_on_error(cache_key, stale_if_error, response)
+        return response
+
+    def __stale_response(
+        self, cache_key: Hashable, max_stale: float
+    ) -> Optional[APIResponse]:
+        """Return the cached response for `cache_key` if it expired less than
+        `max_stale` seconds ago, or None"""
+        if max_stale <= 0:
+            return None
+        expires_in = self.cache.expires_in(cache_key)
+        if expires_in is None or -expires_in > max_stale:
+            return None
+        return self.cache.get_stale(cache_key)
+
+    def __stale_on_error(
+        self,
+        cache_key: Hashable,
+        stale_if_error: float,
+        response: Union[requests.Response, APIResponse],
+    ) -> Union[requests.Response, APIResponse]:
+        """Return the cached response replacing a failed response, if it expired
+        less than `stale_if_error` seconds ago, or the failed response"""
+        stale_response = self.__stale_response(cache_key, stale_if_error)
+        if stale_response is None:
+            return response
+        logging.info(
+            "Request to %s failed (%d), serving a stale response",
+            self.domain_name,
+            response.status_code,
+        )
+        self.metrics.record_stale(self.domain_name, "error")
+        return stale_response
+
+    def __revalidate(
+        self, request_key: Hashable, fetch: Callable[[], Awaitable[APIResponse]]
+    ) -> None:
+        """Renew a cached response in the background. The request is coalesced
+        with identical requests, so a single revalidation runs at a time"""
+        task = asyncio.ensure_future(self.single_flight.do(request_key, fetch))
+        self.__revalidations.add(task)
+        task.add_done_callback(self.__revalidation_done)
+
+    def __revalidation_done(self, task: asyncio.Future) -> None:
+        """Forget a finished revalidation and log its failure, if any"""
+        self.__revalidations.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logging.error(
+                "Revalidation of a response from %s failed: %r",
+                self.domain_name,
+                task.exception(),
+            )
+        elif not task.result().ok:
+            logging.warning(
+                "Revalidation of a response from %s failed (%d)",
+                self.domain_name,
+                task.result().status_code,
+            )
+
+    async def __afetch(
+        self,
+        method: str,
+        url: str,
+        cache_key: Optional[Hashable],
+        cache_ttl: Optional[float],
+        priority: Priority,
+        usage_tag: Optional[str],
+    ) -> APIResponse:
+        """Send a request to the web API if the budget allows it, handling
+        authentification, and cache the response if needed
+
+        Parameters
+        ----------
+        method : str
+            request method
+        url : str
+            request URL
+        cache_key : Hashable | None
+            key under which caching a successful response, or None
+        cache_ttl : float | None
+            time to live of the cached response
+        priority : Priority
+            priority class of the request
+        usage_tag : str | None
+            label under which the consumption of the request is accounted
+
+        Returns
+        -------
+        APIResponse
+            received response
+        """
+        if self.budget is not None and not self.budget.try_acquire(priority):
+            return self.__over_budget_response(url, cache_key)
+        await self.__aensure_jwt()
+        token = self.jwt.token if self.jwt is not None else None
+        response = await self.__asend_with_retries(method, url)
+        if self.jwt is not None and self.__token_has_expired(response):
+            self.jwt.invalidate(token)
+            await self.__aensure_jwt()
+            response = await self.__asend_with_retries(method, url)
+        self.__charge(response, priority, usage_tag)
+        if cache_key is not None and response.ok:
+            self.cache.set(cache_key, response, cache_ttl)
+        return response
+
+    def request_cost(self, response: Union[requests.Response, APIResponse]) -> int:
+        """Return the number of records billed by the web API for the specified
+        response. Each request costs one record by default: inheriting handlers
+        can redefine this method if their web API bills requests differently
+
+        Parameters
+        ----------
+        response : requests.Response | APIResponse
+            successful response received from the web API
+
+        Returns
+        -------
+        int
+            number of billed records
+        """
+        return 1
+
+    def __charge(
+        self,
+        response: Union[requests.Response, APIResponse],
+        priority: Priority,
+        usage_tag: Optional[str],
+    ) -> None:
+        """Bill a successful response to the budget of the handler, if any"""
+        if self.budget is not None and response.ok:
+            self.budget.charge(priority, self.request_cost(response), usage_tag)
+
+    def __over_budget_response(
+        self, url: str, cache_key: Optional[Hashable]
+    ) -> APIResponse:
+        """Return the response used when the budget denies a request: the last
+        cached response for this request, even expired, or a local 429 response"""
+        if cache_key is not None:
+            stale_response = self.cache.get_stale(cache_key)
+            if stale_response is not None:
+                logging.info(
+                    "Over budget, serving a stale response from %s", self.domain_name
+                )
+                self.metrics.record_stale(self.domain_name, "budget")
+                return stale_response
+        return self.__local_response(429, "API budget exhausted", url)
+
+    def __send(
+        self, method: str, url: str
+    ) -> Union[requests.Response, APIResponse]:
+        """Send a request using the synchronous session, retrying failed attempts
+        according to the retry policy
+
+        Parameters
+        ----------
+        method : str
+            request method
+        url : str
+            request URL
+
+        Returns
+        -------
+        requests.Response | APIResponse
+            last received response, or a local 503 response if no response was
+            received
+        """
+        attempt = 1
+        response = None
+        while True:
+            if not self.circuit_breaker.allow():
+                if response is not None:
+                    return response
+                return self.__local_response(503, "Circuit open", url)
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = self.__send_once(method, url)
+            except requests.RequestException as err:
+                error = err
+            delay = self.__after_attempt(method, attempt, start, response, error)
+            if delay is None:
+                if response is not None:
+                    return response
+                return self.__local_response(503, type(error).__name__, url)
+            time.sleep(delay)
+            attempt += 1
+
+    def __send_once(
+        self, method: str, url: str
+    ) -> Union[requests.Response, APIResponse]:
+        """Send an attempt through the transport of the handler"""
+        return self.transport.send(method, url, self.__send_network)
+
+    def __send_network(self, method: str, url: str) -> requests.Response:
+        """Send a request using the synchronous session, and record transport
+        metrics of the response"""
+        response = self.session.request(
+            method, url, timeout=(self.connect_timeout, self.read_timeout)
+        )
+        # The body is read (and decoded) here, so raw.tell() is its size on the wire:
+        self.metrics.record_transfer(
+            self.domain_name, response.raw.tell(), len(response.content)
+        )
+        # urllib3 pools count the connections they opened:
+        pool = getattr(response.raw, "_pool", None)
+        nb_connections = getattr(pool, "num_connections", 0)
+        reused = nb_connections == self.__pool_connections.get(id(pool), 0)
+        self.__pool_connections[id(pool)] = nb_connections
+        self.metrics.record_connection(
+            self.domain_name, reused=reused, ttfb=response.elapsed.total_seconds()
+        )
         return response
 
+    async def __asend_with_retries(self, method: str, url: str) -> APIResponse:
+        """Asynchronous version of `__send`"""
+        attempt = 1
+        response = None
+        while True:
+            if not self.circuit_breaker.allow():
+                if response is not None:
+                    return response
+                return self.__local_response(503, "Circuit open", url)
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = await self.__asend(method, url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                error = err
+            delay = self.__after_attempt(method, attempt, start, response, error)
+            if delay is None:
+                if response is not None:
+                    return response
+                return self.__local_response(503, type(error).__name__, url)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def __after_attempt(
+        self,
+        method: str,
+        attempt: int,
+        start: float,
+        response: Union[requests.Response, APIResponse, None],
+        error: Optional[Exception],
+    ) -> Optional[float]:
+        """Record the outcome of an attempt and return the delay before the next
+        attempt, or None if the request must not be retried
+
+        Parameters
+        ----------
+        method : str
+            request method
+        attempt : int
+            number of the attempt, starting from 1
+        start : float
+            start date of the attempt, from `time.perf_counter`
+        response : requests.Response | APIResponse | None
+            received response, or None if the attempt raised an exception
+        error : Exception | None
+            exception raised by the attempt, if any
+
+        Returns
+        -------
+        float | None
+            delay before the next attempt, in seconds
+        """
+        outcome = type(error).__name__ if error is not None else response.status_code
+        self.metrics.record(self.domain_name, outcome, time.perf_counter() - start)
+        # Client errors (4xx) mean that the web API is working:
+        if error is not None or response.status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        retryable = error is not None or self.retry_policy.should_retry_status(
+            response.status_code
+        )
+        if not retryable:
+            return None
+        delay = None
+        if self.retry_policy.can_retry(method, attempt):
+            headers = None if response is None else response.headers
+            delay = self.retry_policy.delay(attempt, headers)
+        if delay is None:
+            logging.error(
+                "Request to %s failed after %d attempt(s): %s",
+                self.domain_name,
+                attempt,
+                outcome,
+            )
+        else:
+            logging.warning(
+                "Attempt %d to %s failed (%s), retrying in %.2f s",
+                attempt,
+                self.domain_name,
+                outcome,
+                delay,
+            )
+        return delay
+
+    @staticmethod
+    def __local_response(status_code: int, message: str, url: str) -> APIResponse:
+        """Build a response for a request that was not answered by the web API"""
+        return APIResponse(
+            status_code,
+            {"Content-Type": "application/json"},
+            json.dumps({"message": message}).encode(),
+            url,
+        )
+
+    def cache_expires_in(
+        self,
+        resource_path: str,
+        request_args: Dict[str, str] | None = None,
+        method: str = "GET",
+    ) -> Optional[float]:
+        """Return the time before the cached response to a request expires, in
+        seconds, which is negative if it has already expired, or None if no
+        response is cached for this request
+
+        Parameters
+        ----------
+        resource_path : str
+            path to the resource on the web API
+        request_args : Dict[str, str]
+            parameters used for the request URL
+        method : str, optional
+            request method. Default to GET
+
+        Returns
+        -------
+        float | None
+            remaining time to live of the cached response
+        """
+        if self.cache is None:
+            return None
+        return self.cache.expires_in(
+            self.__request_key(method, resource_path, request_args)
+        )
+
+    def normalize_resource_path(self, resource_path: str) -> str:
+        """Return a normalized version of the specified resource path, used to
+        build request keys. Percent-encoded characters are decoded, and leading,
+        trailing and duplicated slashes are removed. Inheriting handlers can
+        redefine this method if their web API has other equivalences between paths
+
+        Parameters
+        ----------
+        resource_path : str
+            path to the resource on the web API
+
+        Returns
+        -------
+        str
+            normalized path
+        """
+        return "/".join(part for part in unquote(resource_path).split("/") if part)
+
+    def __is_cacheable(self, method: str, cache_ttl: Optional[float]) -> bool:
+        """Return whether the response to a request can be cached"""
+        return self.cache is not None and cache_ttl is not None and method == "GET"
+
+    def __request_key(
+        self,
+        method: str,
+        resource_path: str,
+        request_args: Dict[str, str] | None,
+    ) -> Hashable:
+        """Return the key identifying a request, used for caching and coalescing.
+        Authentification arguments are excluded from the key
+
+        Parameters
+        ----------
+        method : str
+            request method
+        resource_path : str
+            path to the resource on the web API
+        request_args : Dict[str, str] | None
+            parameters used for the request URL
+
+        Returns
+        -------
+        Hashable
+            request key
+        """
+        args = tuple(
+            sorted(
+                (key, unquote(str(value)))
+                for key, value in (request_args or {}).items()
+                if key not in (self.auth_args or {})
+            )
+        )
+        return (method, self.normalize_resource_path(resource_path), args)
+
+    async def __asend(self, method: str, url: str) -> APIResponse:
+        """Asynchronous version of `__send_once`"""
+        return await self.transport.asend(method, url, self.__asend_network)
+
+    async def __asend_network(self, method: str, url: str) -> APIResponse:
+        """Send a request using the asynchronous session and read the whole body
+
+        Parameters
+        ----------
+        method : str
+            request method
+        url : str
+            request URL
+
+        Returns
+        -------
+        APIResponse
+            received response
+        """
+        session = self.__get_async_session()
+        # Authorization header can be updated at any time by the JWT mode, so
+        # headers are copied from the synchronous session for each request:
+        headers = {
+            key: value
+            for key, value in self.session.headers.items()
+            if key in ("Accept", "Accept-Encoding", "Authorization")
+        }
+        async with session.request(method, url, headers=headers) as response:
+            raw = await response.read()
+        # Automatic decompression is disabled on the session, so the body is
+        # decoded in one go and its size on the wire is known:
+        try:
+            content = decode_body(raw, response.headers.get("Content-Encoding"))
+        except ValueError as err:
+            raise aiohttp.ClientPayloadError(str(err)) from err
+        self.metrics.record_transfer(self.domain_name, len(raw), len(content))
+        return APIResponse(
+            response.status, dict(response.headers), content, str(response.url)
+        )
+
+    def __get_async_session(self) -> aiohttp.ClientSession:
+        """Return the asynchronous session used by this handler, creating it if needed
+
+        Returns
+        -------
+        aiohttp.ClientSession
+            pooled session bound to the running event loop
+        """
+        if self.async_session is None or self.async_session.closed:
+            ssl_context = True
+            if self.certificate_file is not None:
+                ssl_context = ssl.create_default_context(cafile=self.certificate_file)
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ssl=ssl_context,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=self.timeout,
+                sock_connect=self.connect_timeout,
+                sock_read=self.read_timeout,
+            )
+            self.async_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                auto_decompress=False,
+                trace_configs=[
+                    connection_trace_config(self.metrics, self.domain_name)
+                ],
+            )
+        return self.async_session
+
+    async def warm_up(self, nb_connections: int = 1) -> int:
+        """Open connections to the web API in advance, so the first requests do
+        not pay TCP and TLS handshakes. Connections stay in the pool of the
+        asynchronous session for `keepalive_timeout` seconds if they are not used
+
+        Parameters
+        ----------
+        nb_connections : int, optional
+            number of connections to open. Default to 1
+
+        Returns
+        -------
+        int
+            number of opened connections
+        """
+        if not self.transport.uses_network:
+            return 0
+        session = self.__get_async_session()
+        url = f"{self.protocol}://{self.domain_name}/"
+
+        async def open_connection() -> bool:
+            try:
+                # The status does not matter, only the connection is kept:
+                async with session.head(url, allow_redirects=False):
+                    return True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                logging.warning(
+                    "Unable to open a connection to %s: %r", self.domain_name, err
+                )
+                return False
+
+        results = await asyncio.gather(
+            *(open_connection() for _ in range(nb_connections))
+        )
+        logging.info(
+            "%d connection(s) opened to %s", sum(results), self.domain_name
+        )
+        return sum(results)
+
+    async def close(self) -> None:
+        """Cancel pending revalidations and close the connections opened by this
+        handler"""
+        for task in list(self.__revalidations):
+            task.cancel()
+        if self.async_session is not None and not self.async_session.closed:
+            await self.async_session.close()
+        self.session.close()
+
     @staticmethod
     def get_data(
-        response: requests.Response,
+        response: Union[requests.Response, APIResponse],
         targets: Union[str, List[str], Dict[str, str]],
         tolerance: Optional[float] = 0.0,
         verbose: Optional[bool] = False,
     ) -> Dict[str, any]:
         """Get data from the specified request response and format it following
-        the structure indicated in `data_keys`
+        the structure indicated in `data_keys`. The resolution of targets in the
+        response is memoized per response shape, see `sunbot.core.resolver`
 
         Parameters
         ----------
         :param response: response from the web API for a request
-        :type response: requests.Response
+        :type response: requests.Response | APIResponse
         :param targets: list of keys to search in response structure. It is
         also possible to specified a dict where keys are target to search in response and
         value are corresponding keys in the dict returned by this method.
         :type data_keys: List[str]
         :param tolerance: tolerance to apply on search results
         :type tolerance: Optional[float]
-        :param verbose:
+        :param verbose: log the score of each key of the response for each
+        target at debug level. Targets are then matched by a fuzzy search
+        instead of the memoized resolution, so it is only meant for debugging
         :type verbose: Optional[bool]
 
         Returns
@@ -302,8 +1211,8 @@ class APIHandler:
                 f"The API handler does not support {content_type} formats"
             )
         json_resp = response.json()
-        # flatten json response
-        flattened_json_resp = flatten_dict(json_resp)
+        # lazy flattened view over the json response, nothing is copied:
+        flattened_json_resp = PathView(json_resp)
 
         if isinstance(targets, str):
             targets_list = [targets]
@@ -312,10 +1221,21 @@ class APIHandler:
         else:
             targets_list = targets
 
-        for target in targets_list:
-            filtered_dict = get_best_items(
-                flattened_json_resp, target=target, tolerance=tolerance, verbose=verbose
-            )
+        if verbose:
+            # Scores are only available from the fuzzy search:
+            matches = {
+                target: get_best_items(
+                    flattened_json_resp,
+                    target=target,
+                    tolerance=tolerance,
+                    verbose=verbose,
+                )
+                for target in targets_list
+            }
+        else:
+            matches = resolve_targets(flattened_json_resp, targets_list, tolerance)
+
+        for target, filtered_dict in matches.items():
             key = targets[target] if isinstance(targets, dict) else target
             # if filtered dict contains only one item, use its unique value instead
             if len(filtered_dict) == 1:
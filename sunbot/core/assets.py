@@ -0,0 +1,207 @@
+"""Image asset store module"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from PIL import Image, UnidentifiedImageError
+
+# Key of a stored asset: path, size, rotation angle and mode of the image
+AssetKey = Tuple[str, Optional[Tuple[int, int]], float, Optional[str]]
+
+# Default memory budget of decoded images, in bytes:
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def image_nbytes(image: Image.Image) -> int:
+    """Return the memory used by the pixels of `image`, in bytes"""
+    return image.width * image.height * len(image.getbands())
+
+
+class AssetStore:
+    """Images decoded from the disk, resized and rotated once, then kept in
+    memory under a byte budget. Each asset is identified by its path, size,
+    rotation angle and mode. When the budget is exceeded, the least recently
+    used assets are evicted. Hits, misses, evictions and loads are counted and
+    can be retrieved with `stats`.
+
+    Returned images are shared between all callers, so they must not be
+    modified: callers drawing on an asset must work on a copy.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        maximum memory used by the pixels of stored images, in bytes. Default
+        to `DEFAULT_MAX_BYTES`
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        if max_bytes <= 0:
+            raise ValueError(
+                f"Asset store budget must be positive. Given value: {max_bytes}"
+            )
+        self.max_bytes = max_bytes
+        self._assets: "OrderedDict[AssetKey, Image.Image]" = OrderedDict()
+        self._nbytes = 0
+        # Images can be rendered from several threads:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = 0
+
+    def get(
+        self,
+        path: str,
+        size: Optional[Tuple[int, int]] = None,
+        rotation: float = 0.0,
+        mode: Optional[str] = None,
+    ) -> Image.Image:
+        """Return the image at `path` converted to `mode`, resized to `size`
+        then rotated by `rotation` degrees, loading it if it is not stored yet
+
+        Parameters
+        ----------
+        path : str
+            path to the image file
+        size : Tuple[int, int], optional
+            size of the returned image, as (width, height). Default to None, the
+            image keeps its original size
+        rotation : float, optional
+            counter clockwise rotation angle of the image, in degrees. Default
+            to 0.0
+        mode : str, optional
+            mode of the returned image, such as `RGBA`. Default to None, the
+            image keeps its original mode
+
+        Returns
+        -------
+        Image.Image
+            shared image, which must not be modified
+
+        Raises
+        ------
+        FileNotFoundError
+            if there is no file at `path`
+        UnidentifiedImageError
+            if the file at `path` is not an image
+        """
+        key = (
+            os.path.normpath(path),
+            None if size is None else tuple(size),
+            float(rotation),
+            mode,
+        )
+        with self._lock:
+            image = self._assets.get(key)
+            if image is not None:
+                self._assets.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+        image = self.__build(*key)
+        with self._lock:
+            self.__insert(key, image)
+        return image
+
+    def __build(
+        self,
+        path: str,
+        size: Optional[Tuple[int, int]],
+        rotation: float,
+        mode: Optional[str],
+    ) -> Image.Image:
+        """Return a new image for the specified asset key. Rotated assets are
+        built from the unrotated asset, so the file is decoded once"""
+        if rotation:
+            return self.get(path, size, 0.0, mode).rotate(rotation)
+        with Image.open(path) as image:
+            image = image.convert(mode) if mode is not None else image.copy()
+        if size is not None and image.size != size:
+            image = image.resize(size)
+        with self._lock:
+            self.loads += 1
+        logging.debug("Asset %s loaded with size %s", path, image.size)
+        return image
+
+    def __insert(self, key: AssetKey, image: Image.Image) -> None:
+        """Store `image` under `key` as the most recently used asset and evict
+        the least recently used assets while the budget is exceeded. Images
+        larger than the budget are not stored"""
+        nbytes = image_nbytes(image)
+        if nbytes > self.max_bytes:
+            return
+        previous = self._assets.pop(key, None)
+        if previous is not None:
+            self._nbytes -= image_nbytes(previous)
+        self._assets[key] = image
+        self._nbytes += nbytes
+        while self._nbytes > self.max_bytes:
+            _, evicted = self._assets.popitem(last=False)
+            self._nbytes -= image_nbytes(evicted)
+            self.evictions += 1
+
+    def preload(
+        self,
+        paths: Iterable[str],
+        size: Optional[Tuple[int, int]] = None,
+        mode: Optional[str] = None,
+    ) -> int:
+        """Load the images at `paths` with the specified size and mode. Missing
+        or invalid images are logged and skipped
+
+        Parameters
+        ----------
+        paths : Iterable[str]
+            paths to the images to load
+        size : Tuple[int, int], optional
+            size of the loaded images. Default to None, images keep their size
+        mode : str, optional
+            mode of the loaded images. Default to None, images keep their mode
+
+        Returns
+        -------
+        int
+            number of images available in the store
+        """
+        nb_loaded = 0
+        for path in dict.fromkeys(paths):
+            try:
+                self.get(path, size, mode=mode)
+            except (FileNotFoundError, UnidentifiedImageError):
+                logging.warning("Asset %s cannot be preloaded", path)
+            else:
+                nb_loaded += 1
+        return nb_loaded
+
+    def clear(self) -> None:
+        """Remove all assets from the store. Counters are kept"""
+        with self._lock:
+            self._assets.clear()
+            self._nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return store counters
+
+        Returns
+        -------
+        Dict[str, Any]
+            number of stored assets, memory used and budget in bytes, number of
+            hits, misses, evictions and loads from the disk, and hit ratio
+        """
+        nb_lookups = self.hits + self.misses
+        return {
+            "size": len(self._assets),
+            "bytes": self._nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "loads": self.loads,
+            "hit_ratio": self.hits / nb_lookups if nb_lookups else 0.0,
+        }
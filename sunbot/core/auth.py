@@ -0,0 +1,121 @@
+"""Authentification module
+
+`JWTState` tracks the JSON Web Token used by an `APIHandler` in JWT mode, and
+its lifetime, so the token is refreshed shortly before it expires instead of
+after a request was rejected. A single refresh runs at a time: callers that need
+a token while it is refreshed wait for this refresh instead of starting theirs.
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Mapping, Optional
+
+# Time before the expiration of a token from which it is refreshed, in seconds:
+DEFAULT_REFRESH_MARGIN = 60.0
+
+
+class JWTState:
+    """Current JWT of a web API, with its expiration date. The lifetime of a
+    token is given by the `expires_in` field of the token response or, failing
+    that, by the `exp` claim of the token. A token whose lifetime is unknown is
+    only refreshed after the web API rejected it
+
+    Parameters
+    ----------
+    refresh_margin : float, optional
+        time before the expiration of the token from which it is refreshed, in
+        seconds. Default to 60
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.time`
+    """
+
+    def __init__(
+        self,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self.token: Optional[str] = None
+        self.expires_at: Optional[float] = None
+        # Synchronous and asynchronous refreshes are serialized separately, as
+        # the event loop must not wait on a thread lock:
+        self.lock = threading.Lock()
+        self.__async_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def async_lock(self) -> asyncio.Lock:
+        """Lock serializing refreshes made from the event loop. It is created
+        lazily, as it must be bound to the running event loop"""
+        if self.__async_lock is None:
+            self.__async_lock = asyncio.Lock()
+        return self.__async_lock
+
+    def is_fresh(self) -> bool:
+        """Return whether there is a token which does not need to be refreshed"""
+        if self.token is None:
+            return False
+        if self.expires_at is None:
+            return True
+        return self.clock() < self.expires_at - self.refresh_margin
+
+    def update(self, token_response: Mapping[str, Any]) -> str:
+        """Store the token of a token response and compute its expiration date
+
+        Parameters
+        ----------
+        token_response : Mapping[str, Any]
+            decoded token response, with at least an `access_token` field
+
+        Returns
+        -------
+        str
+            new token
+
+        Raises
+        ------
+        KeyError
+            if the response does not contain a token
+        """
+        token = token_response["access_token"]
+        now = self.clock()
+        lifetime = token_response.get("expires_in")
+        expires_at = None
+        if lifetime is not None:
+            try:
+                expires_at = now + float(lifetime)
+            except (TypeError, ValueError):
+                logging.warning("Invalid token lifetime: %s", lifetime)
+        if expires_at is None:
+            expires_at = _expiration_claim(token)
+        self.token = token
+        self.expires_at = expires_at
+        return token
+
+    def invalidate(self, token: Optional[str]) -> None:
+        """Forget `token` after the web API rejected it. Nothing is done if the
+        token was already replaced, so concurrent rejections of the same token
+        lead to a single refresh"""
+        if token is not None and token == self.token:
+            self.token = None
+            self.expires_at = None
+
+
+def _expiration_claim(token: str) -> Optional[float]:
+    """Return the `exp` claim of a JWT, or None if the token is not a JWT or has
+    no expiration date. The signature is not checked: the claim is only used to
+    schedule the refresh"""
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1] + "=" * (-len(parts[1]) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
@@ -0,0 +1,330 @@
+"""API budget module
+
+Web APIs such as Visual Crossing bill each request and enforce a daily quota.
+`APIBudget` combines a token bucket, which smooths bursts of requests, with a
+daily counter persisted on the disk, so the consumption survives restarts. Each
+request has a priority class, and low priority classes are denied before the
+quota is exhausted so that the remaining records go to the most important ones.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+
+class Priority(IntEnum):
+    """Priority classes of API requests, from the most to the least important"""
+
+    DAILY = 0  # daily weather delivery
+    INTERACTIVE = 1  # user commands
+    PREFETCH = 2  # requests anticipating future commands
+    BACKGROUND = 3  # maintenance jobs
+
+
+# Fraction of the daily quota that each priority class cannot use, so it stays
+# available for more important classes:
+DEFAULT_RESERVES = {
+    Priority.DAILY: 0.0,
+    Priority.INTERACTIVE: 0.1,
+    Priority.PREFETCH: 0.3,
+    Priority.BACKGROUND: 0.5,
+}
+# Default number of charges, and time in seconds, after which the consumption
+# is saved:
+DEFAULT_SAVE_EVERY = 20
+DEFAULT_SAVE_INTERVAL = 60.0
+
+
+class TokenBucket:
+    """Token bucket rate limiter. The bucket holds at most `capacity` tokens and
+    is refilled with `rate` tokens per second
+
+    Parameters
+    ----------
+    rate : float
+        number of tokens added per second
+    capacity : float
+        maximum number of tokens, i.e. maximum size of a burst
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.monotonic`
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Token bucket rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.__tokens = capacity
+        self.__last_refill = clock()
+
+    @property
+    def tokens(self) -> float:
+        """Number of tokens currently available"""
+        now = self.clock()
+        self.__tokens = min(
+            self.capacity, self.__tokens + (now - self.__last_refill) * self.rate
+        )
+        self.__last_refill = now
+        return self.__tokens
+
+    def try_acquire(self, nb_tokens: float = 1.0) -> bool:
+        """Take `nb_tokens` tokens from the bucket if they are available
+
+        Parameters
+        ----------
+        nb_tokens : float, optional
+            number of tokens to take. Default to 1
+
+        Returns
+        -------
+        bool
+            `True` if the tokens were taken, `False` if there were not enough tokens
+        """
+        if self.tokens < nb_tokens:
+            return False
+        self.__tokens -= nb_tokens
+        return True
+
+
+class APIBudget:
+    """Budget of a web API: a daily quota of billed records, shared between
+    priority classes, and a token bucket limiting the rate of requests. Requests
+    from `Priority.DAILY` are not rate limited, as the daily fan-out is bounded
+    by the number of subscriptions. The daily consumption, per priority class
+    and per location, is saved into `save_path` every `save_every` charges or
+    `save_interval` seconds, and by `save`, which must be called before the bot
+    stops. The counters are reset each day (UTC), when the quota of the web API
+    is reset
+
+    Parameters
+    ----------
+    daily_quota : int
+        number of records that can be billed each day
+    save_path : str | Path, optional
+        JSON file where the daily consumption is saved. If None, the consumption
+        is only kept in memory
+    rate : float, optional
+        number of requests allowed per second on average. Default to 1
+    burst : float, optional
+        maximum number of requests that can be sent at once. Default to 30
+    reserves : Dict[Priority, float], optional
+        fraction of the daily quota that each priority class cannot use.
+        Default to `DEFAULT_RESERVES`
+    save_every : int, optional
+        number of charges after which the consumption is saved. Default to
+        `DEFAULT_SAVE_EVERY`
+    save_interval : float, optional
+        time after which a charge saves the consumption, in seconds. Default to
+        `DEFAULT_SAVE_INTERVAL`
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.time`
+    """
+
+    def __init__(
+        self,
+        daily_quota: int,
+        save_path: Union[str, Path, None] = None,
+        rate: float = 1.0,
+        burst: float = 30.0,
+        reserves: Optional[Dict[Priority, float]] = None,
+        save_every: int = DEFAULT_SAVE_EVERY,
+        save_interval: float = DEFAULT_SAVE_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if daily_quota <= 0:
+            raise ValueError(f"Daily quota must be positive. Given value: {daily_quota}")
+        self.daily_quota = daily_quota
+        self.save_path = Path(save_path) if save_path is not None else None
+        self.reserves = dict(DEFAULT_RESERVES if reserves is None else reserves)
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.clock = clock
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.denied = {priority.name: 0 for priority in Priority}
+        self.__day = self.__today()
+        self.__used = 0
+        self.__by_priority = {priority.name: 0 for priority in Priority}
+        self.__by_location: Dict[str, int] = {}
+        # Charges not saved yet, and date of the last save:
+        self.__unsaved = 0
+        self.__saved_at = clock()
+        self.load()
+
+    @property
+    def used(self) -> int:
+        """Number of records billed today"""
+        self.__check_day()
+        return self.__used
+
+    @property
+    def remaining(self) -> int:
+        """Number of records that can still be billed today"""
+        return max(0, self.daily_quota - self.used)
+
+    def available(self, priority: Priority, cost: int = 1) -> bool:
+        """Return whether the records left today, without the reserve of the
+        specified priority class, cover `cost` records. Unlike `try_acquire`, no
+        token is taken and no denial is counted
+
+        Parameters
+        ----------
+        priority : Priority
+            priority class of the request
+        cost : int, optional
+            expected number of billed records. Default to 1
+
+        Returns
+        -------
+        bool
+            `True` if the quota allows the request, `False` otherwise
+        """
+        reserved = self.daily_quota * self.reserves.get(priority, 0.0)
+        return self.remaining - cost >= reserved
+
+    def try_acquire(self, priority: Priority, cost: int = 1) -> bool:
+        """Check whether a request of the specified priority class, expected to
+        cost `cost` records, can be sent now. A token is taken from the bucket if
+        the request is allowed. Records are billed afterwards with `charge`
+
+        Parameters
+        ----------
+        priority : Priority
+            priority class of the request
+        cost : int, optional
+            expected number of billed records. Default to 1
+
+        Returns
+        -------
+        bool
+            `True` if the request can be sent, `False` otherwise
+        """
+        allowed = self.available(priority, cost)
+        if allowed and priority != Priority.DAILY:
+            allowed = self.bucket.try_acquire()
+        if not allowed:
+            self.denied[priority.name] += 1
+            logging.warning(
+                "API budget denied a %s request (%d records remaining today)",
+                priority.name,
+                self.remaining,
+            )
+        return allowed
+
+    def charge(
+        self, priority: Priority, cost: int = 1, location: Optional[str] = None
+    ) -> None:
+        """Bill `cost` records to the specified priority class and location. The
+        daily consumption is saved every `save_every` charges or `save_interval`
+        seconds
+
+        Parameters
+        ----------
+        priority : Priority
+            priority class of the request
+        cost : int, optional
+            number of billed records. Default to 1
+        location : str, optional
+            location targeted by the request, if any
+        """
+        self.__check_day()
+        self.__used += cost
+        self.__by_priority[priority.name] += cost
+        if location is not None:
+            location = location.casefold()
+            self.__by_location[location] = self.__by_location.get(location, 0) + cost
+        self.__unsaved += 1
+        if (
+            self.__unsaved >= self.save_every
+            or self.clock() - self.__saved_at >= self.save_interval
+        ):
+            self.save()
+
+    def usage(self) -> Dict[str, Any]:
+        """Return the consumption of the current day
+
+        Returns
+        -------
+        Dict[str, Any]
+            day, quota, used and remaining records, records billed to each
+            priority class and location, and number of denied requests per
+            priority class
+        """
+        self.__check_day()
+        return {
+            "day": self.__day,
+            "quota": self.daily_quota,
+            "used": self.__used,
+            "remaining": self.remaining,
+            "by_priority": dict(self.__by_priority),
+            "by_location": dict(
+                sorted(self.__by_location.items(), key=lambda item: -item[1])
+            ),
+            "denied": dict(self.denied),
+        }
+
+    def save(self) -> None:
+        """Save the daily consumption into `save_path`, if it was specified. The
+        file is replaced at once, so it is never left partially written"""
+        self.__unsaved = 0
+        self.__saved_at = self.clock()
+        if self.save_path is None:
+            return
+        data = {
+            "day": self.__day,
+            "used": self.__used,
+            "by_priority": self.__by_priority,
+            "by_location": self.__by_location,
+        }
+        try:
+            self.save_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.save_path.with_name(f"{self.save_path.name}.tmp")
+            with open(tmp_path, "w", encoding="UTF-8") as json_file:
+                json.dump(data, json_file, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.save_path)
+        except OSError as err:
+            logging.error("Unable to save API budget into %s: %s", self.save_path, err)
+
+    def load(self) -> None:
+        """Load the daily consumption from `save_path`. Saved data from a previous
+        day are ignored"""
+        if self.save_path is None or not self.save_path.exists():
+            return
+        try:
+            with open(self.save_path, "r", encoding="UTF-8") as json_file:
+                data = json.load(json_file)
+        except (OSError, json.JSONDecodeError) as err:
+            logging.error("Unable to load API budget from %s: %s", self.save_path, err)
+            return
+        if data.get("day") != self.__day:
+            return
+        self.__used = data["used"]
+        self.__by_priority.update(data["by_priority"])
+        self.__by_location = data["by_location"]
+        logging.info(
+            "API budget loaded: %d records already used today", self.__used
+        )
+
+    def __today(self) -> str:
+        """Return current day (UTC), as an ISO string"""
+        return datetime.fromtimestamp(self.clock(), timezone.utc).date().isoformat()
+
+    def __check_day(self) -> None:
+        """Reset counters if the day changed since the last request"""
+        today = self.__today()
+        if today != self.__day:
+            self.__day = today
+            self.__used = 0
+            self.__by_priority = {priority.name: 0 for priority in Priority}
+            self.__by_location = {}
+            self.denied = {priority.name: 0 for priority in Priority}
@@ -0,0 +1,190 @@
+"""Response cache module"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class CacheEntry:
+    """Value stored in a `TTLCache`, with its expiration date"""
+
+    __slots__ = ["value", "expires_at"]
+
+    def __init__(self, value: Any, expires_at: float) -> None:
+        self.value = value
+        self.expires_at = expires_at
+
+
+class TTLCache:
+    """Size-bounded cache where each entry expires after its own time to live.
+    When the cache is full, the least recently used entry is evicted. Expired
+    entries are kept until they are evicted or replaced, so they can still be
+    retrieved as stale values with `get_stale`. Hits, misses, evictions and
+    expirations are counted and can be retrieved with `stats`.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        maximum number of entries kept in the cache. Default to 256
+    default_ttl : float, optional
+        time to live applied when `set` is called without one, in seconds.
+        Default to 5 minutes
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.time`
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        default_ttl: float = 300.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError(f"Cache size must be positive. Given value: {max_size}")
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value cached for `key`, or `default` if there is no valid
+        entry for this key
+
+        Parameters
+        ----------
+        key : Hashable
+            key of the entry to retrieve
+        default : Any, optional
+            value returned when no valid entry exists. Default to None
+
+        Returns
+        -------
+        Any
+            cached value or `default`
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry.expires_at <= self.clock():
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value cached for `key`, even if its entry has expired, or
+        `default` if there is no entry for this key. Counters are not updated
+
+        Parameters
+        ----------
+        key : Hashable
+            key of the entry to retrieve
+        default : Any, optional
+            value returned when no entry exists. Default to None
+
+        Returns
+        -------
+        Any
+            cached value or `default`
+        """
+        entry = self._entries.get(key)
+        return default if entry is None else entry.value
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Return the time before the entry for `key` expires, in seconds, which
+        is negative if it has already expired, or None if there is no entry for
+        this key. Counters are not updated
+
+        Parameters
+        ----------
+        key : Hashable
+            key of the entry
+
+        Returns
+        -------
+        float | None
+            remaining time to live of the entry
+        """
+        entry = self._entries.get(key)
+        return None if entry is None else entry.expires_at - self.clock()
+
+    def prefetch(self, key: Hashable) -> None:
+        """Make the entry for `key` available to lookups, if it is stored out of
+        memory. Entries of a `TTLCache` are all in memory, so nothing is done
+
+        Parameters
+        ----------
+        key : Hashable
+            key of the entry
+        """
+
+    async def aprefetch(self, key: Hashable) -> None:
+        """Asynchronous version of `prefetch`, which does not block the event
+        loop"""
+        self.prefetch(key)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store `value` under `key` for `ttl` seconds
+
+        Parameters
+        ----------
+        key : Hashable
+            key of the entry
+        value : Any
+            value to cache
+        ttl : float, optional
+            time to live of the entry, in seconds. Default to `default_ttl`
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        self._insert(key, value, self.clock() + ttl)
+
+    def _insert(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """Store `value` under `key` until `expires_at`, as the most recently used
+        entry, and evict the least recently used entries if the cache is full"""
+        self._entries[key] = CacheEntry(value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove the entry for `key` and return its value, or `default`"""
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry.value
+
+    def clear(self) -> None:
+        """Remove all entries from the cache. Counters are kept"""
+        self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.expires_at > self.clock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters
+
+        Returns
+        -------
+        Dict[str, Any]
+            number of hits, misses, evictions, expirations, current size and hit ratio
+        """
+        nb_lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / nb_lookups if nb_lookups else 0.0,
+        }
@@ -0,0 +1,442 @@
+"""Persistent response cache module
+
+`PersistentCache` is a `TTLCache` whose responses are also written to an SQLite
+database, so the responses fetched from web APIs survive restarts of the bot.
+When the bot starts, `aload` fills the memory with the most recently stored
+responses, expired ones included so they can still be served as stale
+responses. Responses evicted from the memory are read back from the database
+by `aprefetch` before a lookup.
+
+The database is only accessed by a dedicated thread, so lookups and stores
+never wait for the disk: stores are queued, and the writes queued together are
+committed together. The keys, sizes and expiration dates of stored responses
+are kept in memory, so lookups know without reading the database whether a
+response is stored and when it expires.
+
+The database is bounded in size: responses that expired more than `retention`
+seconds ago are removed first, then the least recently stored ones. If the
+database can not be opened or written, the cache keeps working in memory only.
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from sunbot.core.api_handler import APIResponse
+from sunbot.core.cache import TTLCache
+
+# Default size of the database, in bytes of response bodies:
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Default time after their expiration during which responses are kept, in
+# seconds. Older responses can no longer be served, even as stale responses:
+DEFAULT_RETENTION = 12 * 60 * 60
+# Maximum number of queued operations committed together:
+COMMIT_BATCH = 64
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        status INTEGER NOT NULL,
+        headers TEXT NOT NULL,
+        url TEXT NOT NULL,
+        body BLOB NOT NULL,
+        received_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        stored_at REAL NOT NULL,
+        size INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)",
+    "CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at)",
+)
+_COLUMNS = "key, status, headers, url, body, received_at, expires_at"
+# Operation stopping the database thread:
+_STOP = None
+
+
+class PersistentCache(TTLCache):
+    """Size-bounded cache of `APIResponse` objects, kept in memory and in an
+    SQLite database. Values which are not responses, or whose key can not be
+    encoded in JSON, are only kept in memory
+
+    Parameters
+    ----------
+    path : str | Path
+        path of the database, created if needed
+    max_size : int, optional
+        maximum number of entries kept in memory. Default to 256
+    default_ttl : float, optional
+        time to live applied when `set` is called without one, in seconds.
+        Default to 5 minutes
+    max_bytes : int, optional
+        maximum size of the response bodies stored in the database, in bytes.
+        Default to 64 MiB
+    retention : float, optional
+        time after their expiration during which responses are kept in the
+        database, in seconds. Default to 12 hours
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.time`
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_size: int = 256,
+        default_ttl: float = 300.0,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        retention: float = DEFAULT_RETENTION,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(max_size, default_ttl, clock)
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self.loaded = 0
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self.commits = 0
+        # Size and expiration date of each stored response, from the least
+        # recently stored, and size of all of them:
+        self.__stored: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+        # Operations run by the database thread:
+        self.__operations: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+        self.__thread: Optional[threading.Thread] = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            # The write-ahead log makes each commit a single append to the log:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                db.execute(statement)
+            db.commit()
+            rows = db.execute(
+                "SELECT key, size, expires_at FROM responses ORDER BY stored_at"
+            ).fetchall()
+        except (OSError, sqlite3.Error) as err:
+            logging.error(
+                "Unable to open the response cache %s, responses will only be"
+                " cached in memory: %s",
+                self.path,
+                err,
+            )
+            return
+        for db_key, size, expires_at in rows:
+            self.__stored[db_key] = (size, expires_at)
+            self.__size += size
+        self.__thread = threading.Thread(
+            target=self.__run, args=(db,), name="response-cache", daemon=True
+        )
+        self.__thread.start()
+
+    def load(self) -> int:
+        """Load the most recently stored responses into memory, at most
+        `max_size` ones, after removing responses older than the retention.
+        This method blocks until the responses are read, so it must not be
+        called from the event loop: use `aload` instead
+
+        Returns
+        -------
+        int
+            number of loaded responses
+        """
+        future = self.__load_rows()
+        return 0 if future is None else self.__insert_rows(future.result())
+
+    async def aload(self) -> int:
+        """Asynchronous version of `load`"""
+        future = self.__load_rows()
+        if future is None:
+            return 0
+        return self.__insert_rows(await asyncio.wrap_future(future))
+
+    def prefetch(self, key: Hashable) -> None:
+        """Read the response stored for `key` into memory, if it is not there.
+        This method blocks until the response is read, so it must not be called
+        from the event loop: use `aprefetch` instead"""
+        future = self.__read(key)
+        if future is not None:
+            self.__promote(key, future.result())
+
+    async def aprefetch(self, key: Hashable) -> None:
+        """Asynchronous version of `prefetch`. It returns at once if the response
+        is in memory or is not stored"""
+        future = self.__read(key)
+        if future is not None:
+            self.__promote(key, await asyncio.wrap_future(future))
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Return the time before the entry for `key` expires, in memory or in
+        the database, without reading the database"""
+        expires_in = super().expires_in(key)
+        if expires_in is not None:
+            return expires_in
+        with self.__lock:
+            stored = self.__stored.get(self.__db_key(key) or "")
+        return None if stored is None else stored[1] - self.clock()
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store `value` under `key` for `ttl` seconds. Responses are queued to
+        be written to the database"""
+        super().set(key, value, ttl)
+        if self.__thread is None or not isinstance(value, APIResponse):
+            return
+        db_key = self.__db_key(key)
+        if db_key is None:
+            return
+        body = value.content
+        expires_at = self._entries[key].expires_at
+        row = (
+            db_key,
+            value.status_code,
+            json.dumps(dict(value.headers)),
+            value.url,
+            body,
+            value.received_at,
+            expires_at,
+            self.clock(),
+            len(body),
+        )
+        with self.__lock:
+            previous = self.__stored.pop(db_key, None)
+            self.__stored[db_key] = (len(body), expires_at)
+            self.__size += len(body) - (previous[0] if previous else 0)
+            evicted = self.__evict() if self.__size > self.max_bytes else []
+        self.__submit(_write, row)
+        if evicted:
+            self.__submit(_delete, evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        value = super().pop(key, default)
+        db_key = self.__db_key(key)
+        with self.__lock:
+            stored = self.__stored.pop(db_key, None) if db_key else None
+            if stored is not None:
+                self.__size -= stored[0]
+        if stored is not None:
+            self.__submit(_delete, [db_key])
+        return value
+
+    def clear(self) -> None:
+        """Remove all entries from the cache, stored responses included.
+        Counters are kept"""
+        super().clear()
+        with self.__lock:
+            self.__stored.clear()
+            self.__size = 0
+        self.__submit(_clear)
+
+    def close(self) -> None:
+        """Write the queued responses and close the database. Entries are then
+        only cached in memory"""
+        thread, self.__thread = self.__thread, None
+        if thread is not None:
+            self.__operations.put(_STOP)
+            thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters
+
+        Returns
+        -------
+        Dict[str, Any]
+            counters of `TTLCache`, plus the number of responses loaded at
+            startup, responses read back from the database on a miss, responses
+            evicted from the database, commits to the database, and the number
+            and size of stored responses
+        """
+        stats = super().stats()
+        with self.__lock:
+            stats.update(
+                {
+                    "loaded": self.loaded,
+                    "disk_hits": self.disk_hits,
+                    "disk_evictions": self.disk_evictions,
+                    "disk_commits": self.commits,
+                    "disk_entries": len(self.__stored),
+                    "disk_bytes": self.__size,
+                }
+            )
+        return stats
+
+    def __run(self, db: sqlite3.Connection) -> None:
+        """Run the queued operations on the database, committing once the queue
+        is empty or every `COMMIT_BATCH` operations, until the cache is closed"""
+        nb_uncommitted = 0
+        while True:
+            operation = self.__operations.get()
+            if operation is _STOP:
+                break
+            function, args, future = operation
+            try:
+                result = function(db, *args)
+            except sqlite3.Error as err:
+                logging.error(
+                    "Response cache operation %s failed: %s", function.__name__, err
+                )
+                result = None
+            if future is not None:
+                future.set_result(result)
+            nb_uncommitted += 1
+            if nb_uncommitted >= COMMIT_BATCH or self.__operations.empty():
+                nb_uncommitted = self.__commit(db)
+        self.__commit(db)
+        db.close()
+
+    def __commit(self, db: sqlite3.Connection) -> int:
+        """Commit the operations run since the last commit, and return the number
+        of uncommitted operations"""
+        try:
+            db.commit()
+        except sqlite3.Error as err:
+            logging.error("Unable to commit the response cache: %s", err)
+        with self.__lock:
+            self.commits += 1
+        return 0
+
+    def __submit(self, function: Callable, *args: Any) -> Optional[Future]:
+        """Queue an operation for the database thread and return the future of
+        its result, or None if the database is closed"""
+        if self.__thread is None:
+            return None
+        future: Future = Future()
+        self.__operations.put((function, args, future))
+        return future
+
+    def __load_rows(self) -> Optional[Future]:
+        """Queue the removal of the responses older than the retention, then the
+        read of the most recently stored responses"""
+        with self.__lock:
+            deadline = self.clock() - self.retention
+            expired = [
+                db_key
+                for db_key, (_, expires_at) in self.__stored.items()
+                if expires_at < deadline
+            ]
+            self.__forget(expired)
+        if expired:
+            self.__submit(_delete, expired)
+        return self.__submit(_read_recent, self.max_size)
+
+    def __insert_rows(self, rows: Optional[List[Tuple]]) -> int:
+        """Insert rows read by `__load_rows` into memory and return their number.
+        The most recently stored responses are inserted last, so they are
+        evicted last from memory"""
+        rows = rows or []
+        for row in reversed(rows):
+            key, response, expires_at = _decode_row(row)
+            if key not in self._entries:
+                self._insert(key, response, expires_at)
+        self.loaded += len(rows)
+        return len(rows)
+
+    def __read(self, key: Hashable) -> Optional[Future]:
+        """Queue the read of the response stored for `key`, or return None if it
+        is in memory or is not stored"""
+        if key in self._entries:
+            return None
+        db_key = self.__db_key(key)
+        with self.__lock:
+            if db_key is None or db_key not in self.__stored:
+                return None
+        return self.__submit(_read, db_key)
+
+    def __promote(self, key: Hashable, row: Optional[Tuple]) -> None:
+        """Insert a row read by `__read` into memory, unless the key was stored
+        in memory meanwhile"""
+        if row is None or key in self._entries:
+            return
+        _, response, expires_at = _decode_row(row)
+        self._insert(key, response, expires_at)
+        self.disk_hits += 1
+
+    def __evict(self) -> List[str]:
+        """Forget the responses that expired more than `retention` seconds ago,
+        then the least recently stored ones, until the database fits in
+        `max_bytes`, and return their keys. The lock must be held"""
+        deadline = self.clock() - self.retention
+        evicted = [
+            db_key
+            for db_key, (_, expires_at) in self.__stored.items()
+            if expires_at < deadline
+        ]
+        self.__forget(evicted)
+        for db_key in list(self.__stored):
+            if self.__size <= self.max_bytes:
+                break
+            evicted.append(db_key)
+            self.__forget([db_key])
+        return evicted
+
+    def __forget(self, db_keys: List[str]) -> None:
+        """Remove stored responses from the index of the database. The lock
+        must be held"""
+        for db_key in db_keys:
+            size, _ = self.__stored.pop(db_key)
+            self.__size -= size
+            self.disk_evictions += 1
+
+    @staticmethod
+    def __db_key(key: Hashable) -> Optional[str]:
+        """Return the key of a response in the database, or None if the key can
+        not be encoded in JSON"""
+        try:
+            return json.dumps(key)
+        except TypeError:
+            return None
+
+
+def _write(db: sqlite3.Connection, row: Tuple) -> None:
+    """Store a row, replacing the previous one of the same key"""
+    db.execute(
+        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row
+    )
+
+
+def _delete(db: sqlite3.Connection, db_keys: List[str]) -> None:
+    """Remove the rows of the specified keys"""
+    db.executemany(
+        "DELETE FROM responses WHERE key = ?", [(db_key,) for db_key in db_keys]
+    )
+
+
+def _clear(db: sqlite3.Connection) -> None:
+    """Remove all rows"""
+    db.execute("DELETE FROM responses")
+
+
+def _read(db: sqlite3.Connection, db_key: str) -> Optional[Tuple]:
+    """Return the row of a key, or None"""
+    return db.execute(
+        f"SELECT {_COLUMNS} FROM responses WHERE key = ?", (db_key,)
+    ).fetchone()
+
+
+def _read_recent(db: sqlite3.Connection, limit: int) -> List[Tuple]:
+    """Return the `limit` most recently stored rows, the most recent first"""
+    return db.execute(
+        f"SELECT {_COLUMNS} FROM responses ORDER BY stored_at DESC LIMIT ?", (limit,)
+    ).fetchall()
+
+
+def _decode_row(row: Tuple) -> Tuple[Hashable, APIResponse, float]:
+    """Return the key, response and expiration date of a database row"""
+    db_key, status, headers, url, body, received_at, expires_at = row
+    response = APIResponse(status, json.loads(headers), body, url, received_at)
+    return _to_hashable(json.loads(db_key)), response, expires_at
+
+
+def _to_hashable(value: Any) -> Hashable:
+    """Convert the lists of a decoded JSON key back into tuples"""
+    if isinstance(value, list):
+        return tuple(_to_hashable(item) for item in value)
+    return value
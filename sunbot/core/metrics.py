@@ -0,0 +1,217 @@
+"""Request metrics module
+
+Latency and outcome of every attempt sent to a web API are recorded per domain,
+so the behaviour of each web API (error rate, slow responses, retries) can be
+inspected while the bot is running. Transport metrics are recorded as well:
+bytes received on the wire and once decoded, opened and reused connections, and
+time to first byte. Refreshes of authentification tokens are also recorded, as
+well as stale cached responses served instead of new ones.
+"""
+
+import math
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Optional
+
+# Number of latest latencies kept per domain to compute percentiles:
+LATENCY_WINDOW = 512
+
+
+class DomainMetrics:
+    """Attempts sent to a domain: number of attempts per outcome, latencies of
+    the latest attempts, and transport counters"""
+
+    __slots__ = [
+        "outcomes",
+        "latencies",
+        "total_latency",
+        "max_latency",
+        "wire_bytes",
+        "decoded_bytes",
+        "handshakes",
+        "reused_connections",
+        "ttfbs",
+        "token_refreshes",
+        "token_refresh_failures",
+        "token_refresh_latency",
+        "stale_responses",
+    ]
+
+    def __init__(self) -> None:
+        self.outcomes: Counter = Counter()
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.handshakes = 0
+        self.reused_connections = 0
+        self.ttfbs: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.token_refreshes = 0
+        self.token_refresh_failures = 0
+        self.token_refresh_latency = 0.0
+        self.stale_responses: Counter = Counter()
+
+
+class RequestMetrics:
+    """Registry of request metrics, per domain. An outcome is the HTTP status
+    code of the response, or the name of the exception raised by the attempt
+    """
+
+    def __init__(self) -> None:
+        self.domains: Dict[str, DomainMetrics] = {}
+
+    def record(self, domain: str, outcome: Any, latency: float) -> None:
+        """Record an attempt
+
+        Parameters
+        ----------
+        domain : str
+            domain to which the attempt was sent
+        outcome : Any
+            status code of the response, or name of the raised exception
+        latency : float
+            duration of the attempt, in seconds
+        """
+        metrics = self.__domain(domain)
+        metrics.outcomes[str(outcome)] += 1
+        metrics.latencies.append(latency)
+        metrics.total_latency += latency
+        metrics.max_latency = max(metrics.max_latency, latency)
+
+    def record_transfer(
+        self, domain: str, wire_bytes: int, decoded_bytes: int
+    ) -> None:
+        """Record the size of a received body
+
+        Parameters
+        ----------
+        domain : str
+            domain that sent the body
+        wire_bytes : int
+            size of the body on the wire, possibly compressed
+        decoded_bytes : int
+            size of the decoded body
+        """
+        metrics = self.__domain(domain)
+        metrics.wire_bytes += wire_bytes
+        metrics.decoded_bytes += decoded_bytes
+
+    def record_connection(
+        self, domain: str, reused: bool, ttfb: Optional[float] = None
+    ) -> None:
+        """Record the connection used by a request
+
+        Parameters
+        ----------
+        domain : str
+            domain to which the request was sent
+        reused : bool
+            `True` if an idle connection was reused, `False` if a new connection
+            was opened, which costs TCP and TLS handshakes
+        ttfb : float, optional
+            time to first byte of the response, in seconds
+        """
+        metrics = self.__domain(domain)
+        if reused:
+            metrics.reused_connections += 1
+        else:
+            metrics.handshakes += 1
+        if ttfb is not None:
+            metrics.ttfbs.append(ttfb)
+
+    def record_token_refresh(self, domain: str, success: bool, latency: float) -> None:
+        """Record the refresh of an authentification token
+
+        Parameters
+        ----------
+        domain : str
+            domain whose token was refreshed
+        success : bool
+            `True` if a new token was obtained
+        latency : float
+            duration of the refresh, in seconds
+        """
+        metrics = self.__domain(domain)
+        metrics.token_refreshes += 1
+        if not success:
+            metrics.token_refresh_failures += 1
+        metrics.token_refresh_latency += latency
+
+    def record_stale(self, domain: str, reason: str) -> None:
+        """Record a stale cached response served instead of a new one
+
+        Parameters
+        ----------
+        domain : str
+            domain of the web API
+        reason : str
+            why the stale response was served: `revalidate` while it is renewed
+            in the background, `error` if the request failed, `budget` if the
+            budget denied the request
+        """
+        self.__domain(domain).stale_responses[reason] += 1
+
+    def stats(self, domain: str) -> Dict[str, Any]:
+        """Return metrics of the specified domain
+
+        Parameters
+        ----------
+        domain : str
+            domain name
+
+        Returns
+        -------
+        Dict[str, Any]
+            number of attempts, attempts per outcome, mean and max latency,
+            median and 95th percentile of the latest latencies and times to first
+            byte, in seconds, received bytes, opened and reused connections,
+            number and mean duration of token refreshes, and stale responses
+            served per reason
+        """
+        metrics = self.domains.get(domain, DomainMetrics())
+        nb_attempts = sum(metrics.outcomes.values())
+        latencies = sorted(metrics.latencies)
+        ttfbs = sorted(metrics.ttfbs)
+        return {
+            "attempts": nb_attempts,
+            "outcomes": dict(metrics.outcomes),
+            "mean_latency": (
+                metrics.total_latency / nb_attempts if nb_attempts else 0.0
+            ),
+            "max_latency": metrics.max_latency,
+            "p50_latency": _percentile(latencies, 0.5),
+            "p95_latency": _percentile(latencies, 0.95),
+            "p50_ttfb": _percentile(ttfbs, 0.5),
+            "p95_ttfb": _percentile(ttfbs, 0.95),
+            "wire_bytes": metrics.wire_bytes,
+            "decoded_bytes": metrics.decoded_bytes,
+            "handshakes": metrics.handshakes,
+            "reused_connections": metrics.reused_connections,
+            "token_refreshes": metrics.token_refreshes,
+            "token_refresh_failures": metrics.token_refresh_failures,
+            "mean_token_refresh_latency": (
+                metrics.token_refresh_latency / metrics.token_refreshes
+                if metrics.token_refreshes
+                else 0.0
+            ),
+            "stale_responses": dict(metrics.stale_responses),
+        }
+
+    def __domain(self, domain: str) -> DomainMetrics:
+        """Return metrics of the specified domain, creating them if needed"""
+        metrics = self.domains.get(domain)
+        if metrics is None:
+            metrics = self.domains[domain] = DomainMetrics()
+        return metrics
+
+
+def _percentile(sorted_values: list, ratio: float) -> float:
+    """Return the specified percentile (nearest rank) of sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(ratio * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+# Registry shared by all handlers by default:
+request_metrics = RequestMetrics()
@@ -0,0 +1,61 @@
+"""Field projection module
+
+Web APIs such as Visual Crossing can be asked to only return some fields of
+their records. The fields needed by a view are the leaves of the targets passed
+to `APIHandler.get_data`, so the projection is derived from these targets and
+memoized: each view computes its projection once.
+"""
+
+from functools import lru_cache
+from typing import Iterable, Tuple, Union
+
+# Number of memoized (targets, excluded fields) couples:
+PROJECTION_CACHE_SIZE = 32
+
+
+def project_fields(
+    targets: Union[str, Iterable[str]], exclude: Iterable[str] = ()
+) -> Tuple[str, ...]:
+    """Return the fields to request from a web API to resolve the specified
+    targets: the last component of each target path which is not an index.
+    Only exact targets (resolved with a null tolerance) are guaranteed to be
+    found in the projected response
+
+    Parameters
+    ----------
+    targets : str | Iterable[str]
+        targets passed to `get_data`. If a dict is given, its keys are used
+    exclude : Iterable[str], optional
+        fields that are always returned by the web API, and can not be requested,
+        for example top-level fields of the response
+
+    Returns
+    -------
+    Tuple[str, ...]
+        fields to request, in the order of their first occurrence in targets
+
+    Examples
+    --------
+    >>> project_fields(["days/0/hours/3/precip", "days/0/temp", "address"], {"address"})
+    ('precip', 'temp')
+    """
+    if isinstance(targets, str):
+        targets = (targets,)
+    return _project_fields(tuple(targets), frozenset(exclude))
+
+
+@lru_cache(maxsize=PROJECTION_CACHE_SIZE)
+def _project_fields(
+    targets: Tuple[str, ...], exclude: frozenset
+) -> Tuple[str, ...]:
+    """Memoized implementation of `project_fields`"""
+    fields = {}
+    for target in targets:
+        components = [
+            component
+            for component in target.split("/")
+            if component and not component.isdigit()
+        ]
+        if components and components[-1] not in exclude:
+            fields[components[-1]] = None
+    return tuple(fields)
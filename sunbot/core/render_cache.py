@@ -0,0 +1,272 @@
+"""Render cache module
+
+Rendered images only depend on the data they display and on the layout of
+their card, so identical inputs produce identical images. `RenderCache` keeps
+encoded images under a stable hash of their inputs, computed by `render_key`,
+in memory and optionally in a directory, so images can be sent again without
+being rendered again, even after a restart of the bot.
+
+The memory is bounded in bytes and the least recently used images are evicted
+first. Each image of the directory is a file named after its key; the least
+recently used files are removed when the directory exceeds its size. If the
+directory can not be read or written, the cache keeps working in memory only.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Union
+
+# Default memory used by cached images, in bytes:
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# Default size of the images stored in the directory, in bytes:
+DEFAULT_MAX_DISK_BYTES = 128 * 1024 * 1024
+# Extension of the files of the directory:
+_SUFFIX = ".img"
+
+
+def render_key(card_type: str, fields: Mapping[str, Any], version: int) -> str:
+    """Return the key of an image, which is the same across restarts of the bot
+
+    Parameters
+    ----------
+    card_type : str
+        type of card, such as `current` or `daily`
+    fields : Mapping[str, Any]
+        data displayed by the card. Values must be encodable in JSON, or are
+        encoded as strings
+    version : int
+        version of the layout of the card, changed when the layout changes so
+        images rendered with the previous layout are no longer served
+
+    Returns
+    -------
+    str
+        SHA-256 digest of the inputs, in hexadecimal
+    """
+    encoded = json.dumps(
+        [card_type, version, fields], sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Encoded images, kept in memory and optionally in a directory. Hits in
+    each tier, misses and bytes of images served from the cache are counted and
+    can be retrieved with `stats`. Images can be looked up and stored from
+    several threads.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        maximum size of the images kept in memory, in bytes. Default to 32 MiB
+    path : str | Path, optional
+        directory where images are also stored, created if needed. Default to
+        None, images are only kept in memory
+    max_disk_bytes : int, optional
+        maximum size of the images stored in the directory, in bytes. Default to
+        128 MiB
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        path: Optional[Union[str, Path]] = None,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+    ) -> None:
+        if max_bytes <= 0:
+            raise ValueError(
+                f"Render cache size must be positive. Given value: {max_bytes}"
+            )
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.path = None if path is None else Path(path)
+        self.__images: "OrderedDict[str, bytes]" = OrderedDict()
+        self.__nbytes = 0
+        self.__lock = threading.Lock()
+        # Size of each file of the directory, from the least recently used:
+        self.__files: "OrderedDict[str, int]" = OrderedDict()
+        self.__disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if self.path is not None:
+            self.__scan()
+
+    def __scan(self) -> None:
+        """List the images of the directory, from the least recently used, and
+        remove the files left by writes interrupted by a stop of the bot"""
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            for tmp_path in self.path.glob("*.tmp"):
+                tmp_path.unlink()
+            files = sorted(
+                (entry.stat().st_mtime, entry.stem, entry.stat().st_size)
+                for entry in self.path.iterdir()
+                if entry.suffix == _SUFFIX
+            )
+        except OSError as err:
+            logging.error(
+                "Unable to open the render cache %s, images will only be cached"
+                " in memory: %s",
+                self.path,
+                err,
+            )
+            self.path = None
+            return
+        for _, key, size in files:
+            self.__files[key] = size
+            self.__disk_bytes += size
+        logging.info("%d rendered images found in %s", len(files), self.path)
+
+    def get(self, key: str, memory_only: bool = False) -> Optional[bytes]:
+        """Return the image stored under `key`, or None
+
+        Parameters
+        ----------
+        key : str
+            key of the image, as returned by `render_key`
+        memory_only : bool, optional
+            only look up the memory, without reading the directory, for instance
+            from the event loop. Such lookups do not count misses, as they are
+            expected to be followed by a full lookup. Default to False
+
+        Returns
+        -------
+        bytes | None
+            encoded image, or None if it is not cached
+        """
+        with self.__lock:
+            image = self.__images.get(key)
+            if image is not None:
+                self.__images.move_to_end(key)
+                self.memory_hits += 1
+                self.bytes_saved += len(image)
+                return image
+            if memory_only:
+                return None
+            on_disk = key in self.__files
+        image = self.__read(key) if on_disk else None
+        with self.__lock:
+            if image is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self.bytes_saved += len(image)
+            self.__insert(key, image)
+        return image
+
+    def set(self, key: str, image: bytes) -> None:
+        """Store `image` under `key`, in memory and in the directory
+
+        Parameters
+        ----------
+        key : str
+            key of the image, as returned by `render_key`
+        image : bytes
+            encoded image
+        """
+        with self.__lock:
+            self.__insert(key, image)
+            if self.path is None or key in self.__files:
+                return
+        self.__write(key, image)
+
+    def __insert(self, key: str, image: bytes) -> None:
+        """Keep `image` in memory as the most recently used one, and evict the
+        least recently used images while the memory budget is exceeded"""
+        if len(image) > self.max_bytes:
+            return
+        previous = self.__images.pop(key, None)
+        if previous is not None:
+            self.__nbytes -= len(previous)
+        self.__images[key] = image
+        self.__nbytes += len(image)
+        while self.__nbytes > self.max_bytes:
+            _, evicted = self.__images.popitem(last=False)
+            self.__nbytes -= len(evicted)
+            self.evictions += 1
+
+    def __read(self, key: str) -> Optional[bytes]:
+        """Read the image of `key` from the directory and mark it as recently
+        used, or return None if it can not be read"""
+        file_path = self.path / f"{key}{_SUFFIX}"
+        try:
+            image = file_path.read_bytes()
+            os.utime(file_path)
+        except OSError as err:
+            logging.warning(
+                "Unable to read the rendered image %s: %s", file_path, err
+            )
+            with self.__lock:
+                self.__disk_bytes -= self.__files.pop(key, 0)
+            return None
+        with self.__lock:
+            if key in self.__files:
+                self.__files.move_to_end(key)
+        return image
+
+    def __write(self, key: str, image: bytes) -> None:
+        """Write the image of `key` in the directory, then remove the least
+        recently used images while the directory exceeds its size"""
+        file_path = self.path / f"{key}{_SUFFIX}"
+        tmp_path = file_path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(image)
+            # A file is either complete or absent, even if the bot stops:
+            os.replace(tmp_path, file_path)
+        except OSError as err:
+            logging.warning(
+                "Unable to write the rendered image %s: %s", file_path, err
+            )
+            return
+        with self.__lock:
+            self.__disk_bytes += len(image) - self.__files.pop(key, 0)
+            self.__files[key] = len(image)
+            evicted = []
+            while self.__disk_bytes > self.max_disk_bytes and len(self.__files) > 1:
+                evicted_key, size = self.__files.popitem(last=False)
+                self.__disk_bytes -= size
+                self.disk_evictions += 1
+                evicted.append(evicted_key)
+        for evicted_key in evicted:
+            try:
+                (self.path / f"{evicted_key}{_SUFFIX}").unlink()
+            except OSError as err:
+                logging.warning(
+                    "Unable to remove the rendered image %s: %s", evicted_key, err
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters
+
+        Returns
+        -------
+        Dict[str, Any]
+            number and size of the images in memory and in the directory, hits
+            in memory and in the directory, misses, evictions, hit ratio and
+            bytes of images served from the cache
+        """
+        with self.__lock:
+            nb_hits = self.memory_hits + self.disk_hits
+            nb_lookups = nb_hits + self.misses
+            return {
+                "size": len(self.__images),
+                "bytes": self.__nbytes,
+                "disk_entries": len(self.__files),
+                "disk_bytes": self.__disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "hit_ratio": nb_hits / nb_lookups if nb_lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+            }
@@ -0,0 +1,311 @@
+"""Record and replay module
+
+Transports of `APIHandler` used to run the bot without web API:
+    - `RecordingTransport` sends attempts over the network and stores every
+      exchange in a corpus, secrets scrubbed
+    - `ReplayTransport` answers attempts with the responses of a corpus
+    - `SyntheticTransport` answers attempts with generated payloads
+Local transports can add a latency with jitter to their responses, drawn from
+a seeded generator, so benchmarks built on them are reproducible.
+
+A corpus is a JSON Lines file: each line holds the method and the scrubbed URL
+of a request, and the status code, content type and body of its response.
+Requests are matched on their method, path and query arguments, so a corpus
+recorded against a server can be replayed for another domain.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from sunbot.core.api_handler import APIResponse
+from sunbot.core.transport import Transport
+
+# Query arguments whose values are replaced before a request is stored:
+DEFAULT_SECRET_PARAMS = ("key", "apikey", "api_key", "token", "access_token")
+REDACTED = "REDACTED"
+
+
+def scrub_url(url: str, secret_params: Iterable[str] = DEFAULT_SECRET_PARAMS) -> str:
+    """Return the URL with the values of secret query arguments redacted
+
+    Parameters
+    ----------
+    url : str
+        request URL
+    secret_params : Iterable[str], optional
+        names of secret query arguments, case insensitive
+
+    Returns
+    -------
+    str
+        scrubbed URL
+    """
+    parts = urlsplit(url)
+    query = urlencode(_scrubbed_args(parts.query, secret_params), safe=",|:")
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+def exchange_key(
+    method: str, url: str, secret_params: Iterable[str] = DEFAULT_SECRET_PARAMS
+) -> Tuple[str, str, Tuple[Tuple[str, str], ...]]:
+    """Return the key matching a request with its recorded exchanges: method,
+    path and sorted query arguments, secrets redacted. The domain is not part of
+    the key"""
+    parts = urlsplit(url)
+    path = "/".join(part for part in unquote(parts.path).split("/") if part)
+    args = tuple(sorted(_scrubbed_args(parts.query, secret_params)))
+    return (method.upper(), path, args)
+
+
+def _scrubbed_args(
+    query: str, secret_params: Iterable[str]
+) -> List[Tuple[str, str]]:
+    """Return the decoded query arguments, secret values redacted"""
+    secrets = {name.casefold() for name in secret_params}
+    return [
+        (key, REDACTED if key.casefold() in secrets else value)
+        for key, value in parse_qsl(query, keep_blank_values=True)
+    ]
+
+
+class RecordingTransport(Transport):
+    """Transport sending attempts over the network and appending each exchange
+    to a corpus. Failed attempts (network errors) are not recorded
+
+    Parameters
+    ----------
+    path : str
+        path of the corpus, created if needed
+    secret_params : Iterable[str], optional
+        names of the query arguments redacted before storage. Default to the
+        usual names of API keys and tokens
+    """
+
+    def __init__(
+        self, path: str, secret_params: Iterable[str] = DEFAULT_SECRET_PARAMS
+    ) -> None:
+        self.path = path
+        self.secret_params = tuple(secret_params)
+        self.nb_recorded = 0
+        self.__lock = threading.Lock()
+
+    def send(self, method: str, url: str, forward: Callable[[str, str], Any]) -> Any:
+        response = forward(method, url)
+        self.record(method, url, response)
+        return response
+
+    async def asend(self, method: str, url: str, forward) -> APIResponse:
+        response = await forward(method, url)
+        self.record(method, url, response)
+        return response
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        response: Union[requests.Response, APIResponse],
+    ) -> None:
+        """Append an exchange to the corpus
+
+        Parameters
+        ----------
+        method : str
+            request method
+        url : str
+            request URL, secrets included
+        response : requests.Response | APIResponse
+            response to the request, whose body is already decoded
+        """
+        exchange = {
+            "method": method,
+            "url": scrub_url(url, self.secret_params),
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", ""),
+        }
+        try:
+            exchange["body"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            exchange["body_b64"] = base64.b64encode(response.content).decode()
+        line = json.dumps(exchange, ensure_ascii=False) + "\n"
+        with self.__lock:
+            with open(self.path, "a", encoding="utf-8") as corpus:
+                corpus.write(line)
+            self.nb_recorded += 1
+
+
+class _LocalTransport(Transport):
+    """Transport answering attempts without network, after a simulated latency
+
+    Parameters
+    ----------
+    latency : float, optional
+        mean latency of the responses, in seconds. Default to 0
+    jitter : float, optional
+        maximum deviation from `latency`, drawn uniformly, in seconds. Default to 0
+    seed : int, optional
+        seed of the generator drawing the jitter
+    """
+
+    uses_network = False
+
+    def __init__(
+        self, latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+    def send(self, method: str, url: str, forward: Callable[[str, str], Any]) -> Any:
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+        return self.respond(method, url)
+
+    async def asend(self, method: str, url: str, forward) -> APIResponse:
+        delay = self.delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.respond(method, url)
+
+    def delay(self) -> float:
+        """Return the latency of the next response, in seconds"""
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def respond(self, method: str, url: str) -> APIResponse:
+        """Return the response to an attempt"""
+        raise NotImplementedError
+
+    @staticmethod
+    def not_found(url: str, message: str) -> APIResponse:
+        """Return a 404 response, for attempts that can not be answered"""
+        return APIResponse(
+            404,
+            {"Content-Type": "application/json"},
+            json.dumps({"message": message}).encode(),
+            url,
+        )
+
+
+class ReplayTransport(_LocalTransport):
+    """Transport answering attempts with the responses of a corpus. When a
+    request was recorded several times, its responses are served in turn.
+    Requests missing from the corpus are answered with 404 responses
+
+    Parameters
+    ----------
+    path : str
+        path of the corpus
+    latency : float, optional
+        mean latency of the responses, in seconds. Default to 0
+    jitter : float, optional
+        maximum deviation from `latency`, in seconds. Default to 0
+    seed : int, optional
+        seed of the generator drawing the jitter
+    secret_params : Iterable[str], optional
+        names of the query arguments redacted in the corpus
+    """
+
+    def __init__(
+        self,
+        path: str,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: Optional[int] = None,
+        secret_params: Iterable[str] = DEFAULT_SECRET_PARAMS,
+    ) -> None:
+        super().__init__(latency, jitter, seed)
+        self.path = path
+        self.secret_params = tuple(secret_params)
+        self.hits = 0
+        self.misses = 0
+        self.__exchanges: Dict[Tuple, List[Tuple[int, str, bytes]]] = defaultdict(
+            list
+        )
+        self.__next: Dict[Tuple, int] = defaultdict(int)
+        with open(path, encoding="utf-8") as corpus:
+            for line in corpus:
+                if line.strip():
+                    self.__load(json.loads(line))
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self.__exchanges.values())
+
+    def __load(self, exchange: Dict[str, Any]) -> None:
+        """Add an exchange of the corpus"""
+        if "body_b64" in exchange:
+            body = base64.b64decode(exchange["body_b64"])
+        else:
+            body = exchange.get("body", "").encode("utf-8")
+        key = exchange_key(exchange["method"], exchange["url"], self.secret_params)
+        self.__exchanges[key].append(
+            (exchange["status"], exchange.get("content_type", ""), body)
+        )
+
+    def respond(self, method: str, url: str) -> APIResponse:
+        key = exchange_key(method, url, self.secret_params)
+        responses = self.__exchanges.get(key)
+        if not responses:
+            self.misses += 1
+            logging.warning(
+                "No recorded response for %s %s",
+                method,
+                scrub_url(url, self.secret_params),
+            )
+            return self.not_found(url, "No recorded response")
+        self.hits += 1
+        idx = self.__next[key]
+        self.__next[key] = (idx + 1) % len(responses)
+        status, content_type, body = responses[idx]
+        return APIResponse(status, {"Content-Type": content_type}, body, url)
+
+
+class SyntheticTransport(_LocalTransport):
+    """Transport answering attempts with JSON payloads built by a factory, for
+    instance `sunbot.apis.weather.synthetic.SyntheticTimelines`. Payloads are
+    encoded, so responses are decoded like real ones
+
+    Parameters
+    ----------
+    payload_factory : Callable[[str, str], Any]
+        function returning the payload answering a request from its method and
+        URL, or None if the request can not be answered
+    latency : float, optional
+        mean latency of the responses, in seconds. Default to 0
+    jitter : float, optional
+        maximum deviation from `latency`, in seconds. Default to 0
+    seed : int, optional
+        seed of the generator drawing the jitter
+    """
+
+    def __init__(
+        self,
+        payload_factory: Callable[[str, str], Any],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        super().__init__(latency, jitter, seed)
+        self.payload_factory = payload_factory
+
+    def respond(self, method: str, url: str) -> APIResponse:
+        payload = self.payload_factory(method, url)
+        if payload is None:
+            return self.not_found(url, "No synthetic payload")
+        return APIResponse(
+            200,
+            {"Content-Type": "application/json"},
+            json.dumps(payload).encode(),
+            url,
+        )
@@ -0,0 +1,213 @@
+"""Resilience module
+
+`RetryPolicy` decides whether and when a failed request is sent again, using
+exponential backoff with full jitter and honoring `Retry-After` headers.
+`CircuitBreaker` stops sending requests to a web API that keeps failing: while
+the circuit is open, requests fail fast, then a few probe requests are allowed
+(half-open state) to detect the recovery of the web API.
+"""
+
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterable, Mapping, Optional
+
+# Circuit breaker states:
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryPolicy:
+    """Retry policy of an `APIHandler`. The delay before the n-th retry is drawn
+    uniformly between 0 and `min(max_delay, base_delay * multiplier ** (n - 1))`
+    (full jitter), unless the web API indicates a delay with `Retry-After`
+
+    Parameters
+    ----------
+    max_attempts : int, optional
+        maximum number of attempts for a request, first one included. Default to 3
+    base_delay : float, optional
+        upper bound of the delay before the first retry, in seconds. Default to 0.5
+    max_delay : float, optional
+        upper bound of the delays, in seconds. Default to 10
+    multiplier : float, optional
+        growth factor of the delay upper bound between two retries. Default to 2
+    retry_statuses : Iterable[int], optional
+        HTTP status codes for which a request is retried. Default to 429 and
+        5xx codes caused by unavailable or overloaded servers
+    retry_methods : Iterable[str], optional
+        methods of the requests that can be retried. Default to GET only, as
+        other methods may not be idempotent
+    max_retry_after : float, optional
+        maximum delay accepted from a `Retry-After` header, in seconds. Requests
+        are not retried if the web API asks to wait longer. Default to 30
+    rng : random.Random, optional
+        random generator used for jitter
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        multiplier: float = 2.0,
+        retry_statuses: Iterable[int] = DEFAULT_RETRY_STATUSES,
+        retry_methods: Iterable[str] = ("GET",),
+        max_retry_after: float = 30.0,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError(
+                f"At least one attempt is needed. Given value: {max_attempts}"
+            )
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_methods = frozenset(retry_methods)
+        self.max_retry_after = max_retry_after
+        self.rng = rng if rng is not None else random.Random()
+
+    def can_retry(self, method: str, attempt: int) -> bool:
+        """Return whether a request sent with `method` can be retried after its
+        `attempt`-th attempt (starting from 1)"""
+        return method in self.retry_methods and attempt < self.max_attempts
+
+    def should_retry_status(self, status_code: int) -> bool:
+        """Return whether a response with the specified status code is retried"""
+        return status_code in self.retry_statuses
+
+    def delay(
+        self, attempt: int, headers: Optional[Mapping[str, str]] = None
+    ) -> Optional[float]:
+        """Return the delay before the retry following the `attempt`-th attempt,
+        in seconds, or None if the web API asked to wait longer than
+        `max_retry_after`
+
+        Parameters
+        ----------
+        attempt : int
+            number of the failed attempt, starting from 1
+        headers : Mapping[str, str], optional
+            headers of the failed response, if any
+
+        Returns
+        -------
+        float | None
+            delay before the next attempt
+        """
+        retry_after = self.parse_retry_after(headers)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        upper_bound = min(
+            self.max_delay, self.base_delay * self.multiplier ** (attempt - 1)
+        )
+        return self.rng.uniform(0, upper_bound)
+
+    @staticmethod
+    def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+        """Return the delay indicated by the `Retry-After` header, which can be a
+        number of seconds or an HTTP date, or None if there is no valid header"""
+        if not headers:
+            return None
+        value = headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            logging.warning("Invalid Retry-After header: %s", value)
+            return None
+
+
+class CircuitBreaker:
+    """Circuit breaker of a web API domain. After `failure_threshold` consecutive
+    failures, the circuit opens and requests are rejected for `recovery_timeout`
+    seconds. The circuit is then half-open: up to `half_open_max_calls` probe
+    requests are allowed, and the circuit closes after a successful probe or
+    opens again after a failed one
+
+    Parameters
+    ----------
+    name : str
+        name of the protected domain, used in logs
+    failure_threshold : int, optional
+        number of consecutive failures opening the circuit. Default to 5
+    recovery_timeout : float, optional
+        time during which the circuit stays open, in seconds. Default to 30
+    half_open_max_calls : int, optional
+        number of concurrent probe requests allowed while half-open. Default to 1
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.monotonic`
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.failures = 0
+        self.rejected = 0
+        self.__state = CLOSED
+        self.__opened_at = 0.0
+        self.__probes = 0
+
+    @property
+    def state(self) -> str:
+        """Current state of the circuit: `closed`, `open` or `half_open`"""
+        if (
+            self.__state == OPEN
+            and self.clock() - self.__opened_at >= self.recovery_timeout
+        ):
+            self.__state = HALF_OPEN
+            self.__probes = 0
+            logging.info("Circuit of %s is half-open, probing", self.name)
+        return self.__state
+
+    def allow(self) -> bool:
+        """Return whether a request can be sent now. A request allowed while the
+        circuit is half-open is a probe, whose outcome must be recorded with
+        `record_success` or `record_failure`"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self.__probes < self.half_open_max_calls:
+            self.__probes += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful request"""
+        if self.__state != CLOSED:
+            logging.info("Circuit of %s is closed", self.name)
+        self.__state = CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed request"""
+        self.failures += 1
+        if self.__state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.__state != OPEN:
+                logging.warning(
+                    "Circuit of %s is open after %d failures", self.name, self.failures
+                )
+            self.__state = OPEN
+            self.__opened_at = self.clock()
@@ -0,0 +1,96 @@
+"""Target resolution module
+
+`APIHandler.get_data` looks for each target among the keys of the flattened
+response. Responses of the same request share the same keys (their "shape"),
+so the target -> keys resolution is compiled once per shape and memoized:
+repeated calls become direct lookups.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Mapping, Tuple
+
+from sunbot.utils.utils import get_best_items_batch
+
+# Number of compiled (shape, targets) couples kept in memory:
+RESOLVER_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=RESOLVER_CACHE_SIZE)
+def compile_targets(
+    keys: Tuple[str, ...], targets: Tuple[str, ...], tolerance: float = 0.0
+) -> Dict[str, Tuple[str, ...]]:
+    """Return, for each target, the keys of a response with the specified `keys`
+    that match the target. A target that is one of the keys only matches itself
+    (with a null tolerance, an exact key is always the unique best fuzzy match),
+    so fuzzy matching is only run, in a single batch, for targets that do not
+    resolve exactly
+
+    Parameters
+    ----------
+    keys : Tuple[str, ...]
+        keys of the flattened response, which define its shape
+    targets : Tuple[str, ...]
+        targets to resolve
+    tolerance : float, optional
+        tolerance applied on fuzzy matching scores. Default to 0
+
+    Returns
+    -------
+    Dict[str, Tuple[str, ...]]
+        matching keys for each target
+    """
+    key_set = frozenset(keys)
+    compiled = {}
+    fuzzy_targets = []
+    for target in targets:
+        if tolerance == 0.0 and target in key_set:
+            compiled[target] = (target,)
+        else:
+            compiled[target] = ()
+            fuzzy_targets.append(target)
+    if fuzzy_targets:
+        matches = get_best_items_batch(dict.fromkeys(keys), fuzzy_targets, tolerance)
+        for target, items in matches.items():
+            compiled[target] = tuple(items)
+    return compiled
+
+
+def resolve_targets(
+    flattened: Mapping[str, Any], targets: Iterable[str], tolerance: float = 0.0
+) -> Dict[str, Dict[str, Any]]:
+    """Return, for each target, the items of the flattened response that match
+    the target. Targets that are paths of the response are directly looked up, so
+    keys of the response are only enumerated if some targets need fuzzy matching
+
+    Parameters
+    ----------
+    flattened : Mapping[str, Any]
+        flattened response, or a `PathView` over the response
+    targets : Iterable[str]
+        targets to resolve
+    tolerance : float, optional
+        tolerance applied on fuzzy matching scores. Default to 0
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        matching items for each target
+    """
+    targets = tuple(targets)
+    exact = {}
+    if tolerance == 0.0:
+        exact = {
+            target: {target: flattened[target]}
+            for target in targets
+            if target in flattened
+        }
+    fuzzy_targets = tuple(target for target in targets if target not in exact)
+    compiled = {}
+    if fuzzy_targets:
+        compiled = compile_targets(tuple(flattened), fuzzy_targets, tolerance)
+    return {
+        target: exact[target]
+        if target in exact
+        else {key: flattened[key] for key in compiled[target]}
+        for target in targets
+    }
@@ -0,0 +1,85 @@
+"""Request coalescing module"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing the same key: while a call for a key
+    is in flight, further calls for this key wait for its result instead of
+    starting their own. The shared call runs in its own task, so cancelling one
+    of the waiters does not cancel the call for the others.
+
+    Only coroutines are supported: blocking calls made from several threads are
+    not coalesced.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        # Number of calls that actually ran, and number of calls that joined
+        # a call already in flight:
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `func` unless a call with the same `key` is already in flight, and
+        return its result. If the call raises an exception, it is raised to all
+        the waiters
+
+        Parameters
+        ----------
+        key : Hashable
+            key identifying identical calls
+        func : Callable[[], Awaitable[Any]]
+            function returning the awaitable to run
+
+        Returns
+        -------
+        Any
+            result of the call
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done_task: self.__forget(key, done_task))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if key in self._waiters and self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def __forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Remove the finished call from in-flight calls"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+        # Retrieve the exception, so it is not reported as never retrieved when
+        # all the waiters were cancelled:
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> Dict[Hashable, int]:
+        """Return the number of waiters of each call currently in flight"""
+        return dict(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters
+
+        Returns
+        -------
+        Dict[str, Any]
+            number of calls that ran, number of coalesced calls, and current
+            waiters per in-flight key
+        """
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": {str(key): nb for key, nb in self._waiters.items()},
+        }
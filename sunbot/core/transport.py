@@ -0,0 +1,145 @@
+"""HTTP transport module
+
+Helpers used by `APIHandler` to negotiate compressed responses, decode them,
+and observe connections of the asynchronous session: number of handshakes,
+reused connections and time to first byte are recorded per domain.
+
+`Transport` is the extension point through which every attempt of an
+`APIHandler` goes: the default transport sends it over the network, other ones
+record it or answer it locally, see `sunbot.core.replay`.
+"""
+
+import time
+import zlib
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+
+from sunbot.core.metrics import RequestMetrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, responses are then negotiated without br
+    brotli = None
+
+# Content codings accepted from web APIs, br requires the brotli package:
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+
+def decode_body(raw: bytes, content_encoding: Optional[str]) -> bytes:
+    """Decode a response body received with the specified `Content-Encoding`.
+    The whole body is decoded at once, which is faster than decoding it chunk
+    by chunk while it is received
+
+    Parameters
+    ----------
+    raw : bytes
+        body as received on the wire
+    content_encoding : str | None
+        value of the `Content-Encoding` header of the response
+
+    Returns
+    -------
+    bytes
+        decoded body
+
+    Raises
+    ------
+    ValueError
+        if the content coding is not supported
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding in ("identity", "") or not raw:
+        return raw
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompress(raw, wbits=16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        # Some servers send raw deflate streams instead of zlib ones:
+        try:
+            return zlib.decompress(raw)
+        except zlib.error:
+            return zlib.decompress(raw, wbits=-zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return brotli.decompress(raw)
+    raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+
+def connection_trace_config(
+    metrics: RequestMetrics, domain: str
+) -> aiohttp.TraceConfig:
+    """Return a trace configuration recording, for each request of an `aiohttp`
+    session, whether a new connection was opened (TCP and TLS handshakes) or an
+    idle one was reused, and the time to first byte
+
+    Parameters
+    ----------
+    metrics : RequestMetrics
+        registry where connection metrics are recorded
+    domain : str
+        domain under which metrics are recorded
+
+    Returns
+    -------
+    aiohttp.TraceConfig
+        trace configuration to pass to the session
+    """
+
+    async def on_request_start(_session, context: SimpleNamespace, _params) -> None:
+        context.start = time.perf_counter()
+
+    async def on_connection_create_end(_session, context: SimpleNamespace, _params):
+        context.new_connection = True
+
+    async def on_request_end(_session, context: SimpleNamespace, _params) -> None:
+        # Called when response headers are received:
+        metrics.record_connection(
+            domain,
+            reused=not getattr(context, "new_connection", False),
+            ttfb=time.perf_counter() - context.start,
+        )
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+
+class Transport:
+    """Transport of the attempts of an `APIHandler`. Each attempt is given with
+    `forward`, the function sending it over the network through the pooled
+    sessions of the handler: this default transport simply calls it. Subclasses
+    can record attempts, or answer them without calling `forward`.
+
+    Transports answering locally set `uses_network` to False, so the handler
+    does not open connections in advance.
+    """
+
+    uses_network = True
+
+    def send(self, method: str, url: str, forward: Callable[[str, str], Any]) -> Any:
+        """Send an attempt of the synchronous path
+
+        Parameters
+        ----------
+        method : str
+            request method
+        url : str
+            request URL, authentification arguments included
+        forward : Callable[[str, str], requests.Response]
+            function sending the attempt over the network
+
+        Returns
+        -------
+        requests.Response | APIResponse
+            response to the attempt
+        """
+        return forward(method, url)
+
+    async def asend(
+        self, method: str, url: str, forward: Callable[[str, str], Awaitable[Any]]
+    ) -> Any:
+        """Asynchronous version of `send`, whose `forward` function returns an
+        `APIResponse`"""
+        return await forward(method, url)
@@ -0,0 +1,283 @@
+"""Cache warming module
+
+`CacheWarmer` tracks how often each key (for instance a location) is
+requested, with counters decaying exponentially over time, and refreshes the
+cached data of the most popular keys shortly before it expires. The first user
+requesting a popular key after an expiry is then served from the cache instead
+of waiting for the web API.
+
+A refresh is billed even if nobody requests the refreshed data, while a miss is
+only billed when a user requests the key. Keys whose current data was not
+requested enough are therefore not refreshed, so that refreshes do not cost
+more than the misses they avoid.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sunbot.core.budget import APIBudget, Priority
+
+# Counters below this value are forgotten:
+PRUNE_THRESHOLD = 0.1
+
+
+class DecayingCounter:
+    """Counters whose value is divided by two every `half_life` seconds
+
+    Parameters
+    ----------
+    half_life : float
+        half-life of the counters, in seconds
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.time`
+    """
+
+    def __init__(
+        self, half_life: float, clock: Callable[[], float] = time.time
+    ) -> None:
+        if half_life <= 0:
+            raise ValueError(f"Half-life must be positive. Given value: {half_life}")
+        self.half_life = half_life
+        self.clock = clock
+        # Value of each counter, and date of its last update:
+        self.__counters: Dict[str, Tuple[float, float]] = {}
+
+    def add(self, key: str, amount: float = 1.0) -> float:
+        """Add `amount` to the counter of `key` and return its new value"""
+        value = self.get(key) + amount
+        self.__counters[key] = (value, self.clock())
+        return value
+
+    def get(self, key: str) -> float:
+        """Return the current value of the counter of `key`"""
+        value, updated_at = self.__counters.get(key, (0.0, 0.0))
+        if not value:
+            return 0.0
+        return value * math.pow(2.0, -(self.clock() - updated_at) / self.half_life)
+
+    def top(self, k: int, min_value: float = 0.0) -> List[Tuple[str, float]]:
+        """Return the `k` keys with the highest counters, at least equal to
+        `min_value`, with their value"""
+        values = [(key, self.get(key)) for key in self.__counters]
+        values = [(key, value) for key, value in values if value >= min_value]
+        values.sort(key=lambda item: item[1], reverse=True)
+        return values[:k]
+
+    def prune(self, threshold: float = PRUNE_THRESHOLD) -> List[str]:
+        """Forget the counters below `threshold` and return their keys"""
+        pruned = [key for key in self.__counters if self.get(key) < threshold]
+        for key in pruned:
+            del self.__counters[key]
+        return pruned
+
+    def discard(self, key: str) -> None:
+        """Forget the counter of `key`"""
+        self.__counters.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.__counters)
+
+
+class CacheWarmer:
+    """Background refresher of the cached data of the most requested keys. Each
+    round, the `top_k` keys whose popularity is at least `min_score` are
+    refreshed if their cached data expires within `lead_time` seconds.
+
+    A key is only refreshed if its current cached data was requested at least
+    `min_recent_hits` times: data renewed by a miss or by the warmer and not
+    requested since then would most likely expire unused again.
+
+    Refreshes are requested with the `refresh` function, which is expected to
+    send them with the `Priority.PREFETCH` class. They are skipped while the
+    records left in `budget` are within the reserve of this class, so that the
+    budget of the web API keeps its reserve for users. A key whose refresh failed
+    (budget denial, unknown location...) is forgotten until it is requested
+    again, and rounds are skipped while `pause` returns True.
+
+    Parameters
+    ----------
+    refresh : Callable[[str], Awaitable[Any]]
+        coroutine function renewing the cached data of a key
+    expires_in : Callable[[str], Optional[float]]
+        function returning the time before the cached data of a key expires, in
+        seconds, or None if nothing is cached for this key
+    top_k : int, optional
+        maximum number of keys refreshed per round. Default to 5
+    lead_time : float, optional
+        time before the expiration from which cached data is refreshed, in
+        seconds. Must be longer than `interval`. Default to 90
+    interval : float, optional
+        time between two rounds, in seconds. Default to 60
+    half_life : float, optional
+        half-life of the popularity counters, in seconds. Default to one hour
+    min_score : float, optional
+        minimum popularity of a warmed key. Default to 2, so a key requested
+        once is never warmed
+    min_recent_hits : int, optional
+        minimum number of requests served by the current cached data of a key
+        for it to be refreshed. Default to 1
+    budget : APIBudget, optional
+        budget of the web API billing refreshes. If None, refreshes are only
+        limited by the `refresh` function
+    pause : Callable[[], bool], optional
+        function returning True while the warmer must stay idle
+    clock : Callable[[], float], optional
+        function returning current time in seconds. Default to `time.time`
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[str], Awaitable[Any]],
+        expires_in: Callable[[str], Optional[float]],
+        top_k: int = 5,
+        lead_time: float = 90.0,
+        interval: float = 60.0,
+        half_life: float = 3600.0,
+        min_score: float = 2.0,
+        min_recent_hits: int = 1,
+        budget: Optional[APIBudget] = None,
+        pause: Callable[[], bool] = lambda: False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.refresh = refresh
+        self.expires_in = expires_in
+        self.top_k = top_k
+        self.lead_time = lead_time
+        self.interval = interval
+        self.min_score = min_score
+        self.min_recent_hits = min_recent_hits
+        self.budget = budget
+        self.pause = pause
+        self.clock = clock
+        self.popularity = DecayingCounter(half_life, clock)
+        # Last name used for each key, keys being case insensitive:
+        self.__names: Dict[str, str] = {}
+        # Keys whose cached data was refreshed by the warmer and not requested yet,
+        # with the expiration date of the data they replaced:
+        self.__warmed: Dict[str, float] = {}
+        # Requests served by the current cached data of each key:
+        self.__recent_hits: Dict[str, int] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.warmed_hits = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.unrequested_skips = 0
+        self.budget_skips = 0
+        self.paused_rounds = 0
+
+    def record(self, name: str) -> None:
+        """Record a user request for `name`, before it is served. Whether it will
+        be served from the cache is recorded to compute the hit ratio
+
+        Parameters
+        ----------
+        name : str
+            requested key, for instance a location name
+        """
+        key = name.casefold()
+        self.__names[key] = name
+        self.popularity.add(key)
+        self.lookups += 1
+        expires_in = self.expires_in(name)
+        # Requests before the expiration of the replaced data would have hit the
+        # cache anyway, the first one after it would have missed:
+        replaced_expiration = self.__warmed.get(key)
+        warmed = replaced_expiration is not None and self.clock() >= replaced_expiration
+        if warmed:
+            del self.__warmed[key]
+        if expires_in is None or expires_in <= 0:
+            # The request renews the cached data, which served nobody yet:
+            self.__recent_hits[key] = 0
+        else:
+            self.hits += 1
+            self.__recent_hits[key] = self.__recent_hits.get(key, 0) + 1
+            if warmed:
+                self.warmed_hits += 1
+
+    async def run_once(self) -> int:
+        """Run a warming round
+
+        Returns
+        -------
+        int
+            number of refreshed keys
+        """
+        if self.pause():
+            self.paused_rounds += 1
+            return 0
+        nb_refreshed = 0
+        for key, _ in self.popularity.top(self.top_k, self.min_score):
+            name = self.__names[key]
+            expires_in = self.expires_in(name)
+            if expires_in is None or expires_in > self.lead_time:
+                continue
+            if self.__recent_hits.get(key, 0) < self.min_recent_hits:
+                self.unrequested_skips += 1
+                continue
+            if self.budget is not None and not self.budget.available(
+                Priority.PREFETCH
+            ):
+                self.budget_skips += 1
+                break
+            await self.refresh(name)
+            # A denied refresh may still return the stale data, so the refresh is
+            # checked on the cache:
+            renewed_expires_in = self.expires_in(name)
+            if renewed_expires_in is None or renewed_expires_in <= expires_in:
+                self.failures += 1
+                logging.info("Cache warming of %s failed, it is forgotten", name)
+                self.popularity.discard(key)
+                continue
+            self.refreshes += 1
+            self.__warmed[key] = self.clock() + expires_in
+            self.__recent_hits[key] = 0
+            nb_refreshed += 1
+        for key in self.popularity.prune():
+            self.__names.pop(key, None)
+            self.__warmed.pop(key, None)
+            self.__recent_hits.pop(key, None)
+        return nb_refreshed
+
+    async def run(self) -> None:
+        """Run warming rounds every `interval` seconds, until cancelled"""
+        try:
+            logging.info("Starting cache warming task")
+            while True:
+                await asyncio.sleep(self.interval)
+                nb_refreshed = await self.run_once()
+                if nb_refreshed:
+                    logging.info("%d popular cache entries refreshed", nb_refreshed)
+        except asyncio.CancelledError:
+            logging.info("Stopping the cache warming task")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return warmer counters
+
+        Returns
+        -------
+        Dict[str, Any]
+            number of recorded requests, cache hits, hits on entries refreshed by
+            the warmer, hit ratio and its part due to the warmer, refreshes,
+            failed refreshes, refreshes skipped as the cached data was not
+            requested enough or as the budget kept its reserve, paused rounds and
+            tracked keys
+        """
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "warmed_hits": self.warmed_hits,
+            "hit_ratio": self.hits / self.lookups if self.lookups else 0.0,
+            "hit_ratio_gain": (
+                self.warmed_hits / self.lookups if self.lookups else 0.0
+            ),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "unrequested_skips": self.unrequested_skips,
+            "budget_skips": self.budget_skips,
+            "paused_rounds": self.paused_rounds,
+            "tracked": len(self.popularity),
+        }
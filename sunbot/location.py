@@ -10,6 +10,28 @@ from operator import itemgetter
 import pytz
 
 
+def normalize_location_name(location_name: str) -> str:
+    """Return the normalized form of a location name: case insensitive, without
+    leading, trailing nor repeated whitespaces
+
+    Parameters
+    ----------
+    location_name : str
+        location name, as typed by a user
+
+    Returns
+    -------
+    str
+        normalized name
+
+    Examples
+    --------
+    >>> normalize_location_name("  Saint  Jean ")
+    'saint jean'
+    """
+    return " ".join(location_name.split()).casefold()
+
+
 class Location(tuple):
     """Define a location. This class is a subclass of tuple, so it is immutable
     and can be used in dictionnary as key
@@ -24,13 +46,16 @@ class Location(tuple):
         return tuple.__new__(cls, (location_name, location_tz))
 
     def __eq__(self, __value: object) -> bool:
-        """Compare this location"""
+        """Compare this location. Names differing only by case or whitespaces
+        designate the same location"""
         if type(__value) != type(self):
             return False
-        return self.name == __value.name
+        return normalize_location_name(self.name) == normalize_location_name(
+            __value.name
+        )
 
     def __hash__(self) -> int:
-        return self.name.__hash__()
+        return normalize_location_name(self.name).__hash__()
 
     # Properties
     name: str = property(itemgetter(0))
@@ -4,12 +4,10 @@
 
 # Path constants:
 ICON_DIR_PATH = "./Data/Images/Icons/"
-DAILY_IMAGE_PATH = "./Data/Images/"
-CURRENT_WEATHER_IMAGE_PATH = "./Data/Images/"
 FONT_PATH = "./Data/Font/Ubuntu-R.ttf"
 
 
-# File name constants:
+# Names of the weather images attached to messages:
 DAILY_IMAGE_NAME = "dailyImage.png"
 CURRENT_WEATHER_IMAGE_NAME = "currentWeather.png"
 
@@ -42,6 +40,58 @@ DAILY_WEATHER_SEND_HOUR = 7
 
 PERIODS = {"aujourd'hui": "today", "demain": "tomorrow"}
 
+# Maximum number of weather API responses kept in memory:
+API_CACHE_MAX_SIZE = 512
+# Maximum size of the weather API responses saved on the disk, in bytes, and time
+# they are kept after their expiration to be served as stale responses (s):
+API_CACHE_MAX_BYTES = 64 * 1024 * 1024
+API_CACHE_RETENTION = 12 * 60 * 60
+
+# Visual Crossing budget: records billed per day, and allowed request rate:
+VC_DAILY_QUOTA = 1000
+API_REQUEST_RATE = 1.0  # requests per second, on average
+API_REQUEST_BURST = 30
+# Number of connections opened to the weather API when the bot starts:
+API_WARM_CONNECTIONS = 2
+
+# Weather provider router: time after which a command is served by the next
+# provider (s), and error rate and 95th percentile latency (s) above which a
+# provider is only used when the other ones fail:
+ROUTER_TIMEOUT = 8.0
+ROUTER_MAX_ERROR_RATE = 0.5
+ROUTER_MAX_LATENCY = 3.0
+
+# Memory used by the backgrounds and icons decoded for weather images, in bytes:
+ASSET_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Number of weather card templates kept in memory (about 3 MB each), and zlib
+# compression level of weather images: level 1 encodes them about 3 times faster
+# than the default level 6, for files about 10 % bigger:
+CARD_TEMPLATES_MAX_SIZE = 24
+IMAGE_COMPRESS_LEVEL = 1
+
+# Encoded weather images kept in memory and on the disk, in bytes:
+RENDER_CACHE_MAX_BYTES = 32 * 1024 * 1024
+RENDER_CACHE_MAX_DISK_BYTES = 128 * 1024 * 1024
+
+# Render workers: number of threads, images waiting for a worker beyond which
+# commands are refused, and time allowed to render an image (s). One thread keeps
+# renders off the event loop, more do not render faster:
+RENDER_WORKERS = 1
+RENDER_MAX_QUEUE = 16
+RENDER_TIMEOUT = 5.0
+
+# Cache warmer: number of popular locations refreshed per round, time between
+# rounds and refresh lead time before expiry (s), popularity half-life (s):
+WARMER_TOP_K = 5
+WARMER_INTERVAL = 60
+WARMER_LEAD_TIME = 90
+WARMER_HALF_LIFE = 60 * 60
+# A location is only refreshed if its cached snapshot served this many requests:
+WARMER_MIN_RECENT_HITS = 1
+# The warmer stays idle this many minutes before and after daily weather sending:
+WARMER_DAILY_MARGIN = 15
+
 # ===================================
 #       DECORATORS DECLARATION
 # ===================================
@@ -0,0 +1,136 @@
+"""path_view.py"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_MISSING = object()
+
+
+def _is_branch(value: Any) -> bool:
+    """Return whether `value` is walked through, following `flatten_dict`
+    conventions: dicts and lists of dicts are branches, other values are leaves"""
+    if isinstance(value, dict):
+        return True
+    return isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict)
+
+
+def _children(value: Any) -> Iterator[Tuple[str, Any]]:
+    """Iterate over (key, child) couples of a branch"""
+    if isinstance(value, dict):
+        return iter(value.items())
+    return ((str(idx), child) for idx, child in enumerate(value))
+
+
+class PathView(Mapping):
+    """Read-only, lazy view over a nested structure (e.g. a parsed JSON response)
+    addressed by paths such as `days/0/hours/3/precip`. The view has the same keys
+    and values as the dict returned by `flatten_dict` for the same structure, but
+    nothing is copied: paths are resolved on demand and keys are iterated lazily.
+
+    Parameters
+    ----------
+    root : dict
+        nested structure to view
+    sep : str, optional
+        separator between path components. Default to `/`
+    """
+
+    def __init__(self, root: Dict[str, Any], sep: str = "/") -> None:
+        self.root = root
+        self.sep = sep
+
+    def node(self, path: str, default: Any = None) -> Any:
+        """Return the node at the specified path, which can be a leaf or a branch,
+        or `default` if the path does not exist
+
+        Parameters
+        ----------
+        path : str
+            path to the node
+        default : Any, optional
+            value returned if the path does not exist
+
+        Returns
+        -------
+        Any
+            node at the specified path
+        """
+        current = self.root
+        for part in path.split(self.sep):
+            if isinstance(current, dict):
+                current = current.get(part, _MISSING)
+            elif _is_branch(current) and part.isdigit() and int(part) < len(current):
+                current = current[int(part)]
+            else:
+                return default
+            if current is _MISSING:
+                return default
+        return current
+
+    def __getitem__(self, path: str) -> Any:
+        value = self.node(path, _MISSING)
+        if value is _MISSING or _is_branch(value):
+            raise KeyError(path)
+        return value
+
+    def __contains__(self, path: object) -> bool:
+        if not isinstance(path, str):
+            return False
+        value = self.node(path, _MISSING)
+        return value is not _MISSING and not _is_branch(value)
+
+    def __iter__(self) -> Iterator[str]:
+        # Iterative depth first walk, yielding keys in the order of `flatten_dict`:
+        stack: List[Tuple[Optional[str], Iterator[Tuple[str, Any]]]] = [
+            (None, _children(self.root))
+        ]
+        while stack:
+            prefix, children = stack[-1]
+            for key, child in children:
+                path = key if prefix is None else f"{prefix}{self.sep}{key}"
+                if _is_branch(child):
+                    stack.append((path, _children(child)))
+                    break
+                yield path
+            else:
+                stack.pop()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def glob(self, pattern: str) -> Dict[str, Any]:
+        """Return leaves whose path matches `pattern`, where a `*` component
+        matches any key or index. For instance `days/0/hours/*/precip` returns
+        the precipitation of each hour of the first day
+
+        Parameters
+        ----------
+        pattern : str
+            path pattern
+
+        Returns
+        -------
+        Dict[str, Any]
+            matching paths and their values
+        """
+        matches = {}
+        nodes = [("", self.root)]
+        parts = pattern.split(self.sep)
+        for depth, part in enumerate(parts):
+            next_nodes = []
+            for prefix, node in nodes:
+                if not _is_branch(node):
+                    continue
+                if part == "*":
+                    candidates = _children(node)
+                else:
+                    child = PathView(node, self.sep).node(part, _MISSING)
+                    candidates = [] if child is _MISSING else [(part, child)]
+                for key, child in candidates:
+                    path = key if depth == 0 else f"{prefix}{self.sep}{key}"
+                    next_nodes.append((path, child))
+            nodes = next_nodes
+        for path, node in nodes:
+            if not _is_branch(node):
+                matches[path] = node
+        return matches
@@ -1,8 +1,9 @@
 """utils.py"""
 
-from typing import Any, Dict, Optional
+import logging
+from typing import Any, Dict, List, Optional, Sequence
 
-import Levenshtein as levenshtein
+import numpy as np
 import pylcs
 
 
@@ -87,6 +88,108 @@ def flatten_dict(
     return flattened
 
 
+def score_keys(keys: Sequence[str], targets: Sequence[str]) -> np.ndarray:
+    """Compute the matching score of each key against each target. The score
+    is the longest common subsequence normalized by the target length, minus
+    the Levenshtein distance (insertion and deletion cost 1, substitution cost 0)
+    normalized by the length of the longest string between the key and the target
+
+    Parameters
+    ----------
+    keys : Sequence[str]
+        keys to score
+    targets : Sequence[str]
+        targets against which keys are scored
+
+    Returns
+    -------
+    np.ndarray
+        score matrix of shape (len(targets), len(keys))
+    """
+    keys = list(keys)
+    key_lens = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+    scores = np.empty((len(targets), len(keys)), dtype=np.float64)
+    for i, target in enumerate(targets):
+        lcs_scores = np.asarray(pylcs.lcs_of_list(target, keys), dtype=np.int64)
+        # As substitutions are free, the Levenshtein distance between a key and the
+        # target only counts insertions and deletions, i.e. their length difference
+        lev_dists = np.abs(key_lens - len(target))
+        # The following calculation is used to penalize the score obtained for the lcs,
+        # taking into account deletions and insertions relative to the target in each key
+        scores[i] = lcs_scores / len(target) - lev_dists / np.maximum(
+            key_lens, len(target)
+        )
+    return scores
+
+
+def select_best_keys(
+    scores: np.ndarray,
+    tolerance: Optional[float] = 0.0,
+    top_k: Optional[int] = None,
+) -> List[np.ndarray]:
+    """Select, for each row of a score matrix, the indices of the keys whose
+    score is at least the best score of the row minus `tolerance`
+
+    Parameters
+    ----------
+    scores : np.ndarray
+        score matrix, as returned by `score_keys`
+    tolerance : float, optional
+        tolerance applied on scores. Default to 0
+    top_k : int, optional
+        if specified, only keep the `top_k` selected keys with the highest scores
+
+    Returns
+    -------
+    List[np.ndarray]
+        sorted indices of the selected keys for each row
+    """
+    selected = []
+    for row in scores:
+        indices = np.flatnonzero(row >= row.max() - tolerance)
+        if top_k is not None and len(indices) > top_k:
+            best = np.argsort(-row[indices], kind="stable")[:top_k]
+            indices = np.sort(indices[best])
+        selected.append(indices)
+    return selected
+
+
+def get_best_items_batch(
+    input_dict: Dict[str, Any],
+    targets: Sequence[str],
+    tolerance: Optional[float] = 0.0,
+    top_k: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Return, for each target, a subdict containing couples key/value that
+    best match it. All the targets are scored in a single pass over the keys
+
+    Parameters
+    ----------
+    input_dict : dict
+        dictionnary in which search best correspondances
+    targets: Sequence[str]
+        target keys to search in the dictionnary
+    tolerance: float, optional
+        tolerance applied on items score. Default to 0
+    top_k: int, optional
+        if specified, maximum number of items kept for each target
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        for each target, a dictionnary containing the keys that have matched with
+        the target, and corresponding values
+    """
+    keys = list(input_dict)
+    scores = score_keys(keys, targets)
+    return {
+        target: {keys[idx]: input_dict[keys[idx]] for idx in indices}
+        for target, indices in zip(
+            targets, select_best_keys(scores, tolerance, top_k)
+        )
+    }
+
+
 def get_best_items(
     input_dict: Dict[str, Any],
     target: str,
@@ -105,7 +208,7 @@ def get_best_items(
     tolerance: float, optional
         tolerance applied on items score. Default to 0
     verbose: boolean, optional
-        log some details about search processing
+        log the score of each key at debug level
 
     Returns
     -------
@@ -113,28 +216,16 @@ def get_best_items(
         a dictionnary containing the key that have matched with the target key,
         and corresponding values.
     """
-    # compute the normalized longest common subsequence score for each key in the input dict
-    lcs_scores = [pylcs.lcs(key, target) / len(target) for key in input_dict]
-    # compute the normalized Levenshtein distance for each key in the input dict
-    lev_dists = [
-        levenshtein.distance(key, target, weights=(1, 1, 0))
-        / max(len(key), len(target))
-        for key in input_dict
-    ]
-    # The following calculation is used to penalize the score obtained for the lcs,
-    # taking into account deletions and insertions relative to the target in each key
-    scores = [(key, lcs_scores[i] - lev_dists[i]) for i, key in enumerate(input_dict)]
-    best_score = max(scores, key=lambda x: x[1])[1]
-    # keep only keys with best score (taking into account a tolerance)
-    filtered_keys = [score[0] for score in scores if score[1] >= best_score - tolerance]
-    filtered_dict = {
-        key: value for key, value in input_dict.items() if key in filtered_keys
-    }
+    keys = list(input_dict)
+    scores = score_keys(keys, [target])
+    indices = select_best_keys(scores, tolerance)[0]
+    filtered_dict = {keys[idx]: input_dict[keys[idx]] for idx in indices}
 
-    if verbose:
-        print("scores = ", scores)
-        print("best_score =", best_score)
-        print("filtered_dict =", filtered_dict)
+    if verbose and logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(
+            "Scores of keys for %s: %s", target, list(zip(keys, scores[0].tolist()))
+        )
+        logging.debug("Best score: %s, best items: %s", scores[0].max(), filtered_dict)
 
     return filtered_dict
 
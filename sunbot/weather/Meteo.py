@@ -1,10 +1,21 @@
 """Weather module"""
 
+import io
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
 import discord
+import pytz
 from PIL import ImageFont
 
 from sunbot import sunbot
-from sunbot.SunImager import SunImage
+from sunbot.SunImager import DEFAULT_HEIGHT, DEFAULT_WIDTH, SunImage
+from sunbot.core import RenderCache
+from sunbot.core.render_cache import render_key
+from sunbot.weather.templates import CardTemplates
 
 # ===========================================================#
 #           CONSTANTES VARIABLES DECLARATIONS               #
@@ -20,6 +31,16 @@ VENT_SUD_OUEST = "\u2197"
 VENT_OUEST = "\u27A1"
 VENT_NORD_OUEST = "\u2198"
 
+# Version of the layout of weather images, to change when the layout changes so
+# cached images of the previous layout are no longer sent:
+TEMPLATE_VERSION = 1
+
+# Weather provider of data which do not indicate it, and logo of providers:
+DEFAULT_PROVIDER = "VisualCrossing"
+PROVIDER_LOGOS = {"VisualCrossing": "logoVC.jpeg"}
+# Timezone of the reception date of data whose location timezone is unknown:
+DEFAULT_TIMEZONE = "Europe/Paris"
+
 
 # ===================================================#
 #           GLOBAL VARIABLES DECLARATIONS           #
@@ -304,6 +325,34 @@ def getIconPathWeatherType(weatherCondition: str) -> str:
     )[2]
 
 
+def preload_assets() -> int:
+    """Loads the backgrounds and icons of weather images in the asset store of
+    `SunImage`, with the size at which they are drawn, so the first images are
+    not slowed down by disk reads
+    ## Return value:
+    Number of loaded assets"""
+    assets = SunImage.assets
+    nb_loaded = assets.preload(
+        (weather_type[1] for weather_type in dictWeatherType.values()),
+        (DEFAULT_WIDTH, DEFAULT_HEIGHT),
+    )
+    nb_loaded += assets.preload(
+        (weather_type[2] for weather_type in dictWeatherType.values()),
+        sunbot.MAIN_ICON_SIZE,
+        "RGBA",
+    )
+    nb_loaded += assets.preload(
+        (
+            f"{sunbot.ICON_DIR_PATH}{icon.name}"
+            for icon in sorted(Path(sunbot.ICON_DIR_PATH).iterdir())
+            if icon.is_file()
+        ),
+        sunbot.ICON_SIZE,
+        "RGBA",
+    )
+    return nb_loaded
+
+
 def degToStrDirectVent(directionVent: int) -> tuple:
     """Convertie l'angle passé en paramètre en direction cardinal afin de rendre l'affichage
     de cette information plus conviviale
@@ -327,34 +376,225 @@ def degToStrDirectVent(directionVent: int) -> tuple:
     return (VENT_NORD_OUEST, "NW")
 
 
-def generateWeatherImage(weatherConditionCode: str) -> SunImage:
-    """Generates a basic image with adapted background and weather icon according
-    to the specified weather condition type
+def data_credits(
+    as_of: Optional[float] = None,
+    provider: Optional[str] = None,
+    timezone_name: Optional[str] = None,
+) -> str:
+    """Returns the credits of weather data, with the date at which they were
+    received from the API if it is known
     ## Parameter:
-    * `weatherConditionCode` : weather conditon type, as a string
+    * `as_of` : optional, reception date of the data, as returned by `time.time`
+    * `provider` : optional, name of the weather provider. Default to
+    `DEFAULT_PROVIDER`
+    * `timezone_name` : optional, timezone of the location of the data, in which
+    the reception date is displayed. Default to `DEFAULT_TIMEZONE`
     ## Return value:
-    Returns basic image with adapted background. This image can be used to add
-    elements on top of it"""
-    # Create background image according to the current weather conditions:
-    weatherImage = SunImage(getPathImageWeatherType(weatherConditionCode))
-    # Add mask to the image:
-    weatherImage.add_mask(
-        "BLACK", 180, (weatherImage.width // 2 + 40, weatherImage.height), (0, 0)
+    Text to display with the weather data"""
+    credits = f"Données de l'API {provider or DEFAULT_PROVIDER}"
+    if as_of is None:
+        return credits
+    try:
+        location_tz = pytz.timezone(timezone_name or DEFAULT_TIMEZONE)
+    except pytz.UnknownTimeZoneError:
+        location_tz = pytz.timezone(DEFAULT_TIMEZONE)
+    return f"{credits} du {datetime.fromtimestamp(as_of, location_tz):%d/%m à %H:%M}"
+
+
+def add_credits(
+    weather_image: SunImage,
+    as_of: Optional[float] = None,
+    provider: Optional[str] = None,
+) -> None:
+    """Adds the logo of the weather provider, if it has one, and the credits of
+    weather data at the bottom of the specified image
+    ## Parameters:
+    * `weather_image` : image on which credits are added
+    * `as_of` : optional, reception date of the weather data
+    * `provider` : optional, name of the weather provider. Default to
+    `DEFAULT_PROVIDER`
+    ## Return value:
+    None"""
+    logo = PROVIDER_LOGOS.get(provider or DEFAULT_PROVIDER)
+    if logo is not None:
+        weather_image.add_icon(
+            f"{sunbot.ICON_DIR_PATH}{logo}",
+            sunbot.ICON_SIZE,
+            (5, weather_image.height - 45),
+        )
+    weather_image.draw_txt(
+        data_credits(as_of, provider),
+        smallFont,
+        (60 if logo is not None else 10, weather_image.height - 40),
     )
-    # Add the weather icon according to the current weather conditions:
-    weatherImage.add_icon(
+
+
+def add_credits_date(
+    weather_image: SunImage,
+    as_of: Optional[float] = None,
+    provider: Optional[str] = None,
+    timezone_name: Optional[str] = None,
+) -> None:
+    """Adds the reception date of weather data after the credits added without date
+    by `add_credits`, such as the credits of card templates
+    ## Parameters:
+    * `weather_image` : image on which credits were added
+    * `as_of` : optional, reception date of the weather data. If None, nothing is
+    added
+    * `provider` : optional, name of the weather provider. Default to
+    `DEFAULT_PROVIDER`
+    * `timezone_name` : optional, timezone in which the reception date is
+    displayed. Default to `DEFAULT_TIMEZONE`
+    ## Return value:
+    None"""
+    if as_of is None:
+        return
+    credits = data_credits(provider=provider)
+    logo = PROVIDER_LOGOS.get(provider or DEFAULT_PROVIDER)
+    weather_image.draw_txt(
+        data_credits(as_of, provider, timezone_name)[len(credits) :],
+        smallFont,
+        (
+            (60 if logo is not None else 10) + smallFont.getlength(credits),
+            weather_image.height - 40,
+        ),
+    )
+
+
+def template_key(weatherConditionCode: str, provider: Optional[str] = None) -> tuple:
+    """Returns the key of the card templates for the specified weather condition
+    type and provider. Condition types with the same background and icon share
+    their templates
+    ## Parameters:
+    * `weatherConditionCode` : weather condition type, as a string
+    * `provider` : optional, name of the weather provider. Default to
+    `DEFAULT_PROVIDER`
+    ## Return value:
+    Background path, icon path and provider name, as a tuple"""
+    return (
+        getPathImageWeatherType(weatherConditionCode),
         getIconPathWeatherType(weatherConditionCode),
-        sunbot.MAIN_ICON_SIZE,
-        (350, sunbot.UP_ALIGNMENT),
+        provider or DEFAULT_PROVIDER,
     )
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}logoVC.jpeg",
-        sunbot.ICON_SIZE,
-        (5, weatherImage.height - 45),
+
+
+def build_base_image(background: str, icon: str, provider: str) -> SunImage:
+    """Builds an image with the specified background, the mask, the main weather
+    icon and the credits of the weather provider, without date
+    ## Parameters:
+    * `background` : path to the background image
+    * `icon` : path to the main weather icon
+    * `provider` : name of the weather provider
+    ## Return value:
+    Basic image on which elements can be added"""
+    weatherImage = SunImage(background)
+    # Add mask to the image:
+    weatherImage.add_mask(
+        "BLACK", 180, (weatherImage.width // 2 + 40, weatherImage.height), (0, 0)
     )
-    weatherImage.draw_txt(
-        "Données de l'API VisualCrossing", smallFont, (60, weatherImage.height - 40)
+    # Add the weather icon according to the weather conditions:
+    weatherImage.add_icon(icon, sunbot.MAIN_ICON_SIZE, (350, sunbot.UP_ALIGNMENT))
+    add_credits(weatherImage, provider=provider)
+    return weatherImage
+
+
+def build_current_weather_template(
+    background: str, icon: str, provider: str
+) -> SunImage:
+    """Builds the template of current weather images: the basic image and the icons
+    displayed whatever the weather data
+    ## Parameters:
+    * `background` : path to the background image
+    * `icon` : path to the main weather icon
+    * `provider` : name of the weather provider
+    ## Return value:
+    Template of current weather images"""
+    weatherImage = build_base_image(background, icon, provider)
+    for icon_name, position in (
+        ("pressure", (sunbot.LEFT_ALIGNMENT, 3)),
+        ("visibility", (sunbot.CENTRE_ALIGNMENT, 3)),
+        ("rays", (sunbot.LEFT_ALIGNMENT, 4)),
+        ("cloudcover", (sunbot.CENTRE_ALIGNMENT, 4)),
+        ("humidity", (sunbot.LEFT_ALIGNMENT, 5)),
+    ):
+        weatherImage.add_icon(
+            f"{sunbot.ICON_DIR_PATH}{icon_name}.png",
+            sunbot.ICON_SIZE,
+            (
+                position[0],
+                position[1] * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT,
+            ),
+        )
+    return weatherImage
+
+
+def build_daily_weather_template(background: str, icon: str, provider: str) -> SunImage:
+    """Builds the template of daily weather images: the basic image and all the icons
+    except the wind direction one, which is rotated according to the data
+    ## Parameters:
+    * `background` : path to the background image
+    * `icon` : path to the main weather icon
+    * `provider` : name of the weather provider
+    ## Return value:
+    Template of daily weather images"""
+    weatherImage = build_base_image(background, icon, provider)
+    for icon_name, position in (
+        ("water-drops", (sunbot.LEFT_ALIGNMENT, 0)),
+        ("pluviometer", (sunbot.CENTRE_ALIGNMENT, 0)),
+        ("wind", (sunbot.LEFT_ALIGNMENT, 1)),
+        ("pressure", (sunbot.LEFT_ALIGNMENT, 2)),
+        ("humidity", (sunbot.LEFT_ALIGNMENT, 3)),
+        ("rays", (sunbot.LEFT_ALIGNMENT, 4)),
+        ("sunrise", (sunbot.LEFT_ALIGNMENT, 5)),
+        ("sunset", (sunbot.CENTRE_ALIGNMENT, 5)),
+    ):
+        weatherImage.add_icon(
+            f"{sunbot.ICON_DIR_PATH}{icon_name}.png",
+            sunbot.ICON_SIZE,
+            (
+                position[0],
+                position[1] * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT,
+            ),
+        )
+    return weatherImage
+
+
+# Buffers in which weather images are encoded, one per thread:
+_thread_buffers = threading.local()
+
+# Encoded weather images, sent again when the same data are displayed:
+render_cache = RenderCache()
+
+# Templates of weather images, which are copied for each image:
+card_templates = CardTemplates(sunbot.CARD_TEMPLATES_MAX_SIZE)
+card_templates.register("current", build_current_weather_template)
+card_templates.register("daily", build_daily_weather_template)
+
+
+def generateWeatherImage(
+    weatherConditionCode: str,
+    as_of: Optional[float] = None,
+    provider: Optional[str] = None,
+    timezone_name: Optional[str] = None,
+) -> SunImage:
+    """Generates a current weather image with adapted background, weather icon and
+    data icons according to the specified weather condition type, copied from its
+    template
+    ## Parameter:
+    * `weatherConditionCode` : weather conditon type, as a string
+    * `as_of` : optional, reception date of the weather data, displayed with the
+    credits
+    * `provider` : optional, name of the weather provider, displayed with the
+    credits
+    * `timezone_name` : optional, timezone of the location, in which the reception
+    date is displayed
+    ## Return value:
+    Returns basic image with adapted background. This image can be used to add
+    elements on top of it"""
+    weatherImage = card_templates.render(
+        "current", *template_key(weatherConditionCode, provider)
     )
+    add_credits_date(weatherImage, as_of, provider, timezone_name)
     return weatherImage
 
 
@@ -472,17 +712,12 @@ def addWindData(request_response: dict, weather_image: SunImage) -> SunImage:
 
 def addHumidityData(request_response: dict, weather_image: SunImage) -> None:
     """Adds humidity data retrieved from `request_response` to the specified weather
-    image
+    image. The humidity icon is part of the current weather template
     ## Parameter:
     * `request_response`: JSON response from the weather API, as a dict
     * `weather_image`: image where add humidity data
     ## Return value:
     Weather image with humidity data added, for chained calls"""
-    weather_image.add_icon(
-        f"{sunbot.ICON_DIR_PATH}humidity.png",
-        sunbot.ICON_SIZE,
-        (sunbot.LEFT_ALIGNMENT, 5 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
     weather_image.draw_txt(
         f"{request_response['humidity']}%",
         mediumFont,
@@ -493,14 +728,20 @@ def addHumidityData(request_response: dict, weather_image: SunImage) -> None:
     )
 
 
-def createCurrentWeatherImage(currentWeather: dict, path: str) -> None:
-    """Creates an image for the API response specified in arguments
+def build_current_weather_image(currentWeather: dict) -> SunImage:
+    """Builds the image of the current weather data specified in arguments
     ## Parameters :
     * `currentWeather` : response returned by the weather API, as a dictionnary
     ## Return value :
-    An image that represents response from weather API"""
+    An image that represents response from weather API, which can be saved or
+    encoded"""
     # Create a basic image according to the current weather conditions:
-    currentWeatherImage = generateWeatherImage(currentWeather["conditions"])
+    currentWeatherImage = generateWeatherImage(
+        currentWeather["conditions"],
+        currentWeather.get("as_of"),
+        currentWeather.get("provider"),
+        currentWeather.get("timezone"),
+    )
     # Add temperature data to the image:
     currentWeatherImage.draw_txt(
         f"{round(currentWeather['temp'], 1)}°C",
@@ -516,12 +757,7 @@ def createCurrentWeatherImage(currentWeather: dict, path: str) -> None:
     addPrecipData(currentWeather, currentWeatherImage)
     # Add wind data to the image:
     addWindData(currentWeather, currentWeatherImage)
-    # Add atmospheric data to the image:
-    currentWeatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}pressure.png",
-        sunbot.ICON_SIZE,
-        (sunbot.LEFT_ALIGNMENT, 3 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
+    # Add atmospheric data to the image, next to the icons of the template:
     currentWeatherImage.draw_txt(
         f"{currentWeather['pressure']}hPa",
         mediumFont,
@@ -530,11 +766,6 @@ def createCurrentWeatherImage(currentWeather: dict, path: str) -> None:
             3 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT,
         ),
     )
-    currentWeatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}visibility.png",
-        sunbot.ICON_SIZE,
-        (sunbot.CENTRE_ALIGNMENT, 3 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
     currentWeatherImage.draw_txt(
         f"{int(currentWeather['visibility'] * 1000)}m",
         mediumFont,
@@ -543,11 +774,6 @@ def createCurrentWeatherImage(currentWeather: dict, path: str) -> None:
             3 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT,
         ),
     )
-    currentWeatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}rays.png",
-        sunbot.ICON_SIZE,
-        (sunbot.LEFT_ALIGNMENT, 4 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
     currentWeatherImage.draw_txt(
         f"{currentWeather['uvindex']}",
         mediumFont,
@@ -556,11 +782,6 @@ def createCurrentWeatherImage(currentWeather: dict, path: str) -> None:
             4 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT,
         ),
     )
-    currentWeatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}cloudcover.png",
-        sunbot.ICON_SIZE,
-        (sunbot.CENTRE_ALIGNMENT, 4 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
     currentWeatherImage.draw_txt(
         f"{currentWeather['cloudcover']}%",
         mediumFont,
@@ -571,10 +792,100 @@ def createCurrentWeatherImage(currentWeather: dict, path: str) -> None:
     )
     # Add humidity data to the image:
     addHumidityData(currentWeather, currentWeatherImage)
+    return currentWeatherImage
+
+
+def createCurrentWeatherImage(currentWeather: dict, path: str) -> None:
+    """Creates an image for the API response specified in arguments and saves it
+    in the specified directory
+    ## Parameters :
+    * `currentWeather` : response returned by the weather API, as a dictionnary
+    * `path` : path to the directory where the image is saved
+    ## Return value :
+    None"""
+    build_current_weather_image(currentWeather).save_img(
+        os.path.join(path, sunbot.CURRENT_WEATHER_IMAGE_NAME),
+        compress_level=sunbot.IMAGE_COMPRESS_LEVEL,
+    )
+
+
+def render_current_weather_image(
+    currentWeather: dict, buffer: Optional[io.BytesIO] = None
+) -> bytes:
+    """Renders the current weather image of the specified data in memory
+    ## Parameters:
+    * `currentWeather` : response returned by the weather API, as a dictionnary
+    * `buffer` : optional, buffer in which the image is encoded. Default to the
+    buffer of the calling thread, see `image_buffer`
+    ## Return value:
+    Current weather image, encoded as png"""
+    return render_card("current", currentWeather, build_current_weather_image, buffer)
+
+
+def image_buffer() -> io.BytesIO:
+    """Returns the buffer in which the calling thread encodes weather images. The
+    buffer is reused by all the images of the thread, so its memory is not
+    allocated again for each image
+    ## Return value:
+    Buffer of the calling thread"""
+    buffer = getattr(_thread_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _thread_buffers.buffer = io.BytesIO()
+    return buffer
+
 
-    currentWeatherImage.save_img(
-        f"{sunbot.CURRENT_WEATHER_IMAGE_PATH}{sunbot.CURRENT_WEATHER_IMAGE_NAME}"
+def encode_image(weather_image: SunImage, buffer: Optional[io.BytesIO] = None) -> bytes:
+    """Encodes the specified weather image as png in memory
+    ## Parameters:
+    * `weather_image` : image to encode
+    * `buffer` : optional, buffer in which the image is encoded. Default to the
+    buffer of the calling thread, see `image_buffer`
+    ## Return value:
+    Encoded image"""
+    buffer = buffer if buffer is not None else image_buffer()
+    weather_image.save_img(buffer, compress_level=sunbot.IMAGE_COMPRESS_LEVEL)
+    return buffer.getvalue()
+
+
+def card_key(card_type: str, data: dict) -> str:
+    """Returns the key of the image of the specified card type for the specified
+    data in the render cache. The reception date of the data is replaced by the
+    credits displayed on the image, so data received the same minute share their
+    image
+    ## Parameters:
+    * `card_type` : type of card, `current` or `daily`
+    * `data` : weather data displayed on the card
+    ## Return value:
+    Key of the image, the same across restarts of the bot"""
+    fields = {name: value for name, value in data.items() if name != "as_of"}
+    fields["credits"] = data_credits(
+        data.get("as_of"), data.get("provider"), data.get("timezone")
     )
+    return render_key(card_type, fields, TEMPLATE_VERSION)
+
+
+def render_card(
+    card_type: str,
+    data: dict,
+    build: Callable[[dict], SunImage],
+    buffer: Optional[io.BytesIO] = None,
+) -> bytes:
+    """Returns the image of the specified data from the render cache, or builds
+    it, encodes it and stores it in the render cache
+    ## Parameters:
+    * `card_type` : type of card, `current` or `daily`
+    * `data` : weather data displayed on the card
+    * `build` : function building the image of the card from the data
+    * `buffer` : optional, buffer in which the image is encoded. Default to the
+    buffer of the calling thread, see `image_buffer`
+    ## Return value:
+    Encoded image"""
+    key = card_key(card_type, data)
+    image = render_cache.get(key)
+    if image is None:
+        image = encode_image(build(data), buffer)
+        render_cache.set(key, image)
+    return image
 
 
 def create_rain_embed(data: dict, period: str = "aujourd'hui"):
@@ -610,81 +921,30 @@ def create_rain_embed(data: dict, period: str = "aujourd'hui"):
         embed2send.add_field(
             name=f"Pas de pluie prévue {period} !", value="\u2600\uFE0F", inline=False
         )
-    embed2send.set_footer(text="Données de l'API Visual Crossing")
+    embed2send.set_footer(text=data_credits(provider=data.get("provider")))
+    # Discord displays the date of the data next to the footer:
+    if data.get("as_of") is not None:
+        embed2send.timestamp = datetime.fromtimestamp(data["as_of"], timezone.utc)
     return embed2send
 
 
-def create_daily_weather_img(day_info: dict, path: str) -> None:
-    """Creates an image for the daily weather, according to the specified `requestResponse`
-    passed in arguments.
+def build_daily_weather_image(day_info: dict) -> SunImage:
+    """Builds the image of the daily weather data specified in arguments
     ## Parameters:
-        * `request_response` : response to the request for daily weather returned by Visual
-        Crossing handler
-        * `path`            : string that contains path where save generated image"""
-    # Create background image according to the weather condition for the day:
-    weatherImage = SunImage(getPathImageWeatherType(day_info["conditions"]))
-    # Add mask to the image:
-    weatherImage.add_mask(
-        "BLACK", 180, (weatherImage.width // 2 + 40, weatherImage.height), (0, 0)
-    )
-    # Add weather icon according to the forecast daily weather :
-    weatherImage.add_icon(
-        getIconPathWeatherType(day_info["conditions"]),
-        sunbot.MAIN_ICON_SIZE,
-        (350, sunbot.UP_ALIGNMENT),
-    )
-    # Add icons to the daily weather image:
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}water-drops.png",
-        sunbot.ICON_SIZE,
-        (sunbot.LEFT_ALIGNMENT, sunbot.ITEMS_UP_ALIGNMENT),
-    )
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}pluviometer.png",
-        sunbot.ICON_SIZE,
-        (sunbot.CENTRE_ALIGNMENT, sunbot.ITEMS_UP_ALIGNMENT),
-    )
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}wind.png",
-        sunbot.ICON_SIZE,
-        (sunbot.LEFT_ALIGNMENT, sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
+    * `day_info` : daily weather data returned by a weather provider
+    ## Return value:
+    Daily weather image, which can be saved or encoded"""
+    # Copy the template of the weather condition for the day:
+    weatherImage = card_templates.render(
+        "daily", *template_key(day_info["conditions"], day_info.get("provider"))
     )
+    # Add the wind direction icon, rotated according to the forecast:
     weatherImage.add_icon(
         f"{sunbot.ICON_DIR_PATH}windDirection.png",
         sunbot.ICON_SIZE,
         (sunbot.CENTRE_ALIGNMENT, sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
         360 - day_info["winddir"],
     )
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}pressure.png",
-        sunbot.ICON_SIZE,
-        (sunbot.LEFT_ALIGNMENT, 2 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}humidity.png",
-        sunbot.ICON_SIZE,
-        (sunbot.LEFT_ALIGNMENT, 3 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}rays.png",
-        sunbot.ICON_SIZE,
-        (sunbot.LEFT_ALIGNMENT, 4 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}sunrise.png",
-        sunbot.ICON_SIZE,
-        (sunbot.LEFT_ALIGNMENT, 5 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}sunset.png",
-        sunbot.ICON_SIZE,
-        (sunbot.CENTRE_ALIGNMENT, 5 * sunbot.ITEM_HEIGHT + sunbot.ITEMS_UP_ALIGNMENT),
-    )
-    weatherImage.add_icon(
-        f"{sunbot.ICON_DIR_PATH}logoVC.jpeg",
-        sunbot.ICON_SIZE,
-        (5, weatherImage.height - 45),
-    )
     # Write text on the image:
     weatherImage.draw_txt(
         f"{round(day_info['temp'], 1)}°C",
@@ -778,8 +1038,35 @@ def create_daily_weather_img(day_info: dict, path: str) -> None:
             + sunbot.TXT_HORIZONTAL_ALIGNMENT,
         ),
     )
-    weatherImage.draw_txt(
-        "Données de l'API VisualCrossing", smallFont, (60, weatherImage.height - 40)
+    add_credits_date(
+        weatherImage,
+        day_info.get("as_of"),
+        day_info.get("provider"),
+        day_info.get("timezone"),
     )
-    # Save the image:
-    weatherImage.save_img(f"{path}/{sunbot.DAILY_IMAGE_NAME}")
+    return weatherImage
+
+
+def create_daily_weather_img(day_info: dict, path: str) -> None:
+    """Creates an image for the daily weather, according to the specified `day_info`
+    passed in arguments, and saves it in the specified directory.
+    ## Parameters:
+        * `day_info` : daily weather data returned by a weather provider
+        * `path`     : string that contains path where save generated image"""
+    build_daily_weather_image(day_info).save_img(
+        os.path.join(path, sunbot.DAILY_IMAGE_NAME),
+        compress_level=sunbot.IMAGE_COMPRESS_LEVEL,
+    )
+
+
+def render_daily_weather_image(
+    day_info: dict, buffer: Optional[io.BytesIO] = None
+) -> bytes:
+    """Renders the daily weather image of the specified data in memory
+    ## Parameters:
+    * `day_info` : daily weather data, as a dictionnary
+    * `buffer` : optional, buffer in which the image is encoded. Default to the
+    buffer of the calling thread, see `image_buffer`
+    ## Return value:
+    Daily weather image, encoded as png"""
+    return render_card("daily", day_info, build_daily_weather_image, buffer)
@@ -0,0 +1,91 @@
+"""Weather card templates module"""
+
+import logging
+import math
+import threading
+from typing import Callable, Dict, Hashable
+
+from sunbot.SunImager import SunImage
+from sunbot.core import TTLCache
+
+
+class CardTemplates:
+    """This class keeps the base layer of each weather card: the part of the card
+    which only depends on its type and on the weather condition, such as the
+    background, the mask, the icons and the credits. Each card type is registered
+    with the function that builds its base layer. A render then only copies the
+    base layer and draws the values of the weather data on the copy.
+    Templates are kept in memory, and the least recently used ones are dropped
+    when more than `max_size` templates are kept"""
+
+    def __init__(self, max_size: int = 32) -> None:
+        """Creates an empty template store
+        ## Parameters:
+        * `max_size` : optional, maximum number of templates kept in memory. If 0,
+        templates are built for each render and never kept
+        ## Return value:
+        not applicable"""
+        self.builders: Dict[str, Callable[..., SunImage]] = {}
+        self.__templates = (
+            TTLCache(max_size=max_size, default_ttl=math.inf) if max_size > 0 else None
+        )
+        self.__lock = threading.Lock()
+        self.nb_builds = 0
+
+    def register(self, card_type: str, builder: Callable[..., SunImage]) -> None:
+        """Registers the function which builds the base layer of a card type
+        ## Parameters:
+        * `card_type` : name of the card type, such as `current` or `daily`
+        * `builder` : function building a base layer from the template key
+        ## Return value:
+        not applicable"""
+        self.builders[card_type] = builder
+
+    def render(self, card_type: str, *key: Hashable) -> SunImage:
+        """Returns a copy of the base layer of `card_type` for the specified key,
+        built if it is not kept yet. Values can be drawn on the returned image
+        ## Parameters:
+        * `card_type` : name of a registered card type
+        * `key` : arguments of the builder of the card type, which identify the
+        template, such as background and icon paths
+        ## Return value:
+        New image, copy of the template
+        ## Exceptions:
+        * `KeyError` : if `card_type` is not registered"""
+        builder = self.builders[card_type]
+        template_key = (card_type, *key)
+        with self.__lock:
+            template = (
+                self.__templates.get(template_key)
+                if self.__templates is not None
+                else None
+            )
+            if template is None:
+                logging.debug("Building template %s", template_key)
+                template = builder(*key)
+                self.nb_builds += 1
+                if self.__templates is not None:
+                    self.__templates.set(template_key, template)
+        return template.copy()
+
+    def clear(self) -> None:
+        """Drops all templates, for instance after a change of the card layouts
+        ## Return value:
+        not applicable"""
+        with self.__lock:
+            if self.__templates is not None:
+                self.__templates.clear()
+
+    def stats(self) -> dict:
+        """Returns template store counters
+        ## Return value:
+        Dict with the number of kept templates, template builds, hits and misses"""
+        if self.__templates is None:
+            return {"size": 0, "builds": self.nb_builds, "hits": 0, "misses": 0}
+        stats = self.__templates.stats()
+        return {
+            "size": stats["size"],
+            "builds": self.nb_builds,
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+        }
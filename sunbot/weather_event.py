@@ -1,19 +1,21 @@
 """Weather Event module"""
 
 import asyncio
+import io
 import json
 import logging
 import os
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Dict, Literal, Union
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 import discord
 
 from sunbot.location import Location
-from sunbot.weather.Meteo import create_daily_weather_img
+from sunbot.weather.Meteo import render_daily_weather_image
 from sunbot import sunbot
-from sunbot.apis.weather import WeatherAPIHandler
+from sunbot.apis.weather import WeatherProvider
+from sunbot.core import AliasIndex, Priority, RenderService
 
 USER_SUB_TYPE = "u"
 SERVER_SUB_TYPE = "s"
@@ -27,15 +29,25 @@ class WeatherEvent(ABC):
     is abstract, it cannot be directly instantiate
     """
 
-    def __init__(self, save_path : str, api_handler: WeatherAPIHandler) -> None:
+    def __init__(
+        self,
+        save_path: str,
+        api_handler: WeatherProvider,
+        aliases: Optional[AliasIndex] = None,
+    ) -> None:
         """Constructor for this class, which can only be called by inheriting classes
         ## Parameters:
         * `save_path`: path to the file where saving locations' subscribers data
-        * `api_handler`: API handler
+        * `api_handler`: weather provider, such as an API handler or a router
+        * `aliases`: index of location names, optional. If specified, subscribers
+        to different spellings of a location are subscribed to its canonical name
         """
         # private attributes:
         self.save_file_path = save_path
         self.api_handler = api_handler
+        self.aliases = aliases
+        # Version of the alias index when location names were last updated:
+        self.__aliases_version: Optional[int] = None
         self.__sub_locations_dict : dict[str, dict[Location, dict[int, Union[discord.TextChannel, discord.User]]]] = \
             {SERVER_SUB_TYPE : {}, USER_SUB_TYPE : {}}
         self.__mutex_access_dict = asyncio.Lock()    # Mutex to handle access to user dict
@@ -59,6 +71,7 @@ class WeatherEvent(ABC):
         """
         # Argument checking:
         self.check_sub_type(sub_type)
+        await self.update_location_names()
         await self.__mutex_access_dict.acquire()
         # Get dictionnary corresponding to sub_type value
         sub_type_dict = self.__sub_locations_dict[sub_type]
@@ -86,11 +99,13 @@ class WeatherEvent(ABC):
         """
         # Argument checking:
         self.check_sub_type(sub_type)
+        await self.update_location_names()
+        location_name = self.canonical_location_name(location_name)
         await self.__mutex_access_dict.acquire()
         sub_type_dict = self.__sub_locations_dict[sub_type]
         try:
             for location in sub_type_dict:
-                if location.name == location_name:
+                if location == Location(location_name, ""):
                     sub_entity = sub_type_dict[Location(location_name, "")][sub_id]
         except KeyError as err:
             logging.error(err.__cause__)
@@ -119,6 +134,8 @@ class WeatherEvent(ABC):
         """
         # Argument checking:
         self.check_sub_type(sub_type)
+        await self.update_location_names()
+        location_name = self.canonical_location_name(location_name)
         await self.__mutex_access_dict.acquire()
         sub_type_dict = self.__sub_locations_dict[sub_type]
         location_sub_dict = sub_type_dict.get(Location(location_name, ""), {})
@@ -159,6 +176,8 @@ class WeatherEvent(ABC):
             raise ValueError(f"Unknown subscriber type {type(subscriber)}")
         # It is not needed to check if entity was already added, the corresponding
         # discord interaction will just be updated
+        await self.update_location_names()
+        location_name = self.canonical_location_name(location_name)
         await self.__mutex_access_dict.acquire()
         current_location = Location(location_name, location_tz)
         # If location is not yet known by the bot:
@@ -202,7 +221,7 @@ class WeatherEvent(ABC):
                 location_name,
             )
             return False
-        location = Location(location_name, "")
+        location = Location(self.canonical_location_name(location_name), "")
         await self.__mutex_access_dict.acquire()
         self.__sub_locations_dict[sub_type][location].pop(sub_id)
         # If there is no subscriber remaning for the location, delete it for memory saving
@@ -216,6 +235,68 @@ class WeatherEvent(ABC):
         )
         return True
 
+    def canonical_location_name(self, location_name: str) -> str:
+        """Return the name under which subscribers to `location_name` are
+        registered: the canonical name of the location if an alias index is used
+        ## Parameters:
+        * `location_name`: name of the location, as typed by a user
+        ## Return value:
+        Canonical name of the location, or the name without leading and trailing
+        whitespaces if the location is unknown
+        """
+        if self.aliases is None:
+            return location_name.strip()
+        return self.aliases.resolve(location_name)
+
+    async def update_location_names(self) -> None:
+        """Move the subscribers of locations whose name became an alias of another
+        location to the canonical name of this location, merging them with its
+        subscribers. Nothing is done if no alias was learnt since the last update
+        ## Return value:
+        None
+        """
+        if self.aliases is None or self.aliases.version == self.__aliases_version:
+            return
+        renamed_locations: List[Tuple[SubType, Location, Location]] = []
+        await self.__mutex_access_dict.acquire()
+        self.__aliases_version = self.aliases.version
+        for sub_type, sub_type_dict in self.__sub_locations_dict.items():
+            for location in list(sub_type_dict):
+                canonical_name = self.aliases.resolve(location.name)
+                if Location(canonical_name, "") == location:
+                    continue
+                location_tz = str(location.tz) if location.tz is not None else ""
+                new_location = Location(canonical_name, location_tz)
+                # Subscribers of both names are merged, under the existing key of
+                # the canonical name if any:
+                sub_type_dict.setdefault(new_location, {}).update(
+                    sub_type_dict.pop(location)
+                )
+                renamed_locations.append((sub_type, location, new_location))
+        self.__mutex_access_dict.release()
+        for sub_type, location, new_location in renamed_locations:
+            logging.info(
+                "Subscribers of %s were moved to the location %s",
+                location.name,
+                new_location.name,
+            )
+            await self.rename_location(sub_type, location, new_location)
+
+    async def rename_location(
+        self, sub_type: SubType, location: Location, new_location: Location
+    ) -> None:
+        """Called when the subscribers of `location` were moved to `new_location`,
+        as its name became an alias. Inheriting classes keeping data per location
+        move them here
+        ## Parameters:
+        * `sub_type`: type of the moved subscribers, `SERVER_SUB_TYPE` for
+        server, `USER_SUB_TYPE` for user
+        * `location`: location whose name became an alias
+        * `new_location`: location of the canonical name
+        ## Return value:
+        None
+        """
+
     @staticmethod
     def check_sub_type(sub_type: SubType) -> None:
         """Check whether sub type correspond to a known type of subscriber.
@@ -235,6 +316,7 @@ class WeatherEvent(ABC):
     async def save_locations_subscribers(self) -> None:
         """Save all locations' subscribers into a file at JSON format"""
         logging.info("Saving locations' subscribers data...")
+        await self.update_location_names()
         await self.__mutex_access_dict.acquire()
         copy_dict = {}
         for sub_type, sub_dict in self.__sub_locations_dict.items():
@@ -298,6 +380,8 @@ class WeatherEvent(ABC):
                     await self.add_sub2location(
                         subscriber, location.name, str(location.tz)
                     )
+        # Locations saved under a name that became an alias are merged:
+        await self.update_location_names()
         logging.info("Subscribers data was successfully loaded")
 
     @abstractmethod
@@ -310,8 +394,23 @@ class WeatherEvent(ABC):
 class DailyWeatherEvent(WeatherEvent):
     """Class that handle daily weather event and send it to subscriber"""
 
-    def __init__(self, save_path: str, api_handler: WeatherAPIHandler) -> None:
-        super().__init__(save_path, api_handler)
+    def __init__(
+        self,
+        save_path: str,
+        api_handler: WeatherProvider,
+        aliases: Optional[AliasIndex] = None,
+        render_service: Optional[RenderService] = None,
+    ) -> None:
+        """Constructor for this class
+        ## Parameters:
+        * `save_path`: path to the file where saving locations' subscribers data
+        * `api_handler`: weather provider, such as an API handler or a router
+        * `aliases`: index of location names, optional
+        * `render_service`: workers rendering daily weather images, optional. If
+        not specified, a service with a single worker is created
+        """
+        super().__init__(save_path, api_handler, aliases)
+        self.render_service = render_service or RenderService(workers=1)
         # Flag that indicates if daily weather was sent or not for each location:
         self.__dict_weather_sent_flag: Dict[str, Dict[Location, bool]] = {
             SERVER_SUB_TYPE: {},
@@ -319,6 +418,23 @@ class DailyWeatherEvent(WeatherEvent):
         }
         self.__mutex_dict_flag = asyncio.Lock()
 
+    def in_delivery_window(self, margin: int = sunbot.WARMER_DAILY_MARGIN) -> bool:
+        """Return whether daily weather is about to be sent, or was just sent, to
+        a subscribed location
+        ## Parameters:
+        * `margin`: number of minutes before and after the sending hour
+        ## Return value:
+        `True` if the local time of a subscribed location is within `margin`
+        minutes of `DAILY_WEATHER_SEND_HOUR`
+        """
+        for location_flags in self.__dict_weather_sent_flag.values():
+            for location in location_flags:
+                now = datetime.now(location.tz)
+                delta = now.hour * 60 + now.minute - sunbot.DAILY_WEATHER_SEND_HOUR * 60
+                if -margin <= delta <= margin:
+                    return True
+        return False
+
     async def get_location_flag(self, sub_type: SubType, location: Location) -> bool:
         """Return the flag for the specified location and subscriber type. The
         value of the flag is `True` if the daily weather was already sent for the
@@ -371,6 +487,16 @@ class DailyWeatherEvent(WeatherEvent):
         self.__dict_weather_sent_flag[sub_type][location] = value
         self.__mutex_dict_flag.release()
 
+    async def rename_location(
+        self, sub_type: SubType, location: Location, new_location: Location
+    ) -> None:
+        await self.__mutex_dict_flag.acquire()
+        location_flags = self.__dict_weather_sent_flag[sub_type]
+        flag = location_flags.pop(location, False)
+        # The flag of the canonical location is kept if it already has one:
+        location_flags.setdefault(new_location, flag)
+        self.__mutex_dict_flag.release()
+
     async def add_sub2location(
         self,
         subscriber: Union[discord.TextChannel, discord.User],
@@ -401,7 +527,7 @@ class DailyWeatherEvent(WeatherEvent):
         else:
             raise ValueError(f"Unknown subscriber type: {type(subscriber)}")
         # Only add specified location if there is not already known by the task:
-        location = Location(location_name, location_tz)
+        location = Location(self.canonical_location_name(location_name), location_tz)
         if location not in self.__dict_weather_sent_flag[sub_type]:
             # Add current location to the task:
             await self.set_location_flag(sub_type, location, False)
@@ -413,6 +539,9 @@ class DailyWeatherEvent(WeatherEvent):
             # Run forever:
             while True:
                 await asyncio.sleep(60)
+                # Locations for which daily weather must be sent now, with their
+                # subscribers. They are fetched together once all are known:
+                due_locations: List[Tuple[Location, Dict[int, discord.abc.Messageable]]] = []
                 # Check for each known location if it is the time to send the daily
                 # weather or reset flag:
                 for sub_type in SUB_TYPE_LIST:
@@ -432,12 +561,47 @@ class DailyWeatherEvent(WeatherEvent):
                             and not await self.get_location_flag(sub_type, location)
                         ):
                             await self.set_location_flag(sub_type, location, True)
-                            await self.__send_daily_weather2sub(location, sub_dict)
+                            due_locations.append((location, sub_dict))
+                if due_locations:
+                    await self.__send_daily_weather(due_locations)
         except asyncio.CancelledError:
             logging.info("Stopping the daily weather task")
 
+    async def __send_daily_weather(
+        self, due_locations: List[Tuple[Location, Dict[int, discord.abc.Messageable]]]
+    ) -> None:
+        """Private method that fetches daily weather of all the specified locations
+        in a single batch, then sends it to their subscribers
+        ## Parameters:
+        * `due_locations`: list of locations with their subscribers. A location
+        can appear twice, once for servers and once for users: its image is only
+        created once for both
+        ## Return value:
+        None
+        """
+        subscribers: Dict[Location, Dict[int, discord.abc.Messageable]] = {}
+        for location, sub_dict in due_locations:
+            # Servers and users IDs are discord snowflakes, which never collide:
+            subscribers.setdefault(location, {}).update(sub_dict)
+        results = await self.api_handler.aget_daily_weather_data_many(
+            [location.name for location in subscribers], priority=Priority.DAILY
+        )
+        for location, sub_dict in subscribers.items():
+            result = results[location.name]
+            if not result.ok:
+                logging.error(
+                    "Daily weather for %s could not be retrieved: %s",
+                    location.name,
+                    result.error,
+                )
+                continue
+            await self.__send_daily_weather2sub(location, sub_dict, result.data)
+
     async def __send_daily_weather2sub(
-        self, location: Location, sub_dict: Dict[int, discord.Interaction]
+        self,
+        location: Location,
+        sub_dict: Dict[int, discord.abc.Messageable],
+        data: dict,
     ) -> None:
         """Private method that sends daily weather for the specified location to
         all subscribers. Possible value for `sub_type` is `SERVER_SUB_TYPE` for
@@ -445,14 +609,27 @@ class DailyWeatherEvent(WeatherEvent):
         ## Parameters:
         * `location`: location for which the weather is sent to all subscribing servers
         * `sub_dict`: dict of subscribers
+        * `data`: daily weather data of the location
         ## Return value:
         None
         """
-        # Get daily weather response from the API for current location:
-        data = self.api_handler.get_daily_weather_data(location.name)
         # If a response was sent by the weather API:
         if data:
-            create_daily_weather_img(data, "./Data/Images")
+            try:
+                image = await self.render_service.render(
+                    render_daily_weather_image, data
+                )
+            except (asyncio.QueueFull, asyncio.TimeoutError):
+                logging.error(
+                    "Daily weather image for %s could not be rendered", location.name
+                )
+                return
+            except Exception:  # pylint: disable=broad-except
+                # A location whose image fails must not stop the daily weather task:
+                logging.exception(
+                    "Daily weather image for %s could not be rendered", location.name
+                )
+                return
             # Send data for current location on each registered server:
             for sub_id in sub_dict:
                 # Get interaction for current server, which contains a channel
@@ -467,7 +644,7 @@ class DailyWeatherEvent(WeatherEvent):
                 await subscriber.send(
                     content=f"Voici la météo prévue pour aujourd'hui à {location.name}\n",
                     file=discord.File(
-                        f"{sunbot.DAILY_IMAGE_PATH}{sunbot.DAILY_IMAGE_NAME}"
+                        io.BytesIO(image), filename=sunbot.DAILY_IMAGE_NAME
                     ),
                 )
                 await asyncio.sleep(0.1)